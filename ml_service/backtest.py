@@ -0,0 +1,256 @@
+import argparse
+import json
+
+import numpy as np
+
+from indicators import build_price_arrays, indicator_arrays, round_half
+from strategy_panel import swing_setups
+
+# ============================================================
+# SWING STRATEGY BACKTEST
+# ============================================================
+# Replays the trade plan's swing setups (strategy_panel.swing_setups) on
+# every historical bar of every ticker:
+#
+#   "Buy Dip"       limit buy at the close, stop -4%, target SMA 20
+#   "Sell / Avoid"  sell stop 2% below the close, stop +2%, target -6%
+#
+# Signals and levels for the whole (tickers x days) panel are computed in
+# one vectorized pass over the indicator arrays. The trade simulation loops
+# over days and updates all tickers in one vector operation per day (like
+# the recursive indicators): each ticker holds at most one order or
+# position; a signal places an order at the close that stays live for
+# ENTRY_WINDOW bars; a filled position exits at its stop, its target or,
+# after MAX_HOLD bars, at the close. When a bar touches both the stop and
+# the target, the stop is assumed to come first. Gaps past a level fill at
+# the open.
+
+# Bars an order stays live after the signal
+ENTRY_WINDOW = 5
+
+# Bars a position is held before it is closed at the close
+MAX_HOLD = 20
+
+# Cost per side as a fraction of the price (commission + slippage)
+FEE_RATE = 0.0005
+
+SIGNALS = {1: "Buy Dip", -1: "Sell / Avoid"}
+
+# Trade exit reasons
+TARGET, STOP, TIME = 1, 2, 3
+
+
+def swing_signals(arrays, indicators):
+    """
+    The trade plan's swing setup for every bar, as arrays:
+    side (1 long, -1 short, 0 none), entry, stop and target. Inputs are
+    rounded like latest_indicators(); bars before RSI and SMA 20 have
+    warmed up get no signal.
+    """
+    price = round_half(np.nan_to_num(arrays["Close"]))
+    rsi = round_half(indicators["RSI"])
+    sma_20 = round_half(indicators["SMA_20"])
+    warm = ~np.isnan(rsi) & ~np.isnan(sma_20) & (price != 0)
+
+    with np.errstate(invalid="ignore"):
+        side, entry, target, stop = swing_setups(price, rsi, sma_20)
+    return {
+        "side": np.where(warm, side, 0).astype(np.int8),
+        "entry": entry,
+        "stop": stop,
+        "target": target,
+    }
+
+
+def simulate(arrays, signals, entry_window=ENTRY_WINDOW, max_hold=MAX_HOLD, fee=FEE_RATE):
+    """
+    Trades the signals on the price arrays. Returns (trades, state): trades
+    is a dict of equal-length arrays (row, side, entry_col, exit_col,
+    entry, exit, reason, ret); state holds per-row arrays (equity,
+    max_drawdown, expired orders, position still open at the end).
+    """
+    open_, high, low, close = (arrays[field] for field in ("Open", "High", "Low", "Close"))
+    n, days = close.shape
+
+    side = np.zeros(n, dtype=np.int8)
+    entry = np.full(n, np.nan)
+    stop = np.full(n, np.nan)
+    target = np.full(n, np.nan)
+    entry_col = np.zeros(n, dtype=np.int64)
+
+    order_side = np.zeros(n, dtype=np.int8)
+    order_entry = np.full(n, np.nan)
+    order_stop = np.full(n, np.nan)
+    order_target = np.full(n, np.nan)
+    order_until = np.zeros(n, dtype=np.int64)
+
+    equity = np.ones(n)
+    peak = np.ones(n)
+    max_drawdown = np.zeros(n)
+    expired = np.zeros(n, dtype=np.int64)
+    parts = []
+
+    for col in range(days):
+        o, h, l, c = open_[:, col], high[:, col], low[:, col], close[:, col]
+        live = ~np.isnan(c)
+
+        # 1. Orders: a buy limit and a sell stop both trigger on the low
+        waiting = order_side != 0
+        with np.errstate(invalid="ignore"):
+            fill = waiting & live & (l <= order_entry)
+        if fill.any():
+            side[fill] = order_side[fill]
+            entry[fill] = np.minimum(o[fill], order_entry[fill])
+            stop[fill] = order_stop[fill]
+            target[fill] = order_target[fill]
+            entry_col[fill] = col
+            order_side[fill] = 0
+        lapsed = waiting & ~fill & (col >= order_until)
+        expired += lapsed
+        order_side[lapsed] = 0
+
+        # 2. Exits: stop first, then target, then time
+        held = (side != 0) & live
+        if held.any():
+            is_long = side == 1
+            # Gaps only count after the entry bar
+            gap = col > entry_col
+            with np.errstate(invalid="ignore"):
+                stopped = held & np.where(is_long, l <= stop, h >= stop)
+                hit = held & ~stopped & np.where(is_long, h >= target, l <= target)
+            timed = held & ~stopped & ~hit & (col - entry_col >= max_hold)
+            stop_fill = np.where(gap, np.where(is_long, np.fmin(o, stop), np.fmax(o, stop)), stop)
+            target_fill = np.where(gap, np.where(is_long, np.fmax(o, target), np.fmin(o, target)), target)
+            exit_price = np.where(stopped, stop_fill, np.where(hit, target_fill, c))
+            closed = stopped | hit | timed
+            if closed.any():
+                rows = np.flatnonzero(closed)
+                ret = side[rows] * (exit_price[rows] / entry[rows] - 1) - 2 * fee
+                equity[rows] *= 1 + ret
+                reason = np.where(stopped[rows], STOP, np.where(hit[rows], TARGET, TIME))
+                parts.append((rows, side[rows].copy(), entry_col[rows].copy(), np.full(len(rows), col),
+                              entry[rows].copy(), exit_price[rows], reason, ret))
+                side[rows] = 0
+
+        # Drawdown on the marked-to-market equity
+        open_now = (side != 0) & live
+        mark = equity.copy()
+        mark[open_now] *= 1 + side[open_now] * (c[open_now] / entry[open_now] - 1)
+        peak = np.fmax(peak, mark)
+        max_drawdown = np.fmin(max_drawdown, mark / peak - 1)
+
+        # 3. New orders at the close while flat
+        new = (side == 0) & (order_side == 0) & (signals["side"][:, col] != 0)
+        if new.any():
+            order_side[new] = signals["side"][new, col]
+            order_entry[new] = signals["entry"][new, col]
+            order_stop[new] = signals["stop"][new, col]
+            order_target[new] = signals["target"][new, col]
+            order_until[new] = col + entry_window
+
+    names = ("row", "side", "entry_col", "exit_col", "entry", "exit", "reason", "ret")
+    if parts:
+        trades = {name: np.concatenate([part[i] for part in parts]) for i, name in enumerate(names)}
+    else:
+        trades = {name: np.zeros(0) for name in names}
+    state = {"equity": equity, "max_drawdown": max_drawdown, "expired": expired, "open": side != 0}
+    return trades, state
+
+
+def trade_stats(trades, state, n):
+    """Per-row arrays of trade counts, hit rate, win rate, returns and drawdown."""
+    rows = trades["row"].astype(np.int64)
+    count = np.bincount(rows, minlength=n)
+
+    def per_row(mask):
+        return np.bincount(rows[mask], minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "trades": count,
+            "long_trades": per_row(trades["side"] == 1),
+            "short_trades": per_row(trades["side"] == -1),
+            "hit_rate": per_row(trades["reason"] == TARGET) / count,
+            "stop_rate": per_row(trades["reason"] == STOP) / count,
+            "win_rate": per_row(trades["ret"] > 0) / count,
+            "avg_return": np.bincount(rows, weights=trades["ret"], minlength=n) / count,
+            "total_return": state["equity"] - 1,
+            "max_drawdown": state["max_drawdown"],
+            "expired_orders": state["expired"],
+            "open_position": state["open"],
+        }
+
+
+def _value(x, decimals=4):
+    if isinstance(x, (bool, np.bool_)):
+        return bool(x)
+    if isinstance(x, (np.integer, int)):
+        return int(x)
+    return None if np.isnan(x) else round(float(x), decimals)
+
+
+def backtest_panel(panel, tickers=None, entry_window=ENTRY_WINDOW, max_hold=MAX_HOLD, fee=FEE_RATE):
+    """
+    Backtests the swing rules on a {ticker: OHLCV DataFrame} panel.
+    Returns ({ticker: stats dict}, trades) with trades as in simulate()
+    plus the ticker of each trade.
+    """
+    tickers, arrays, start = build_price_arrays(panel, tickers)
+    if not tickers:
+        return {}, {}
+    indicators = indicator_arrays(arrays, start)
+    signals = swing_signals(arrays, indicators)
+    trades, state = simulate(arrays, signals, entry_window, max_hold, fee)
+    stats = trade_stats(trades, state, len(tickers))
+
+    results = {ticker: {name: _value(values[row]) for name, values in stats.items()}
+               for row, ticker in enumerate(tickers)}
+    trades["ticker"] = np.array(tickers, dtype=object)[trades["row"].astype(np.int64)]
+    return results, trades
+
+
+def report(results, trades):
+    """Prints per-ticker results and the totals."""
+    print(f"{'Ticker':<8} {'Trades':>6} {'Hit':>6} {'Win':>6} {'Avg':>8} {'Total':>8} {'MaxDD':>8}")
+    for ticker, r in results.items():
+        if not r["trades"]:
+            continue
+        print(f"{ticker:<8} {r['trades']:>6} {r['hit_rate']:>6.0%} {r['win_rate']:>6.0%} "
+              f"{r['avg_return']:>8.2%} {r['total_return']:>8.1%} {r['max_drawdown']:>8.1%}")
+    if len(trades.get("ret", [])):
+        for side, name in SIGNALS.items():
+            mask = trades["side"] == side
+            if mask.any():
+                print(f"{name}: {mask.sum()} trades, hit rate {np.mean(trades['reason'][mask] == TARGET):.0%}, "
+                      f"win rate {np.mean(trades['ret'][mask] > 0):.0%}, "
+                      f"avg return {trades['ret'][mask].mean():.2%}")
+
+
+if __name__ == "__main__":
+    from price_store import PriceStore
+
+    parser = argparse.ArgumentParser(description="Backtest the swing strategy on stored price history")
+    parser.add_argument("--tickers", default="", help="Comma-separated tickers (default: every stored ticker)")
+    parser.add_argument("--entry-window", type=int, default=ENTRY_WINDOW, help="Bars an order stays live")
+    parser.add_argument("--max-hold", type=int, default=MAX_HOLD, help="Bars before a position is closed")
+    parser.add_argument("--fee", type=float, default=FEE_RATE, help="Cost per side (fraction of price)")
+    parser.add_argument("--output", default="", help="Write per-ticker results to this JSON file")
+    args = parser.parse_args()
+
+    store = PriceStore()
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    if not tickers:
+        tickers = store.tickers()
+    panel = {}
+    for ticker in tickers:
+        df = store.read(ticker)
+        if df is not None:
+            panel[ticker] = df
+    if not panel:
+        parser.error(f"No stored price history in {store.root}; run generate_insights.py first")
+
+    results, trades = backtest_panel(panel, entry_window=args.entry_window, max_hold=args.max_hold, fee=args.fee)
+    report(results, trades)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
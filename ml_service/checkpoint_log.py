@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# ============================================================
+# BATCH CHECKPOINT LOG
+# ============================================================
+# Append-only JSON-lines log of a batch run. Every record is flushed and
+# fsynced before append() returns, so whatever finished before a crash or
+# kill is on disk:
+#
+#   {"type": "run", "tickers": [...], "stages": [...], "resumed": false, "at": ...}
+#   {"type": "stage", "ticker": "TSLA", "stage": "technicals", "fields": {...}, "at": ...}
+#   {"type": "result", "ticker": "TSLA", "result": {...}, "at": ...}
+#
+# Stage records are only written for stages that succeeded. A resumed run
+# appends to the same log and skips those stages; compaction folds the log
+# into one result per ticker for the final output. A torn last line (crash
+# mid-write) is ignored when reading.
+
+CHECKPOINT_FILE = "ml_service/batch_checkpoint.jsonl"
+
+
+class CheckpointLog:
+
+    def __init__(self, path=CHECKPOINT_FILE, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self.appended = 0
+
+    def _read(self):
+        """(records, bytes of complete lines)."""
+        records = []
+        valid = 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    # Only the last line can be torn; nothing valid follows it
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+                    valid += len(line)
+        except FileNotFoundError:
+            pass
+        return records, valid
+
+    def read(self):
+        """Records in the log, oldest first (empty when there is no log)."""
+        return self._read()[0]
+
+    def open(self, tickers, stages, resume=False):
+        """
+        Starts logging a run. A fresh run truncates the log; a resumed one
+        appends to it. Returns the records already in the log.
+        """
+        records = []
+        if resume:
+            records, valid = self._read()
+            if os.path.exists(self.path):
+                # Drop a torn last line so new records start on a clean line
+                with open(self.path, "r+b") as f:
+                    f.truncate(valid)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self.append({"type": "run", "tickers": list(tickers), "stages": list(stages), "resumed": resume})
+        return records
+
+    def append(self, record):
+        with self._lock:
+            if self._file is None:
+                return
+            record = dict(record, at=datetime.now().isoformat())
+            self._file.write(json.dumps(record, default=str) + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.appended += 1
+
+    def record_stage(self, ticker, stage, fields):
+        self.append({"type": "stage", "ticker": ticker, "stage": stage, "fields": fields})
+
+    def record_result(self, ticker, result):
+        self.append({"type": "result", "ticker": ticker, "result": result})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def last_run(records):
+    """The first "run" record of the latest run chain (its ticker list), or None."""
+    runs = [r for r in records if r.get("type") == "run"]
+    for run in reversed(runs):
+        if not run.get("resumed"):
+            return run
+    return runs[0] if runs else None
+
+
+def completed_stages(records):
+    """{ticker: {stage: fields}} for every stage that finished."""
+    done = {}
+    for record in records:
+        if record.get("type") == "stage":
+            done.setdefault(record["ticker"], {})[record["stage"]] = record["fields"]
+    return done
+
+
+def compact(records, empty_result):
+    """
+    {ticker: result} from the log: the latest full result of each ticker
+    (or `empty_result()`), overlaid with every stage that finished.
+    """
+    results = {}
+    for record in records:
+        kind = record.get("type")
+        if kind == "result":
+            results[record["ticker"]] = dict(record["result"])
+        elif kind == "stage":
+            result = results.setdefault(record["ticker"], empty_result())
+            result.update(record["fields"])
+            result["last_updated"] = record["at"]
+    # Stage fields override older full results (e.g. a timed-out attempt)
+    for ticker, stages in completed_stages(records).items():
+        for fields in stages.values():
+            results[ticker].update(fields)
+    return results
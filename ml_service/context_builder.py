@@ -0,0 +1,212 @@
+import re
+import zlib
+
+import numpy as np
+
+from near_duplicates import strip_source
+
+# ============================================================
+# TOKEN-BUDGETED CONTEXT BUILDER (summarizer prompts)
+# ============================================================
+# Picks the headlines that go into a research-note prompt. Instead of the
+# first three per category, every candidate is ranked by
+#   centrality - how much it echoes the rest of the ticker's news
+#   novelty    - how little it repeats the previous research note
+#   position   - the news pipeline's own rank within its category
+# and headlines are taken in maximal-marginal-relevance order, skipping
+# near-copies of ones already chosen, until the input token budget is spent.
+# Publisher suffixes (" - Yahoo Finance") are dropped from the headlines.
+#
+# Embeddings come from the news pipeline's sentence-transformers model and
+# embedding cache; without it, hashed bag-of-words vectors are used.
+# Token counts are estimated from characters (no tokenizer is loaded).
+
+CHARS_PER_TOKEN = 4
+
+# Prompt size (system + template + headlines) in estimated tokens
+MAX_INPUT_TOKENS = 320
+
+# Completion budget: grows with the number of headlines, capped
+MAX_OUTPUT_TOKENS = 500
+OUTPUT_TOKENS_BASE = 150
+OUTPUT_TOKENS_PER_HEADLINE = 30
+
+CENTRALITY_WEIGHT = 1.0
+NOVELTY_WEIGHT = 0.5
+POSITION_WEIGHT = 0.25
+
+# Relevance vs. diversity trade-off when picking the next headline
+MMR_LAMBDA = 0.7
+
+# Headlines at least this similar to a chosen one are dropped
+REDUNDANCY_THRESHOLD = 0.75
+
+# Candidates considered per category (categories arrive ranked)
+MAX_CANDIDATES_PER_CATEGORY = 10
+
+HASH_DIM = 1024
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-8)
+
+
+def hashed_embeddings(texts, dim=HASH_DIM):
+    """Bag-of-words vectors with hashed word and bigram features."""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        for feature in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            vectors[row, zlib.crc32(feature.encode("utf-8")) % dim] += 1.0
+    return _normalize_rows(vectors)
+
+
+def embed(texts):
+    """Unit-length embeddings for `texts` (sentence model when installed)."""
+    if not texts:
+        return np.zeros((0, HASH_DIM), dtype=np.float32)
+    from news_ingest import SEMANTIC_ENABLED, get_semantic_model
+    if SEMANTIC_ENABLED:
+        try:
+            model, cache, _ = get_semantic_model()
+            vectors = cache.encode(model, texts)
+            cache.flush()
+            return _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        except Exception as e:
+            print(f"Context builder: semantic embeddings failed, using word vectors ({e})")
+    return hashed_embeddings(texts)
+
+
+def summary_points(summary):
+    """Bullet and sentence texts of a previous research note."""
+    points = []
+    for line in (summary or "").splitlines():
+        line = line.strip().lstrip("-*• ").strip()
+        if not line or line.startswith("#") or line.endswith("**") or line == "bullets":
+            continue
+        points.extend(s for s in re.split(r"(?<=[.!?])\s+", line) if len(s) > 20)
+    return points
+
+
+def headline_line(title):
+    return f"- {title}\n"
+
+
+def category_header(category):
+    return f"\n### {category}\n"
+
+
+class ContextBuilder:
+
+    def __init__(self, max_input_tokens=MAX_INPUT_TOKENS, max_output_tokens=MAX_OUTPUT_TOKENS,
+                 novelty_weight=NOVELTY_WEIGHT, redundancy_threshold=REDUNDANCY_THRESHOLD, embed=embed):
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.novelty_weight = novelty_weight
+        self.redundancy_threshold = redundancy_threshold
+        self.embed = embed
+
+    def candidates(self, grouped_articles):
+        """[(category, title, position in category)], without repeated titles."""
+        seen = set()
+        found = []
+        for cat, articles in grouped_articles.items():
+            for position, article in enumerate(articles[:MAX_CANDIDATES_PER_CATEGORY]):
+                title = strip_source(article.get('title', ''))
+                key = title.lower()
+                if not title or key in seen:
+                    continue
+                seen.add(key)
+                found.append((cat, title, position))
+        return found
+
+    def output_tokens(self, headline_count):
+        """max_tokens for a note over `headline_count` headlines."""
+        return min(self.max_output_tokens, OUTPUT_TOKENS_BASE + OUTPUT_TOKENS_PER_HEADLINE * headline_count)
+
+    def relevance(self, vectors, positions, previous_vectors):
+        n = len(vectors)
+        similarity = vectors @ vectors.T
+        centrality = (similarity.sum(axis=1) - 1) / (n - 1) if n > 1 else np.ones(n)
+        if len(previous_vectors):
+            novelty = 1 - np.clip((vectors @ previous_vectors.T).max(axis=1), 0, 1)
+        else:
+            novelty = np.ones(n)
+        position = 1 - np.minimum(positions, MAX_CANDIDATES_PER_CATEGORY) / MAX_CANDIDATES_PER_CATEGORY
+        relevance = CENTRALITY_WEIGHT * centrality + self.novelty_weight * novelty + POSITION_WEIGHT * position
+        return relevance, similarity
+
+    def select(self, candidates, vectors, previous_vectors, budget):
+        """Indices of the headlines to include, in MMR order, within `budget` tokens."""
+        if not candidates:
+            return []
+        positions = np.array([position for _, _, position in candidates], dtype=np.float32)
+        relevance, similarity = self.relevance(vectors, positions, previous_vectors)
+
+        chosen = []
+        categories = set()
+        used = 0
+        remaining = list(range(len(candidates)))
+        while remaining:
+            if chosen:
+                redundancy = similarity[np.ix_(remaining, chosen)].max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining))
+            scores = MMR_LAMBDA * relevance[remaining] - (1 - MMR_LAMBDA) * redundancy
+            # Ties (up to float noise) go to the earlier candidate
+            best = int(np.flatnonzero(scores >= scores.max() - 1e-6)[0])
+            index = remaining.pop(best)
+            if redundancy[best] >= self.redundancy_threshold:
+                continue
+            cat, title, _ = candidates[index]
+            cost = estimate_tokens(headline_line(title))
+            if cat not in categories:
+                cost += estimate_tokens(category_header(cat))
+            # The best headline always goes in, even over budget
+            if chosen and used + cost > budget:
+                continue
+            chosen.append(index)
+            categories.add(cat)
+            used += cost
+        return chosen
+
+    def build_many(self, grouped_by_ticker, previous=None, fixed_tokens=0):
+        """
+        {ticker: [(category, title)]} in prompt order (categories in their
+        original order, headlines by pipeline rank), for prompts of at most
+        max_input_tokens including `fixed_tokens` of template. `previous`
+        maps tickers to their last research note. Embeddings for every
+        ticker are computed in one batch.
+        """
+        previous = previous or {}
+        budget = max(0, self.max_input_tokens - fixed_tokens)
+
+        candidates = {t: self.candidates(g) for t, g in grouped_by_ticker.items()}
+        points = {t: summary_points(previous.get(t)) for t in grouped_by_ticker}
+        texts = [title for found in candidates.values() for _, title, _ in found]
+        texts += [point for found in points.values() for point in found]
+        vectors = self.embed(texts)
+
+        selected = {}
+        offset = 0
+        point_offset = sum(len(found) for found in candidates.values())
+        for ticker, found in candidates.items():
+            ticker_vectors = vectors[offset:offset + len(found)]
+            offset += len(found)
+            previous_vectors = vectors[point_offset:point_offset + len(points[ticker])]
+            point_offset += len(points[ticker])
+
+            chosen = self.select(found, ticker_vectors, previous_vectors, budget)
+            order = {cat: i for i, cat in enumerate(grouped_by_ticker[ticker])}
+            chosen.sort(key=lambda i: (order[found[i][0]], found[i][2]))
+            selected[ticker] = [(found[i][0], found[i][1]) for i in chosen]
+        return selected
+
+    def build(self, grouped_articles, previous=None, fixed_tokens=0):
+        """[(category, title)] for one ticker (see build_many)."""
+        return self.build_many({None: grouped_articles}, {None: previous}, fixed_tokens)[None]
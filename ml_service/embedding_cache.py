@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+# ============================================================
+# PERSISTENT EMBEDDING CACHE
+# ============================================================
+# Sentence embeddings keyed by a hash of the normalized text. Vectors live
+# in a memory-mapped matrix (float32, or int8 with a per-row scale) and a
+# small JSON index maps text hashes to rows. Entries expire after a TTL
+# and the least recently used rows are reused once the cache is full.
+#
+#   embedding_cache/<model>/index.json
+#   embedding_cache/<model>/vectors.bin
+#   embedding_cache/<model>/scales.bin     (int8 only)
+#
+# One writer process at a time; readers in other processes may see a
+# slightly older index.
+
+# Shared by the pipeline and the notebooks, whatever their working directory
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache")
+
+CACHE_VERSION = 1
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_TTL_DAYS = 30
+
+# Rows allocated when the matrix first grows
+INITIAL_ROWS = 1024
+
+
+def normalize_text(text):
+    """Whitespace-collapsed, lowercased text (MiniLM is uncased)."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def text_key(text):
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+
+    def __init__(self, model_name, root=CACHE_DIR, capacity=DEFAULT_CAPACITY,
+                 ttl_days=DEFAULT_TTL_DAYS, quantize=False):
+        self.model_name = model_name
+        self.dir = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        self.capacity = capacity
+        self.ttl = ttl_days * 86400
+        self.quantize = quantize
+
+        self._lock = threading.Lock()
+        self._index = {}        # key -> [row, created, last_used]
+        self._free = []
+        self._rows = 0          # rows allocated in the files
+        self._used = 0          # high-water mark of assigned rows
+        self.dim = None
+        self._vectors = None
+        self._scales = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+        self._load()
+
+    # ----------------------------------
+
+    @property
+    def _dtype(self):
+        return np.int8 if self.quantize else np.float32
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _load(self):
+        try:
+            with open(self._path("index.json"), "r") as f:
+                meta = json.load(f)
+            if meta["version"] != CACHE_VERSION or meta["quantize"] != self.quantize:
+                raise ValueError("cache layout changed")
+            self.dim = meta["dim"]
+            self._rows = meta["rows"]
+            self._used = meta["used"]
+            self._index = meta["entries"]
+            self._free = meta["free"]
+            self._open_files()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Embedding cache reset ({e})")
+            self._index, self._free = {}, []
+            self._rows = self._used = 0
+            self.dim = None
+
+    def _open_files(self):
+        self._vectors = np.memmap(self._path("vectors.bin"), dtype=self._dtype, mode="r+",
+                                  shape=(self._rows, self.dim))
+        if self.quantize:
+            self._scales = np.memmap(self._path("scales.bin"), dtype=np.float32, mode="r+",
+                                     shape=(self._rows,))
+
+    def _grow(self, rows):
+        """Extends the backing files to hold at least `rows` rows."""
+        new_rows = max(rows, INITIAL_ROWS, self._rows * 2)
+        new_rows = min(new_rows, self.capacity)
+        os.makedirs(self.dir, exist_ok=True)
+
+        files = [("vectors.bin", np.dtype(self._dtype).itemsize * self.dim)]
+        if self.quantize:
+            files.append(("scales.bin", 4))
+        for name, row_bytes in files:
+            with open(self._path(name), "ab") as f:
+                f.truncate(new_rows * row_bytes)
+
+        self._vectors = self._scales = None
+        self._rows = new_rows
+        self._open_files()
+
+    # ----------------------------------
+
+    def _read(self, row):
+        vec = np.array(self._vectors[row], dtype=np.float32)
+        if self.quantize:
+            vec = vec * self._scales[row]
+        return vec
+
+    def _write(self, row, vec):
+        if self.quantize:
+            scale = float(np.max(np.abs(vec))) / 127 or 1.0
+            self._vectors[row] = np.round(vec / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._vectors[row] = vec
+
+    def _evict_expired(self, now):
+        expired = [k for k, (_, created, _) in self._index.items() if now - created > self.ttl]
+        for key in expired:
+            self._free.append(self._index.pop(key)[0])
+        self.expired += len(expired)
+
+    def _allocate(self, count, now):
+        """Returns `count` free rows, evicting expired then least recently used entries."""
+        rows = []
+        while self._free and len(rows) < count:
+            rows.append(self._free.pop())
+
+        new_rows = min(count - len(rows), self.capacity - self._used)
+        if new_rows > 0:
+            if self._used + new_rows > self._rows:
+                self._grow(self._used + new_rows)
+            rows.extend(range(self._used, self._used + new_rows))
+            self._used += new_rows
+
+        if len(rows) < count:
+            self._evict_expired(now)
+            while self._free and len(rows) < count:
+                rows.append(self._free.pop())
+
+        if len(rows) < count:
+            by_age = sorted(self._index, key=lambda k: self._index[k][2])
+            for key in by_age[:count - len(rows)]:
+                rows.append(self._index.pop(key)[0])
+                self.evictions += 1
+
+        return rows
+
+    # ----------------------------------
+
+    def encode(self, model, texts, batch_size=64):
+        """
+        Returns a (len(texts), dim) float32 array of embeddings, encoding
+        only texts that are not cached (or have expired) with `model`.
+        """
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+
+        now = time.time()
+        keys = [text_key(t) for t in texts]
+        out = [None] * len(texts)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._index.get(key)
+                if entry is not None and now - entry[1] > self.ttl:
+                    self._free.append(self._index.pop(key)[0])
+                    self.expired += 1
+                    entry = None
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+                else:
+                    entry[2] = now
+                    out[i] = self._read(entry[0])
+                    self.hits += 1
+
+        if missing:
+            miss_texts = [texts[idx[0]] for idx in missing.values()]
+            embs = np.asarray(model.encode(miss_texts, batch_size=batch_size), dtype=np.float32)
+            for idx, vec in zip(missing.values(), embs):
+                for i in idx:
+                    out[i] = vec
+
+            with self._lock:
+                if self.dim is None:
+                    self.dim = embs.shape[1]
+                # Another thread may have stored some of these keys while the model ran
+                new = [(key, vec) for key, vec in zip(missing, embs) if key not in self._index]
+                # Fewer rows than misses only when one call exceeds the capacity
+                rows = self._allocate(min(len(new), self.capacity), now)
+                for row, (key, vec) in zip(rows, new):
+                    self._write(row, vec)
+                    self._index[key] = [row, now, now]
+
+        return np.vstack(out).astype(np.float32)
+
+    def flush(self):
+        """Writes vectors and the index to disk."""
+        with self._lock:
+            if self.dim is None:
+                return
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._scales is not None:
+                self._scales.flush()
+            meta = {
+                "version": CACHE_VERSION,
+                "model": self.model_name,
+                "quantize": self.quantize,
+                "dim": self.dim,
+                "rows": self._rows,
+                "used": self._used,
+                "entries": self._index,
+                "free": self._free,
+            }
+            os.makedirs(self.dir, exist_ok=True)
+            tmp_path = self._path("index.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self._path("index.json"))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"Embedding cache: {s['hits']}/{s['hits'] + s['misses']} hits "
+              f"({s['hit_rate']:.0%}), {s['entries']} entries, "
+              f"{s['evictions']} evicted, {s['expired']} expired")
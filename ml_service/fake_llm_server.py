@@ -0,0 +1,195 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ============================================================
+# FAKE OPENAI-COMPATIBLE LLM SERVER (local testing)
+# ============================================================
+# Answers POST /v1/chat/completions like the HuggingFace router does, after
+# `latency` seconds; with "stream": true the answer is sent as server-sent
+# events, the first chunk after `latency / 10`. It can also misbehave on
+# purpose:
+# - more than `max_concurrent` open requests get 429 with Retry-After
+# - the first `fail_first` requests get 503
+# - a user message containing BAD_REQUEST_MARKER gets 400
+#
+# Run it standalone and point the summarizer at it:
+#   python ml_service/fake_llm_server.py --port 8090
+#   LLM_API_URL=http://127.0.0.1:8090/v1/chat/completions python ml_service/generate_insights.py
+
+BAD_REQUEST_MARKER = "__bad_request__"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, content, latency):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        pieces = content.split(" ")
+        time.sleep(latency / 10)
+        for i, piece in enumerate(pieces):
+            delta = piece if i == 0 else " " + piece
+            chunk = {"object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(latency * 0.9 / len(pieces))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            request = {}
+        prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+
+        status = fake.admit(self.client_address)
+        try:
+            if status == 429:
+                self._reply(429, {"error": "rate limited"}, {"Retry-After": str(fake.retry_after)})
+                return
+            if status == 503:
+                self._reply(503, {"error": "overloaded"})
+                return
+            if BAD_REQUEST_MARKER in prompt:
+                fake.record(400)
+                self._reply(400, {"error": "bad request"})
+                return
+
+            fake.log_request(len(prompt), request.get("max_tokens"))
+            prompt_tokens = len(prompt.split())
+            content = (f"### Key News & Market Drivers\n- Fake note for {prompt_tokens} prompt words\n"
+                       f"### Analyst View\nNothing to add.")
+            completion_tokens = len(content.split())
+            fake.record(200)
+            if request.get("stream"):
+                self._stream(content, fake.latency)
+                return
+            time.sleep(fake.latency)
+            self._reply(200, {
+                "id": f"chatcmpl-{fake.requests}",
+                "object": "chat.completion",
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+        finally:
+            fake.release()
+
+
+class FakeLLMServer:
+    """Threaded fake server; use as a context manager, requests go to `.url`."""
+
+    def __init__(self, latency=0.2, max_concurrent=None, retry_after=1, fail_first=0, port=0):
+        self.latency = latency
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.statuses = Counter()
+        self.connections = set()
+        self.rate_limited_at = []     # monotonic times of 429 responses
+        self.request_times = []       # monotonic times of every request
+        self.prompt_chars = []        # prompt length of every answered request
+        self.max_tokens = []          # max_tokens of every answered request
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1/chat/completions"
+
+    def admit(self, client_address):
+        """Registers a request; returns 429/503 when it should be refused, else None."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            self.request_times.append(now)
+            self.connections.add(client_address)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.max_concurrent is not None and self.in_flight > self.max_concurrent:
+                self.statuses[429] += 1
+                self.rate_limited_at.append(now)
+                return 429
+            if self.requests <= self.fail_first:
+                self.statuses[503] += 1
+                return 503
+        return None
+
+    def log_request(self, prompt_chars, max_tokens):
+        with self._lock:
+            self.prompt_chars.append(prompt_chars)
+            self.max_tokens.append(max_tokens)
+
+    def record(self, status):
+        with self._lock:
+            self.statuses[status] += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds per completion")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="Open requests before 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(latency=args.latency, max_concurrent=args.max_concurrent,
+                         retry_after=args.retry_after, port=args.port)
+    print(f"Fake LLM server on {fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
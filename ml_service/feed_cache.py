@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import rss_parser
+
+# ============================================================
+# POOLED HTTP SESSION + CONDITIONAL-GET FEED CACHE
+# ============================================================
+# One requests.Session for every feed request, so connections (and TLS
+# sessions) to the same host are reused across feeds and tickers. Each
+# feed's ETag / Last-Modified and its parsed entries are cached. A feed
+# fetched within the TTL is served from the cache without a request; after
+# that the request sends If-None-Match / If-Modified-Since and a 304 reuses
+# the cached entries without downloading or parsing the feed. Validators are
+# kept well past the TTL so old entries are still revalidated, not refetched.
+#
+# RSS 2.0 and Atom feeds are parsed with rss_parser (streaming, stops at the
+# date cutoff); feedparser is only loaded for other formats.
+
+FEED_CACHE_FILE = "ml_service/feed_cache.json"
+
+FEED_CACHE_VERSION = 2
+
+# Minutes a fetched (or revalidated) feed is served without a request
+FEED_TTL_MINUTES = 15
+
+# Days a feed's validators and entries are kept after its last fetch
+FEED_KEEP_DAYS = 7
+
+# Connections kept open per host
+POOL_SIZE = 16
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+            _session = session
+    return _session
+
+
+def _entry_time(entry):
+    """Publication time as epoch seconds, or None."""
+    for field in ("published_parsed", "updated_parsed"):
+        parsed = getattr(entry, field, None)
+        if parsed:
+            return time.mktime(parsed)
+    return None
+
+
+def parse_feed(content, cutoff=None, date_sorted=True):
+    """
+    Parses feed bytes into (feed title, plain entry dicts).
+    RSS 2.0 and Atom go through the streaming parser, which leaves out
+    entries published before `cutoff`; other formats use feedparser.
+    """
+    parsed = rss_parser.parse_feed(content, cutoff, date_sorted)
+    if parsed is not None:
+        return parsed
+
+    import feedparser
+    feed = feedparser.parse(content)
+    entries = [{
+        'title': getattr(entry, 'title', ''),
+        'link': getattr(entry, 'link', ''),
+        'summary': getattr(entry, 'summary', ''),
+        'published': _entry_time(entry),
+    } for entry in feed.entries]
+    return getattr(feed.feed, 'title', 'Unknown'), entries
+
+
+class FeedCache:
+
+    def __init__(self, path=FEED_CACHE_FILE, ttl_minutes=FEED_TTL_MINUTES, keep_days=FEED_KEEP_DAYS,
+                 session=None):
+        self.path = path
+        self.ttl = ttl_minutes * 60
+        self.keep = keep_days * 86400
+        self.session = session
+        self._lock = threading.Lock()
+        self._feeds = {}        # url -> {etag, last_modified, fetched_at, cutoff, title, entries}
+        self._dirty = False
+
+        self.fresh = 0
+        self.not_modified = 0
+        self.downloaded = 0
+        self.failed = 0
+        self.bytes = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != FEED_CACHE_VERSION:
+                raise ValueError("cache version changed")
+            self._feeds = data["feeds"]
+        except Exception as e:
+            print(f"Feed cache reset ({e})")
+            self._feeds = {}
+
+    # ----------------------------------
+
+    def fetch(self, url, timeout=5, cutoff=None, date_sorted=True):
+        """
+        Returns (feed title, entries) for `url`, or None when the feed could
+        not be fetched. Entries are dicts with title, link, summary and
+        published (epoch seconds or None). Entries published before
+        `cutoff` (epoch seconds) may be left out; `date_sorted` says whether
+        the feed lists newest entries first.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._feeds.get(url)
+        # Entries were cut at a later date than this caller needs
+        if cached is not None and cached.get("cutoff") is not None:
+            if cutoff is None or cached["cutoff"] > cutoff:
+                cached = None
+        if cached is not None and now - cached["fetched_at"] <= self.ttl:
+            with self._lock:
+                self.fresh += 1
+            return cached["title"], cached["entries"]
+
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers['If-None-Match'] = cached["etag"]
+            if cached.get("last_modified"):
+                headers['If-Modified-Since'] = cached["last_modified"]
+
+        session = self.session or get_session()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            with self._lock:
+                self.failed += 1
+            return None
+
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                self.not_modified += 1
+                cached["fetched_at"] = now
+                self._dirty = True
+            return cached["title"], cached["entries"]
+
+        if response.status_code != 200:
+            with self._lock:
+                self.failed += 1
+            return None
+
+        title, entries = parse_feed(response.content, cutoff, date_sorted)
+        with self._lock:
+            self.downloaded += 1
+            self.bytes += len(response.content)
+            # Servers without validators are simply fetched in full next time
+            if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+                self._feeds[url] = {
+                    "etag": response.headers.get('ETag'),
+                    "last_modified": response.headers.get('Last-Modified'),
+                    "fetched_at": now,
+                    "cutoff": cutoff,
+                    "title": title,
+                    "entries": entries,
+                }
+                self._dirty = True
+        return title, entries
+
+    def save(self):
+        """Writes the cache to disk, dropping feeds not fetched for FEED_KEEP_DAYS."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            self._feeds = {url: feed for url, feed in self._feeds.items()
+                           if now - feed["fetched_at"] <= self.keep}
+            data = {"version": FEED_CACHE_VERSION, "feeds": self._feeds}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def report(self):
+        total = self.fresh + self.not_modified + self.downloaded + self.failed
+        print(f"Feed cache: {self.fresh}/{total} feeds served fresh, {self.not_modified} unchanged (304), "
+              f"{self.downloaded} downloaded ({self.bytes / 1024:.0f} KB), {self.failed} failed")
+
+
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+
+def get_feed_cache():
+    """Process-wide FeedCache (loaded on first use)."""
+    global _feed_cache
+    with _feed_cache_lock:
+        if _feed_cache is None:
+            _feed_cache = FeedCache()
+    return _feed_cache
@@ -1,8 +1,9 @@
-import yfinance as yf
+from metadata_service import get_metadata_service
 
 def compute_fundamentals(ticker_symbol):
     """
-    Fetches fundamental data for a ticker using yfinance.
+    Fetches fundamental data for a ticker using yfinance (through the
+    shared metadata cache).
     Returns a dictionary with marketCap, peRatio, eps, revenueGrowth, beta.
     Always returns a dictionary with keys, values may be None if fetch fails.
     """
@@ -17,8 +18,9 @@ def compute_fundamentals(ticker_symbol):
     }
     
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        info = ticker.info
+        # Shared .info store; avoids a second request after the news lookup
+        info = get_metadata_service().get(
+            ticker_symbol, ["marketCap", "trailingPE", "trailingEps", "revenueGrowth", "beta"])
         
         fundamentals["marketCap"] = info.get("marketCap")
         fundamentals["peRatio"] = info.get("trailingPE")
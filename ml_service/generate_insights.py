@@ -1,138 +1,764 @@
+import argparse
 import json
+import math
 import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
 import time
 
 # --- Financial Modules ---
 from fundamentals import compute_fundamentals
-from indicators import fetch_data, compute_indicators
-from strategy import generate_detailed_strategy
+from indicators import fetch_data, fetch_data_batch, compute_indicators
+from indicator_state import compute_indicators_incremental
+from strategy import generate_detailed_strategy, strategy_probabilities
+from monte_carlo import level_probabilities
+from strategy_panel import evaluate_strategies
 
 # --- News Pipeline Modules ---
-from news_ingest import fetch_news_data, get_rss_feeds # get_rss for debug if needed
+from news_ingest import fetch_news_data, fetch_news_batch, get_rss_feeds # get_rss for debug if needed
 from news_categorize import categorize_news
 from news_summarize import NewsSummarizer
+from summary_cache import SummaryCache
+from context_builder import ContextBuilder, MAX_INPUT_TOKENS
 from market_scanner import get_most_active_tickers
+from metadata_service import get_metadata_service
+from insights_store import InsightsStore
+from checkpoint_log import CheckpointLog, completed_stages, compact, last_run
+from stage_memo import get_stage_memo, code_version, stage_key, frame_fingerprint
 
 
-OUTPUT_FILE = "ml_service/insights_cache.json"
+# ============================================================
+# CONCURRENCY SETTINGS
+# ============================================================
 
-def main():
-    print(f"Starting Daily Equity Research Batch: {datetime.now()}")
-    
-    # 1. Initialize Global Models
+# Tickers processed at the same time (1 = old sequential behaviour)
+MAX_WORKERS = 8
+
+# Max concurrent calls into each external service, shared by all workers
+STAGE_LIMITS = {
+    "yfinance": 4,
+    "rss": 4,
+    "llm": 8,
+}
+
+# Wall-clock budget for a single ticker (seconds)
+TICKER_TIMEOUT = 180
+
+# Seconds the batch waits for .info refreshes (before using stale metadata, and before saving)
+METADATA_TIMEOUT = 60
+
+# Append each batch's articles to the partitioned news store (news_store.py)
+ARCHIVE_NEWS = True
+
+# Name prefix of the ticker worker threads
+WORKER_PREFIX = "ticker-worker"
+
+# ============================================================
+# STAGES
+# ============================================================
+
+STAGES = ["fundamentals", "technicals", "strategy", "news", "summary"]
+
+# Stages that need another stage's output in the same run
+STAGE_DEPENDENCIES = {
+    "strategy": ["technicals"],
+    "summary": ["news"],
+}
+
+# Result fields owned by each stage (used to merge partial runs)
+STAGE_FIELDS = {
+    "fundamentals": ["fundamentals"],
+    "technicals": ["technicals"],
+    "strategy": ["trade_report"],
+    "news": ["news_count"],
+    "summary": ["news_summary"],
+}
+
+# Stages whose output is not checkpointed (only its fields are) and must run
+# again when the listed stage is still to do: summaries need the articles
+RERUN_FOR = {
+    "summary": ["news"],
+}
+
+# news_summary values that are not research notes
+PLACEHOLDER_SUMMARIES = ("Data Pending", "No recent news found.", "No material news.",
+                         "AI Summarizer unavailable.", "Error generating summary", "News processing failed")
+
+# news_summary values left by a failed news or summary stage
+FAILED_SUMMARIES = ("Data Pending", "AI Summarizer unavailable.", "Error generating summary", "News processing failed")
+
+# Code behind each memoized stage; a change invalidates its stored results
+STAGE_CODE = {
+    "technicals": code_version(compute_indicators, compute_indicators_incremental),
+    "strategy": code_version(generate_detailed_strategy, evaluate_strategies, level_probabilities),
+    "categories": code_version(categorize_news),
+    "summary": code_version(NewsSummarizer, ContextBuilder),
+}
+
+_stage_semaphores = {stage: threading.BoundedSemaphore(limit) for stage, limit in STAGE_LIMITS.items()}
+
+
+@contextmanager
+def stage_slot(stage):
+    """Blocks until a slot for the given external service is free."""
+    semaphore = _stage_semaphores[stage]
+    with semaphore:
+        yield
+
+
+def empty_result(error=None):
+    """Returns the default result object for a ticker."""
+    # This guarantees keys exist even if everything fails
+    result = {
+        "last_updated": datetime.now().isoformat(),
+        "fundamentals": {},
+        "technicals": {},
+        "trade_report": {},
+        "news_summary": "Data Pending",
+        "news_count": 0,
+        "sentiment": {"verdict": "Neutral", "overall_score": 0, "counts": {}} # Default placeholder
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+def check_deadline(ticker, deadline):
+    """
+    Raises TimeoutError once the ticker has used up its time budget.
+    The budget is only checked between stages: a stage that has started
+    runs to the end, bounded by the timeouts on its network calls
+    (indicators.YF_TIMEOUT, the feed and LLM request timeouts).
+    """
+    if time.monotonic() > deadline:
+        raise TimeoutError(f"{ticker} exceeded {TICKER_TIMEOUT}s time budget")
+
+
+def resolve_stages(selected):
+    """Adds the dependencies of the selected stages, in pipeline order."""
+    wanted = set(selected)
+    for stage in selected:
+        wanted.update(STAGE_DEPENDENCIES.get(stage, []))
+    return [stage for stage in STAGES if stage in wanted]
+
+
+def stage_succeeded(stage, result):
+    """True when the stage (and what it was computed from) produced real output."""
+    if any(not stage_succeeded(dep, result) for dep in STAGE_DEPENDENCIES.get(stage, [])):
+        return False
+    if any(isinstance(result[field], dict) and "error" in result[field] for field in STAGE_FIELDS[stage]):
+        return False
+    if stage == "news":
+        return not result["news_summary"].startswith("News processing failed")
+    if stage == "summary":
+        return not result["news_summary"].startswith(FAILED_SUMMARIES)
+    return True
+
+
+def pending_stages(stages, done):
+    """The stages still to run for a ticker whose checkpointed stages are `done`."""
+    pending = set()
+    for stage in stages:
+        deps = STAGE_DEPENDENCIES.get(stage, [])
+        if stage not in done or any(dep in pending for dep in deps):
+            pending.add(stage)
+            pending.update(s for s in RERUN_FOR.get(stage, []) if s in stages)
+    return [stage for stage in stages if stage in pending]
+
+
+def checkpoint_stage(checkpoint, ticker, stage, result):
+    """Appends a successful stage's fields to the checkpoint log."""
+    if checkpoint is None or not stage_succeeded(stage, result):
+        return
     try:
-        summarizer = NewsSummarizer()
+        checkpoint.record_stage(ticker, stage, {field: result[field] for field in STAGE_FIELDS[stage]})
     except Exception as e:
-        print(f"Failed to init summarizer: {e}")
-        summarizer = None
-    
-    # 2. Get Tickers (Source of Truth)
-    tickers = get_most_active_tickers(limit=25)
-    # tickers = ["TSLA", "AAPL"] # Debug
-    
-    insights = {}
-    
-    for ticker in tickers:
-        print(f"\n========================================\nProcessing {ticker}\n========================================")
-        
-        # Initialize result object for this ticker
-        # This guarantees keys exist even if everything fails
-        ticker_result = {
-            "last_updated": datetime.now().isoformat(),
-            "fundamentals": {},
-            "technicals": {},
-            "trade_report": {},
-            "news_summary": "Data Pending",
-            "news_count": 0,
-            "sentiment": {"verdict": "Neutral", "overall_score": 0, "counts": {}} # Default placeholder
-        }
-        
+        print(f"[{ticker}] Could not checkpoint {stage}: {e}")
+
+
+def strategy_ok(plan):
+    return not (isinstance(plan, dict) and "error" in plan)
+
+
+def summary_ok(note):
+    return isinstance(note, str) and not note.startswith(FAILED_SUMMARIES)
+
+
+def memo_technicals(panel):
+    """
+    Indicators for a {ticker: bars} panel. Tickers whose bars did not change
+    since the last run get their stored indicators; the rest go through the
+    incremental indicator state.
+    """
+    memo = get_stage_memo()
+    results = {}
+    keys = {}
+    changed = {}
+    for ticker, df in panel.items():
+        if df is None or df.empty:
+            continue
+        keys[ticker] = stage_key(STAGE_CODE["technicals"], frame_fingerprint(df))
+        cached = memo.get("technicals", ticker, keys[ticker])
+        if cached is not None:
+            results[ticker] = cached
+        else:
+            changed[ticker] = df
+    if changed:
+        for ticker, values in compute_indicators_incremental(changed).items():
+            memo.put("technicals", ticker, keys[ticker], values)
+            results[ticker] = values
+    return results
+
+
+def categorize(ticker, articles):
+    """categorize_news(articles), reusing the stored grouping when the articles did not change."""
+    memo = get_stage_memo()
+    key = stage_key(STAGE_CODE["categories"], [(a.get("title"), a.get("summary")) for a in articles])
+    groups = memo.get("categories", ticker, key)
+    if groups is None:
+        grouped = categorize_news(articles)
+        index = {id(article): i for i, article in enumerate(articles)}
+        memo.put("categories", ticker, key, {cat: [index[id(a)] for a in group] for cat, group in grouped.items()})
+        return grouped
+    grouped = {}
+    for cat, indices in groups.items():
+        grouped[cat] = [articles[i] for i in indices]
+        for article in grouped[cat]:
+            article["category"] = cat
+    return grouped
+
+
+def summary_key(summarizer, grouped):
+    """
+    Memo key for a ticker's research note: the summarizer's settings, the
+    categorized headlines and the day. The previous note only steers which
+    headlines are picked, so it is not part of the key (unchanged news keeps
+    its note). The memo only serves reruns on the same day; later runs go
+    through the summary cache, whose TTL bounds how long a note is reused.
+    """
+    headlines = {cat: [a.get("title") for a in articles] for cat, articles in grouped.items()}
+    return stage_key(STAGE_CODE["summary"], summarizer.prompt_key, summarizer.context.max_input_tokens, headlines,
+                     datetime.now().strftime("%Y-%m-%d"))
+
+
+def process_ticker(ticker, summarizer, timeout=TICKER_TIMEOUT, technicals=None, news=None, stages=STAGES,
+                   summaries=None, done=None, checkpoint=None, probabilities=None):
+    """
+    Runs the full research pipeline for one ticker.
+    Every stage is isolated: a failure is recorded on the result and the
+    remaining stages still run. Stages that start after the time budget
+    is spent are skipped with a timeout error.
+    `technicals` and `news` are the (results, failed) pairs from the batch
+    prefetch steps; without them the data is fetched for this ticker alone.
+    `summaries` holds research notes already generated for the batch, and
+    `probabilities` the batch's Monte-Carlo trade plan probabilities.
+    Only the steps listed in `stages` run.
+    `done` holds the fields of stages finished by an interrupted run; those
+    stages are skipped. Each stage that succeeds is appended to `checkpoint`.
+    """
+    print(f"\n========================================\nProcessing {ticker}\n========================================")
+    deadline = time.monotonic() + timeout
+
+    # Initialize result object for this ticker
+    ticker_result = empty_result()
+    done = done or {}
+    for fields in done.values():
+        ticker_result.update(fields)
+    stages = pending_stages(stages, done)
+
+    if "fundamentals" in stages:
         # --- STEP 1: FUNDAMENTALS ---
         try:
-            print("STEP 1: Computing Fundamentals...")
-            fund = compute_fundamentals(ticker)
+            print(f"[{ticker}] STEP 1: Computing Fundamentals...")
+            check_deadline(ticker, deadline)
+            with stage_slot("yfinance"):
+                fund = compute_fundamentals(ticker)
             ticker_result["fundamentals"] = fund
         except Exception as e:
-            print(f"CRITICAL ERROR in Fundamentals: {e}")
+            print(f"[{ticker}] CRITICAL ERROR in Fundamentals: {e}")
             ticker_result["fundamentals"] = {"error": str(e)}
+        checkpoint_stage(checkpoint, ticker, "fundamentals", ticker_result)
 
+    if "technicals" in stages:
         # --- STEP 2: TECHNICALS ---
         try:
-            print("STEP 2: Computing Technicals...")
-            df = fetch_data(ticker)
-            if df is not None and not df.empty:
-                tech = compute_indicators(df)
-                ticker_result["technicals"] = tech
+            print(f"[{ticker}] STEP 2: Computing Technicals...")
+            check_deadline(ticker, deadline)
+            if technicals is not None:
+                indicators, failed = technicals
+                if ticker in failed:
+                    raise ValueError(failed[ticker])
+                ticker_result["technicals"] = indicators.get(ticker) or {"error": "No data returned"}
             else:
-                ticker_result["technicals"] = {"error": "No data returned"}
+                with stage_slot("yfinance"):
+                    df = fetch_data(ticker)
+                if df is not None and not df.empty:
+                    key = stage_key(STAGE_CODE["technicals"], frame_fingerprint(df))
+                    tech = get_stage_memo().run("technicals", ticker, key, lambda: compute_indicators(df))
+                    ticker_result["technicals"] = tech
+                else:
+                    ticker_result["technicals"] = {"error": "No data returned"}
         except Exception as e:
-            print(f"CRITICAL ERROR in Technicals: {e}")
+            print(f"[{ticker}] CRITICAL ERROR in Technicals: {e}")
             ticker_result["technicals"] = {"error": str(e)}
+        checkpoint_stage(checkpoint, ticker, "technicals", ticker_result)
 
+    if "strategy" in stages:
         # --- STEP 3: TRADE PLAN & STRATEGY ---
         try:
-            print("STEP 3: Generating Trade Plan...")
+            print(f"[{ticker}] STEP 3: Generating Trade Plan...")
             # We strictly need technicals for this.
-            # Convert technicals to dict if it's not empty, mostly handled by compute_indicators safe_get
             # Strategy module now returns valid structs even on empty/zero inputs
-            
-            # Use 'technicals' from the result object which is now populated (or has error)
             tech_data = ticker_result.get("technicals", {})
             fund_data = ticker_result.get("fundamentals", {})
-            
+
             # Dummy sentiment data for strategy if not yet computed (News is step 4)
             # Strategy.py uses sentiment score to adjust probability, defaulting to 0 is fine
-            dummy_sent = {"overall_score": 0} 
-            
-            plan = generate_detailed_strategy(tech_data, dummy_sent, fund_data)
+            dummy_sent = {"overall_score": 0}
+            # Simulated with the batch; same result as simulating this ticker alone
+            odds = (probabilities or {}).get(ticker)
+
+            # Reused when technicals and fundamentals match the last run's
+            key = stage_key(STAGE_CODE["strategy"], tech_data, dummy_sent, fund_data)
+            plan = get_stage_memo().run("strategy", ticker, key,
+                                        lambda: generate_detailed_strategy(tech_data, dummy_sent, fund_data, odds),
+                                        keep=strategy_ok)
             ticker_result["trade_report"] = plan
-            
+
         except Exception as e:
-            print(f"CRITICAL ERROR in Trade Plan: {e}")
+            print(f"[{ticker}] CRITICAL ERROR in Trade Plan: {e}")
             ticker_result["trade_report"] = {"error": str(e)}
+        checkpoint_stage(checkpoint, ticker, "strategy", ticker_result)
 
+    if "news" in stages:
         # --- STEP 4: NEWS PIPELINE ---
         try:
-            print("STEP 4: Fetching & Summarizing News...")
-            
+            print(f"[{ticker}] STEP 4: Fetching & Summarizing News...")
+            check_deadline(ticker, deadline)
+
             # A. Fetch
-            articles = fetch_news_data(ticker, days=14)
+            if news is not None:
+                news_by_ticker, failed = news
+                if ticker in failed:
+                    raise ValueError(failed[ticker])
+                articles = news_by_ticker.get(ticker, [])
+            else:
+                with stage_slot("rss"):
+                    articles = fetch_news_data(ticker, days=14)
             ticker_result["news_count"] = len(articles)
-            
+
             if articles:
-                # B. Categorize
-                grouped_news = categorize_news(articles)
-                
-                # C. Summarize (LLM)
-                if summarizer:
-                    research_note = summarizer.generate_summary(grouped_news)
+                # B. Categorize + C. Summarize (LLM)
+                if "summary" not in stages:
+                    pass
+                elif summaries is not None and ticker in summaries:
+                    ticker_result["news_summary"] = summaries[ticker]
+                elif summarizer:
+                    check_deadline(ticker, deadline)
+                    grouped_news = categorize(ticker, articles)
+                    with stage_slot("llm"):
+                        research_note = get_stage_memo().run(
+                            "summary", ticker, summary_key(summarizer, grouped_news),
+                            lambda: summarizer.generate_summary(grouped_news, ticker=ticker), keep=summary_ok)
                     ticker_result["news_summary"] = research_note
                 else:
                     ticker_result["news_summary"] = "AI Summarizer unavailable."
-                    
-                # D. (Optional) Sentiment recalculation if we want it in the final object
-                # For now using a placeholder or we could import the SentimentAnalyzer again
-                # Adding basic sentiment logic here or sticking to the requirement "news_summary" is text
-                
+
             else:
                 ticker_result["news_summary"] = "No recent news found."
 
         except Exception as e:
-            print(f"CRITICAL ERROR in News Pipeline: {e}")
+            print(f"[{ticker}] CRITICAL ERROR in News Pipeline: {e}")
             ticker_result["news_summary"] = f"News processing failed: {str(e)}"
-            
-        # --- STEP 5: MERGE & SAVE ---
-        # We already populated `ticker_result` incrementally.
-        insights[ticker] = ticker_result
+        checkpoint_stage(checkpoint, ticker, "news", ticker_result)
+        if "summary" in stages:
+            checkpoint_stage(checkpoint, ticker, "summary", ticker_result)
+
+    return ticker_result
+
+
+def prefetch_metadata(tickers):
+    """
+    Refreshes the cached .info fields (company names, fundamentals) for the
+    whole batch. Tickers whose refresh is still running after
+    METADATA_TIMEOUT use their stale values.
+    """
+    try:
+        get_metadata_service().prefetch(tickers, timeout=METADATA_TIMEOUT)
+    except Exception as e:
+        # Workers fetch whatever is missing themselves
+        print(f"Metadata prefetch failed: {e}")
+
+
+def prefetch_technicals(tickers):
+    """
+    Downloads price history for the whole batch in grouped requests and
+    updates the stored indicator state of every ticker with new bars.
+    """
+    try:
+        with stage_slot("yfinance"):
+            panel, failed = fetch_data_batch(tickers)
+        return memo_technicals(panel), failed
+    except Exception as e:
+        # Fall back to per-ticker downloads inside the workers
+        print(f"Batch price download failed, fetching per ticker: {e}")
+        return None
+
+
+def prefetch_probabilities(technicals, tickers):
+    """
+    Simulates the trade plan probabilities of every ticker with prefetched
+    technicals in one Monte-Carlo batch.
+    """
+    try:
+        indicators, failed = technicals
+        return strategy_probabilities({ticker: indicators.get(ticker) for ticker in tickers if ticker not in failed})
+    except Exception as e:
+        # Fall back to per-ticker simulations inside the workers
+        print(f"Batch probabilities failed, simulating per ticker: {e}")
+        return None
+
+
+def prefetch_news(tickers, persist=True):
+    """
+    Collects news for the whole batch and scores every article with
+    batched embeddings.
+    """
+    try:
+        return fetch_news_batch(tickers, days=14, max_workers=STAGE_LIMITS["rss"], persist=persist)
+    except Exception as e:
+        # Fall back to per-ticker news inside the workers
+        print(f"Batch news fetch failed, fetching per ticker: {e}")
+        return None
+
+
+def archive_news(news):
+    """Appends the batch's articles to the partitioned news store."""
+    try:
+        from news_store import NewsStore, article_rows
+        news_by_ticker, failed = news
+        added = NewsStore().append(article_rows({t: a for t, a in news_by_ticker.items() if t not in failed}))
+        print(f"News store: {added} new articles")
+    except Exception as e:
+        # The research notes do not depend on the archive
+        print(f"News archive skipped: {e}")
+
+
+def load_previous_summaries(tickers, store=None):
+    """{ticker: research note} from the last run's output (placeholders left out)."""
+    store = store or InsightsStore()
+    previous = {}
+    for ticker in tickers:
+        try:
+            note = (store.read(ticker) or {}).get("news_summary")
+        except Exception:
+            continue
+        if isinstance(note, str) and not note.startswith(PLACEHOLDER_SUMMARIES):
+            previous[ticker] = note
+    return previous
+
 
-    # Final Save
+def prefetch_summaries(news, summarizer):
+    """
+    Summarizes every ticker's prefetched news in one concurrent LLM batch,
+    so the batch takes about as long as the slowest few calls. The last
+    run's notes are passed along so already-covered headlines rank lower.
+    Tickers whose headlines did not change keep their stored note.
+    """
     try:
-        with open(OUTPUT_FILE, "w") as f:
-            json.dump(insights, f, indent=4, default=str)
-        print(f"\nBatch Job Completed. Insights saved to {OUTPUT_FILE}")
+        news_by_ticker, failed = news
+        grouped = {ticker: categorize(ticker, articles) for ticker, articles in news_by_ticker.items()
+                   if articles and ticker not in failed}
+        memo = get_stage_memo()
+        keys = {ticker: summary_key(summarizer, groups) for ticker, groups in grouped.items()}
+        notes = {}
+        for ticker, key in keys.items():
+            cached = memo.get("summary", ticker, key)
+            if cached is not None:
+                notes[ticker] = cached
+        changed = {ticker: groups for ticker, groups in grouped.items() if ticker not in notes}
+        if changed:
+            fresh = summarizer.summarize_batch(changed, previous=load_previous_summaries(changed))
+            for ticker, note in fresh.items():
+                if summary_ok(note):
+                    memo.put("summary", ticker, keys[ticker], note)
+            notes.update(fresh)
+        return notes
     except Exception as e:
-        print(f"Failed to write output file: {e}")
+        # Fall back to per-ticker summaries inside the workers
+        print(f"Batch summaries failed, summarizing per ticker: {e}")
+        return None
+
+
+def run_batch(tickers, summarizer, workers=MAX_WORKERS, timeout=TICKER_TIMEOUT, stages=STAGES,
+              checkpoint=None, done=None, persist=True):
+    """
+    Processes all tickers on a bounded worker pool.
+    Results are collected in the order of `tickers`, so the output does not
+    depend on which ticker finishes first. Tickers that are still running
+    when the batch budget runs out get an error placeholder.
+    With a `checkpoint` log, finished stages and ticker results are appended
+    as they complete. `done` ({ticker: {stage: fields}}, from the log of an
+    interrupted run) limits the work to what is still missing; tickers with
+    nothing left are not processed or returned.
+    Without `persist` (dry runs) the news archive, the stage memo and the
+    metadata, summary and near-duplicate caches are left untouched.
+    """
+    done = done or {}
+    plans = {ticker: pending_stages(stages, done.get(ticker, {})) for ticker in tickers}
+
+    def needing(*wanted):
+        return [ticker for ticker in tickers if any(stage in plans[ticker] for stage in wanted)]
+
+    todo = needing(*STAGES)
+    if len(todo) < len(tickers):
+        print(f"Resuming: {len(tickers) - len(todo)} of {len(tickers)} tickers already complete")
+    workers = max(1, min(workers, len(todo) or 1))
+    # Every wave of `workers` tickers gets a full ticker budget
+    batch_timeout = timeout * math.ceil(len(todo) / workers)
+
+    if needing("fundamentals", "news"):
+        prefetch_metadata(needing("fundamentals", "news"))
+    technicals = prefetch_technicals(needing("technicals")) if needing("technicals") else None
+    probabilities = None
+    if needing("strategy") and technicals is not None:
+        probabilities = prefetch_probabilities(technicals, needing("strategy"))
+    news = prefetch_news(needing("news"), persist) if needing("news") else None
+    summaries = None
+    if needing("summary") and summarizer is not None and news is not None:
+        summaries = prefetch_summaries(news, summarizer)
+    if ARCHIVE_NEWS and persist and news is not None:
+        archive_news(news)
+
+    def record(ticker, future):
+        if checkpoint is not None and not future.cancelled() and future.exception() is None:
+            try:
+                checkpoint.record_result(ticker, future.result())
+            except Exception as e:
+                print(f"[{ticker}] Could not checkpoint result: {e}")
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=WORKER_PREFIX)
+    futures = {}
+    for ticker in todo:
+        futures[ticker] = executor.submit(process_ticker, ticker, summarizer, timeout, technicals, news, stages,
+                                          summaries, done.get(ticker), checkpoint, probabilities)
+        futures[ticker].add_done_callback(lambda future, ticker=ticker: record(ticker, future))
+    wait(futures.values(), timeout=batch_timeout)
+
+    insights = {}
+    for ticker in todo:
+        future = futures[ticker]
+        if not future.done():
+            future.cancel()
+            print(f"[{ticker}] Timed out after batch budget of {batch_timeout}s")
+            insights[ticker] = empty_result(error="Timed out")
+        else:
+            try:
+                insights[ticker] = future.result()
+                continue
+            except Exception as e:
+                print(f"[{ticker}] CRITICAL ERROR: {e}")
+                insights[ticker] = empty_result(error=str(e))
+        # Stages that did finish are still in the log; a late result replaces this
+        if checkpoint is not None:
+            try:
+                checkpoint.record_result(ticker, insights[ticker])
+            except Exception as e:
+                print(f"[{ticker}] Could not checkpoint result: {e}")
+
+    # Do not block on stuck network calls; exit_past_stuck_workers() does not wait for them either
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    memo = get_stage_memo()
+    memo.report()
+    metadata = get_metadata_service()
+    # Refreshes started by stale reads during the batch are saved with it
+    metadata.close(timeout=METADATA_TIMEOUT)
+    metadata.report()
+    if summarizer is not None:
+        summarizer.cache.report()
+    if not persist:
+        return insights
+
+    try:
+        memo.save()
+    except Exception as e:
+        print(f"Could not save stage memo: {e}")
+    try:
+        metadata.save()
+    except Exception as e:
+        print(f"Could not save metadata cache: {e}")
+    if summarizer is not None:
+        try:
+            summarizer.cache.save()
+        except Exception as e:
+            print(f"Could not save summary cache: {e}")
+    return insights
+
+
+def exit_past_stuck_workers():
+    """
+    Ends the process once the output is written, without joining ticker
+    workers still blocked in a call that outlived the batch budget
+    (concurrent.futures joins its threads at interpreter exit).
+    """
+    stuck = [t for t in threading.enumerate() if t.name.startswith(WORKER_PREFIX) and t.is_alive()]
+    if not stuck:
+        return
+    print(f"Exiting with {len(stuck)} ticker workers still running")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)
+
+
+def merge_partial(insights, stages, store=None):
+    """
+    For runs with only some stages, keeps the other stages' fields from the
+    stored results so a partial run does not wipe them.
+    """
+    store = store or InsightsStore()
+    fields = [field for stage in stages for field in STAGE_FIELDS[stage]]
+    merged = {}
+    for ticker, result in insights.items():
+        try:
+            existing = store.read(ticker)
+        except Exception:
+            existing = None
+        previous = dict(existing or result)
+        for field in fields + ["last_updated"]:
+            previous[field] = result[field]
+        merged[ticker] = previous
+    return merged
+
+
+def compact_checkpoint(checkpoint, tickers, stages, store, insights=None, started=None):
+    """
+    Folds the checkpoint log into one result per ticker, writes the output
+    and removes the log. `insights` fills in tickers the log is missing
+    (e.g. when appending to it failed). The log is kept if the write fails.
+    """
+    compacted = compact(checkpoint.read(), empty_result)
+    insights = insights or {}
+    final = {}
+    for ticker in tickers:
+        result = compacted.get(ticker) or insights.get(ticker)
+        if result is not None:
+            final[ticker] = result
+    if stages != STAGES:
+        final = merge_partial(final, stages, store)
+
+    # Final Save: one file per ticker, then the manifest
+    try:
+        run = {"stages": stages, "tickers": len(tickers)}
+        if started is not None:
+            run["seconds"] = round(time.monotonic() - started, 1)
+        store.write(final, run=run)
+    except Exception as e:
+        print(f"Failed to write output files: {e}")
+        print(f"Checkpoint kept at {checkpoint.path}; rerun with --resume or --compact")
+        return None
+    checkpoint.remove()
+    return final
+
+
+def main(workers=MAX_WORKERS, stages=None, tickers=None, dry_run=False, summary_reuse=None,
+         prompt_tokens=MAX_INPUT_TOKENS, resume=False, compact_only=False, memo=True):
+    """
+    `resume` continues an interrupted run from its checkpoint log (its
+    tickers and stages unless given); `compact_only` just writes the output
+    from the log. Without `memo` every stage is recomputed.
+    """
+    print(f"Starting Daily Equity Research Batch: {datetime.now()}")
+    started = time.monotonic()
+    checkpoint = CheckpointLog()
+    records = checkpoint.read() if resume or compact_only else []
+    interrupted = last_run(records)
+    if (resume or compact_only) and interrupted is None:
+        print(f"No checkpoint found at {checkpoint.path}; starting a full run")
+        if compact_only:
+            return
+        resume = False
+    if interrupted is not None:
+        tickers = tickers or interrupted["tickers"]
+        stages = stages or interrupted["stages"]
+    stages = resolve_stages(stages or STAGES)
+    print(f"Stages: {', '.join(stages)}")
+    get_stage_memo().enabled = memo
+
+    store = InsightsStore()
+    if compact_only:
+        if compact_checkpoint(checkpoint, tickers, stages, store) is not None:
+            print(f"Checkpoint compacted. Insights saved to {store.root}/")
+        return
+
+    # 1. Initialize Global Models
+    summarizer = None
+    if "summary" in stages:
+        try:
+            summarizer = NewsSummarizer(cache=SummaryCache(reuse_overlap=summary_reuse),
+                                        max_in_flight=STAGE_LIMITS["llm"],
+                                        context=ContextBuilder(max_input_tokens=prompt_tokens))
+        except Exception as e:
+            print(f"Failed to init summarizer: {e}")
+
+    # 2. Get Tickers (Source of Truth)
+    if not tickers:
+        tickers = get_most_active_tickers(limit=25)
+
+    if dry_run:
+        insights = run_batch(tickers, summarizer, workers=workers, stages=stages, persist=False)
+        print(json.dumps(insights, indent=4, default=str))
+        print(f"\nDry run completed in {time.monotonic() - started:.1f}s. Nothing written.")
+        return
+
+    # 3. Process all tickers (concurrently when workers > 1), logging
+    #    every finished stage so an interrupted run can be resumed
+    checkpoint.open(tickers, stages, resume=resume)
+    try:
+        insights = run_batch(tickers, summarizer, workers=workers, stages=stages,
+                             checkpoint=checkpoint, done=completed_stages(records))
+    finally:
+        checkpoint.close()
+
+    if compact_checkpoint(checkpoint, tickers, stages, store, insights, started) is not None:
+        print(f"\nBatch Job Completed in {time.monotonic() - started:.1f}s. Insights saved to {store.root}/")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Daily equity research batch")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Tickers processed concurrently (1 = sequential)")
+    parser.add_argument("--stages", default="",
+                        help=f"Comma-separated stages to run: {','.join(STAGES)} (default: all)")
+    parser.add_argument("--tickers", default="",
+                        help="Comma-separated tickers (default: most active)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print results instead of writing the output file")
+    parser.add_argument("--summary-reuse", type=float, default=None, metavar="OVERLAP",
+                        help="Reuse a ticker's cached summary when this share of headlines (0-1) is unchanged")
+    parser.add_argument("--prompt-tokens", type=int, default=MAX_INPUT_TOKENS,
+                        help="Estimated input tokens per summary prompt (template + headlines)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint, skipping finished work")
+    parser.add_argument("--no-memo", action="store_true",
+                        help="Recompute every stage instead of reusing results for unchanged inputs")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write the output from an interrupted run's checkpoint without running anything")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(unknown)}")
+    if args.summary_reuse is not None and not 0 < args.summary_reuse <= 1:
+        parser.error("--summary-reuse must be between 0 and 1")
+    if args.dry_run and (args.resume or args.compact):
+        parser.error("--dry-run does not use the checkpoint")
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+
+    main(workers=args.workers, stages=stages, tickers=tickers, dry_run=args.dry_run,
+         summary_reuse=args.summary_reuse, prompt_tokens=args.prompt_tokens,
+         resume=args.resume, compact_only=args.compact, memo=not args.no_memo)
+    exit_past_stuck_workers()
@@ -0,0 +1,415 @@
+import json
+import math
+import os
+from collections import deque
+
+import numpy as np
+
+# ============================================================
+# INCREMENTAL INDICATOR STATE
+# ============================================================
+# Keeps just enough state per ticker to produce the compute_indicators()
+# dict after every new bar: EMA values for RSI/MACD, Wilder ATR, and
+# fixed-size buffers for the rolling windows. Appending a bar is O(1),
+# and the values match a full `ta` recompute over the same history.
+
+STATE_FILE = "ml_service/indicator_state.json"
+
+# Bump when the state layout or any formula changes; old state is rebuilt
+STATE_VERSION = 1
+
+# Relative difference that marks stored history as rewritten upstream
+# (split or dividend adjustment)
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+class EMA:
+    """pandas ewm(alpha, adjust=False, min_periods).mean() one value at a time."""
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def _next(self, x):
+        if self.value is None:
+            return x
+        return self.alpha * x + (1 - self.alpha) * self.value
+
+    def push(self, x):
+        self.value = self._next(x)
+        self.count += 1
+
+    def peek(self, x=None):
+        """Current value, or the value after `x` without storing it."""
+        if x is None:
+            value, count = self.value, self.count
+        else:
+            value, count = self._next(x), self.count + 1
+        return value if count >= self.min_periods else None
+
+    def to_dict(self):
+        return {"value": self.value, "count": self.count}
+
+    def load(self, data):
+        self.value = data["value"]
+        self.count = data["count"]
+
+
+class RollingWindow:
+    """Fixed-size buffer with a running sum for rolling mean/std."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._pushes = 0
+
+    def push(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self._pushes += 1
+        # Re-sum once per full turn of the buffer so float drift cannot build up
+        if self._pushes % self.window == 0:
+            self.total = math.fsum(self.values)
+
+    def _view(self, x=None):
+        if x is None:
+            return list(self.values)
+        return (list(self.values) + [x])[-self.window:]
+
+    def mean(self, x=None):
+        if x is None:
+            if len(self.values) < self.window:
+                return None
+            return self.total / self.window
+        if len(self.values) + 1 < self.window:
+            return None
+        oldest = self.values[0] if len(self.values) == self.window else 0.0
+        return (self.total - oldest + x) / self.window
+
+    def std(self, ddof, x=None):
+        values = self._view(x)
+        if len(values) < self.window:
+            return None
+        return float(np.std(values, ddof=ddof))
+
+    def to_dict(self):
+        return {"values": list(self.values)}
+
+    def load(self, data):
+        self.values = deque(data["values"], maxlen=self.window)
+        self.total = math.fsum(self.values)
+
+
+class IndicatorState:
+    """
+    Streaming version of compute_indicators() for one ticker.
+    append() commits a completed bar; update_tick() sets a provisional
+    in-progress bar (intraday) that values() includes until the bar is
+    committed with append().
+    """
+
+    def __init__(self):
+        self.last_date = None
+        self.last_close = None
+        self.bars = 0
+
+        self.rsi_up = EMA(1 / 14, 14)
+        self.rsi_down = EMA(1 / 14, 14)
+        self.ema_fast = EMA(2 / (12 + 1), 12)
+        self.ema_slow = EMA(2 / (26 + 1), 26)
+        self.macd_signal = EMA(2 / (9 + 1), 9)
+
+        self.sma = {window: RollingWindow(window) for window in (20, 50, 200)}
+        self.returns = RollingWindow(20)
+        self.volume = RollingWindow(20)
+
+        self.atr = None
+        self.atr_warmup = []
+
+        self.pending = None
+
+    # ----------------------------------
+
+    def _true_range(self, bar):
+        tr = bar["High"] - bar["Low"]
+        if self.last_close is not None:
+            tr = max(tr, abs(bar["High"] - self.last_close), abs(bar["Low"] - self.last_close))
+        return tr
+
+    def _next_atr(self, tr):
+        """ATR after one more true range (0.0 during warm-up, like `ta`)."""
+        if self.atr is not None:
+            return (self.atr * 13 + tr) / 14
+        if len(self.atr_warmup) == 13:
+            return (math.fsum(self.atr_warmup) + tr) / 14
+        return None
+
+    def append(self, bar, date=None):
+        """Commits one completed OHLCV bar."""
+        close = float(bar["Close"])
+        diff = 0.0 if self.last_close is None else close - self.last_close
+
+        self.rsi_up.push(max(diff, 0.0))
+        self.rsi_down.push(max(-diff, 0.0))
+
+        self.ema_fast.push(close)
+        self.ema_slow.push(close)
+        macd = self._macd()
+        if macd is not None:
+            self.macd_signal.push(macd)
+
+        for window in self.sma.values():
+            window.push(close)
+        if self.last_close is not None:
+            self.returns.push(close / self.last_close - 1)
+        self.volume.push(float(bar["Volume"]))
+
+        tr = self._true_range(bar)
+        atr = self._next_atr(tr)
+        if atr is None:
+            self.atr_warmup.append(tr)
+        else:
+            self.atr = atr
+            self.atr_warmup = []
+
+        self.last_close = close
+        self.last_date = date
+        self.bars += 1
+        self.pending = None
+
+    def update_tick(self, bar):
+        """Sets the provisional (not yet closed) bar used by values()."""
+        self.pending = bar
+
+    def _macd(self, close=None):
+        fast = self.ema_fast.peek(close)
+        slow = self.ema_slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        return fast - slow
+
+    # ----------------------------------
+
+    def values(self):
+        """Returns the compute_indicators() dict for the latest bar."""
+        if self.pending is None:
+            if self.bars == 0:
+                return {}
+            return self._committed_values()
+        return self._pending_values(self.pending)
+
+    def _committed_values(self):
+        up, down = self.rsi_up.peek(), self.rsi_down.peek()
+        atr = self.atr if self.atr is not None else 0.0
+        avg_volume = self.volume.mean()
+        last_volume = self.volume.values[-1]
+        return self._format(
+            close=self.last_close,
+            rsi=_rsi(up, down),
+            macd=self._macd(),
+            signal=self.macd_signal.peek(),
+            sma={w: rw.mean() for w, rw in self.sma.items()},
+            bb_std=self.sma[20].std(0),
+            atr=atr,
+            volatility=self.returns.std(1),
+            volume_spike=avg_volume is not None and last_volume > avg_volume * 2,
+        )
+
+    def _pending_values(self, bar):
+        close = float(bar["Close"])
+        diff = 0.0 if self.last_close is None else close - self.last_close
+        up, down = self.rsi_up.peek(max(diff, 0.0)), self.rsi_down.peek(max(-diff, 0.0))
+
+        macd = self._macd(close)
+        signal = self.macd_signal.peek(macd) if macd is not None else None
+
+        atr = self._next_atr(self._true_range(bar))
+        ret = None if self.last_close is None else close / self.last_close - 1
+        volume = float(bar["Volume"])
+        avg_volume = self.volume.mean(volume)
+
+        return self._format(
+            close=close,
+            rsi=_rsi(up, down),
+            macd=macd,
+            signal=signal,
+            sma={w: rw.mean(close) for w, rw in self.sma.items()},
+            bb_std=self.sma[20].std(0, close),
+            atr=atr if atr is not None else 0.0,
+            volatility=self.returns.std(1, ret),
+            volume_spike=avg_volume is not None and volume > avg_volume * 2,
+        )
+
+    @staticmethod
+    def _format(close, rsi, macd, signal, sma, bb_std, atr, volatility, volume_spike):
+        def safe(val, decimals=2):
+            if val is None or np.isnan(val):
+                return 0.0
+            return round(float(val), decimals)
+
+        bb_high = bb_low = None
+        if sma[20] is not None and bb_std is not None:
+            bb_high = sma[20] + 2 * bb_std
+            bb_low = sma[20] - 2 * bb_std
+
+        return {
+            "current_price": safe(close),
+            "RSI": safe(rsi),
+            "MACD": safe(macd),
+            "MACD_Signal": safe(signal),
+            "SMA_20": safe(sma[20]),
+            "SMA_50": safe(sma[50]),
+            "SMA_200": safe(sma[200]),
+            "BB_High": safe(bb_high),
+            "BB_Low": safe(bb_low),
+            "ATR": safe(atr),
+            "Volatility": safe(volatility, 4),
+            "Volume_Spike": bool(volume_spike)
+        }
+
+    # ----------------------------------
+
+    def to_dict(self):
+        return {
+            "version": STATE_VERSION,
+            "last_date": self.last_date,
+            "last_close": self.last_close,
+            "bars": self.bars,
+            "rsi_up": self.rsi_up.to_dict(),
+            "rsi_down": self.rsi_down.to_dict(),
+            "ema_fast": self.ema_fast.to_dict(),
+            "ema_slow": self.ema_slow.to_dict(),
+            "macd_signal": self.macd_signal.to_dict(),
+            "sma": {str(w): rw.to_dict() for w, rw in self.sma.items()},
+            "returns": self.returns.to_dict(),
+            "volume": self.volume.to_dict(),
+            "atr": self.atr,
+            "atr_warmup": self.atr_warmup,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != STATE_VERSION:
+            raise ValueError("Incompatible indicator state version")
+        state = cls()
+        state.last_date = data["last_date"]
+        state.last_close = data["last_close"]
+        state.bars = data["bars"]
+        state.rsi_up.load(data["rsi_up"])
+        state.rsi_down.load(data["rsi_down"])
+        state.ema_fast.load(data["ema_fast"])
+        state.ema_slow.load(data["ema_slow"])
+        state.macd_signal.load(data["macd_signal"])
+        for w, rw in state.sma.items():
+            rw.load(data["sma"][str(w)])
+        state.returns.load(data["returns"])
+        state.volume.load(data["volume"])
+        state.atr = data["atr"]
+        state.atr_warmup = data["atr_warmup"]
+        return state
+
+    @classmethod
+    def from_history(cls, df):
+        """Builds state by replaying a full OHLCV history."""
+        state = cls()
+        state.extend(df)
+        return state
+
+    def extend(self, df):
+        """Appends every row of `df` dated after the last committed bar."""
+        added = 0
+        for date, row in df.iterrows():
+            key = _date_key(date)
+            if self.last_date is not None and key <= self.last_date:
+                continue
+            self.append(row, key)
+            added += 1
+        return added
+
+
+def _rsi(up, down):
+    if up is None or down is None:
+        return None
+    if down == 0:
+        return 100.0
+    return 100 - (100 / (1 + up / down))
+
+
+def _date_key(date):
+    return date.strftime("%Y-%m-%d")
+
+
+# ============================================================
+# PERSISTENCE
+# ============================================================
+
+def load_states(path=STATE_FILE):
+    """Loads {ticker: IndicatorState}; unreadable or outdated entries are dropped."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            raw = json.load(f)
+    except Exception as e:
+        print(f"Failed to read indicator state: {e}")
+        return {}
+
+    states = {}
+    for ticker, data in raw.items():
+        try:
+            states[ticker] = IndicatorState.from_dict(data)
+        except Exception:
+            pass
+    return states
+
+
+def save_states(states, path=STATE_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({t: s.to_dict() for t, s in states.items()}, f)
+    os.replace(tmp_path, path)
+
+
+def _history_matches(state, df):
+    """False when the stored last bar was revised upstream (split/adjustment)."""
+    if state.last_date is None:
+        return False
+    dates = [_date_key(d) for d in df.index]
+    if state.last_date not in dates:
+        return False
+    close = float(df["Close"].iloc[dates.index(state.last_date)])
+    return abs(close - state.last_close) <= ADJUSTMENT_TOLERANCE * max(abs(close), 1.0)
+
+
+def compute_indicators_incremental(panel, path=STATE_FILE):
+    """
+    compute_indicators() for a {ticker: DataFrame} panel using stored state.
+    Only bars after each ticker's last stored bar are processed; state is
+    rebuilt from the full history when the stored bars no longer match
+    (adjusted history, missing dates or a new ticker).
+    """
+    states = load_states(path)
+    results = {}
+
+    for ticker, df in panel.items():
+        if df is None or df.empty:
+            continue
+        state = states.get(ticker)
+        if state is None or not _history_matches(state, df):
+            state = IndicatorState.from_history(df)
+        else:
+            state.extend(df)
+        states[ticker] = state
+        results[ticker] = state.values()
+
+    try:
+        save_states(states, path)
+    except Exception as e:
+        print(f"Failed to save indicator state: {e}")
+
+    return results
@@ -1,16 +1,32 @@
-import yfinance as yf
-import pandas as pd
-import ta
 import numpy as np
-import requests
 
-def fetch_data(ticker):
+# yfinance, pandas and ta are imported inside the functions that need them
+# so that importing this module (e.g. for the panel engine) stays cheap.
+
+# Serve history from the local price store and only download new bars
+USE_PRICE_STORE = True
+
+# Seconds a yfinance history request may take before it fails
+YF_TIMEOUT = 20
+
+def fetch_data(ticker, use_store=USE_PRICE_STORE):
     """
     Fetches historical data for a ticker using yfinance with custom session.
+    With the price store enabled only bars after the last stored date are
+    downloaded.
     """
+    if use_store:
+        from price_store import PriceStore
+        panel, failed = PriceStore().sync([ticker], download_panel)
+        if ticker in failed:
+            print(f"yfinance download failed: {failed[ticker]}")
+            raise ValueError(failed[ticker])
+        return panel[ticker]
+
+    import yfinance as yf
     print(f"Fetching technical data for {ticker}...")
     try:
-        dat = yf.Ticker(ticker).history(period="1y")
+        dat = yf.Ticker(ticker).history(period="1y", timeout=YF_TIMEOUT)
         
         if dat.empty:
             raise ValueError("No data returned")
@@ -20,12 +36,78 @@ def fetch_data(ticker):
         print(f"yfinance download failed: {e}")
         raise
 
+# Tickers per grouped yfinance request; large universes are split into chunks
+BATCH_CHUNK_SIZE = 100
+
+def download_panel(tickers, chunk_size=BATCH_CHUNK_SIZE, **kwargs):
+    """
+    Downloads history for many tickers with grouped yfinance requests.
+    `kwargs` go to yf.download (period=... or start=...).
+    Returns (panel, failed): panel maps ticker -> OHLCV DataFrame and failed
+    maps ticker -> reason for every ticker that errored or came back empty.
+    Never raises for individual tickers.
+    """
+    import pandas as pd
+    import yfinance as yf
+
+    tickers = list(dict.fromkeys(tickers))
+    panel = {}
+    failed = {}
+
+    for start in range(0, len(tickers), chunk_size):
+        chunk = tickers[start:start + chunk_size]
+        print(f"Fetching technical data for {len(chunk)} tickers (batch {start // chunk_size + 1})...")
+        try:
+            raw = yf.download(chunk, group_by="ticker", auto_adjust=True,
+                              threads=True, progress=False, timeout=YF_TIMEOUT, **kwargs)
+        except Exception as e:
+            print(f"yfinance batch download failed: {e}")
+            for ticker in chunk:
+                failed[ticker] = str(e)
+            continue
+
+        for ticker in chunk:
+            try:
+                if isinstance(raw.columns, pd.MultiIndex):
+                    dat = raw[ticker]
+                else:
+                    dat = raw
+                # Grouped downloads share one date index; drop the padding rows
+                dat = dat.dropna(subset=["Close"])
+                if dat.empty:
+                    failed[ticker] = "No data returned"
+                    continue
+                panel[ticker] = dat
+            except KeyError:
+                failed[ticker] = "No data returned"
+            except Exception as e:
+                failed[ticker] = str(e)
+
+    if failed:
+        print(f"No technical data for {len(failed)} tickers: {sorted(failed)}")
+    return panel, failed
+
+def fetch_data_batch(tickers, period="1y", chunk_size=BATCH_CHUNK_SIZE, use_store=USE_PRICE_STORE):
+    """
+    Fetches historical data for many tickers.
+    Returns (panel, failed) as described in download_panel().
+    """
+    def download(chunk_tickers, **kwargs):
+        return download_panel(chunk_tickers, chunk_size=chunk_size, **kwargs)
+
+    if use_store:
+        from price_store import PriceStore
+        return PriceStore().sync(list(dict.fromkeys(tickers)), download, period=period)
+    return download(tickers, period=period)
+
 def compute_indicators(df):
     """
     Computes technical indicators: RSI, MACD, SMA, BB, ATR, Volatility.
     """
     if df is None or df.empty:
         return {}
+
+    import ta
     
     # Ensure High, Low, Close are available
     close = df['Close']
@@ -88,6 +170,190 @@ def compute_indicators(df):
     
     return indicators
 
+# ============================================================
+# VECTORIZED PANEL ENGINE
+# ============================================================
+# Computes the compute_indicators() set for a whole universe at once.
+# Every ticker is a row of a (tickers x days) array, right-aligned so the
+# latest bar is the last column; shorter histories are NaN-padded on the
+# left and `start[i]` is the first real column of row i. Recursive
+# indicators (EMA, Wilder smoothing) loop over days but update all
+# tickers in one vector operation.
+
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def build_price_arrays(panel, tickers=None):
+    """
+    Stacks a {ticker: OHLCV DataFrame} panel into right-aligned arrays.
+    Returns (tickers, arrays, start) where arrays maps each OHLCV field
+    to a float64 (tickers x days) array.
+    """
+    tickers = [t for t in (tickers or list(panel)) if t in panel and not panel[t].empty]
+    n_days = max((len(panel[t]) for t in tickers), default=0)
+
+    arrays = {field: np.full((len(tickers), n_days), np.nan) for field in PANEL_FIELDS}
+    start = np.zeros(len(tickers), dtype=np.int64)
+
+    for row, ticker in enumerate(tickers):
+        df = panel[ticker]
+        start[row] = n_days - len(df)
+        for field in PANEL_FIELDS:
+            arrays[field][row, start[row]:] = df[field].to_numpy(dtype=np.float64)
+
+    return tickers, arrays, start
+
+def _valid_mask(shape, start, min_periods):
+    """True where a row has at least `min_periods` real bars up to that column."""
+    cols = np.arange(shape[1])
+    return cols[None, :] >= (start[:, None] + min_periods - 1)
+
+def _ewm(values, start, alpha, min_periods):
+    """pandas ewm(alpha, adjust=False, min_periods).mean() for every row."""
+    out = np.full(values.shape, np.nan)
+    prev = np.full(values.shape[0], np.nan)
+
+    for col in range(values.shape[1]):
+        x = values[:, col]
+        first = col == start
+        prev = np.where(first, x, alpha * x + (1 - alpha) * prev)
+        prev = np.where(col < start, np.nan, prev)
+        out[:, col] = prev
+
+    out[~_valid_mask(values.shape, start, min_periods)] = np.nan
+    return out
+
+def _rolling_mean(values, start, window):
+    """rolling(window).mean() for every row."""
+    filled = np.nan_to_num(values, nan=0.0)
+    csum = np.cumsum(filled, axis=1)
+    out = np.empty(values.shape)
+    out[:, :window] = csum[:, :window]
+    out[:, window:] = csum[:, window:] - csum[:, :-window]
+    out /= window
+    out[~_valid_mask(values.shape, start, window)] = np.nan
+    return out
+
+def _rolling_std(values, window, ddof):
+    """rolling(window).std(ddof) for every row; windows touching NaN stay NaN."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+        out[:, window - 1:] = windows.std(axis=-1, ddof=ddof)
+    return out
+
+def indicator_arrays(arrays, start):
+    """
+    Computes full indicator histories for right-aligned price arrays.
+    Returns a dict of (tickers x days) arrays, one per indicator.
+    """
+    close = arrays["Close"]
+    high = arrays["High"]
+    low = arrays["Low"]
+    volume = arrays["Volume"]
+    shape = close.shape
+    cols = np.arange(shape[1])
+
+    prev_close = np.full(shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+
+    out = {}
+
+    # 1. RSI (Wilder smoothing, first diff counts as 0 like `ta`)
+    diff = close - prev_close
+    diff[cols[None, :] == start[:, None]] = 0.0
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = _ewm(up, start, 1 / 14, 14)
+    ema_down = _ewm(down, start, 1 / 14, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["RSI"] = np.where(ema_down == 0, 100.0, 100 - (100 / (1 + ema_up / ema_down)))
+
+    # 2. MACD (12/26 EMA, 9 EMA signal starting at the first MACD value)
+    ema_fast = _ewm(close, start, 2 / (12 + 1), 12)
+    ema_slow = _ewm(close, start, 2 / (26 + 1), 26)
+    out["MACD"] = ema_fast - ema_slow
+    out["MACD_Signal"] = _ewm(out["MACD"], start + 25, 2 / (9 + 1), 9)
+
+    # 3. SMA
+    for window in (20, 50, 200):
+        out[f"SMA_{window}"] = _rolling_mean(close, start, window)
+
+    # 4. Bollinger Bands (population std like `ta`)
+    bb_std = _rolling_std(close, 20, ddof=0)
+    out["BB_High"] = out["SMA_20"] + 2 * bb_std
+    out["BB_Low"] = out["SMA_20"] - 2 * bb_std
+
+    # 5. ATR (Wilder, seeded with the mean of the first 14 true ranges)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr_mean = _rolling_mean(true_range, start, 14)
+    atr = np.zeros(shape)
+    prev = np.zeros(shape[0])
+    for col in range(shape[1]):
+        seed = col == start + 13
+        running = col > start + 13
+        prev = np.where(seed, tr_mean[:, col], np.where(running, (prev * 13 + true_range[:, col]) / 14, 0.0))
+        atr[:, col] = prev
+    out["ATR"] = atr
+
+    # 6. Volatility (Std Dev of returns)
+    returns = close / prev_close - 1
+    out["Volatility"] = _rolling_std(returns, 20, ddof=1)
+
+    # 7. Volume Spike (Volume > 2 * Avg Volume)
+    avg_volume = _rolling_mean(volume, start, 20)
+    with np.errstate(invalid="ignore"):
+        out["Volume_Spike"] = volume > (avg_volume * 2)
+
+    return out
+
+def round_half(values, decimals=2):
+    """
+    np.round() that agrees with Python's round(): values within float noise
+    of a half are rounded by round() itself (np.round can differ there).
+    """
+    out = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    with np.errstate(invalid="ignore"):
+        near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in zip(*np.nonzero(near_half)):
+        out[index] = round(float(values[index]), decimals)
+    return out
+
+def latest_indicators(arrays, indicators, row):
+    """Builds the compute_indicators() dict for one row from the last column."""
+    def safe_get(values, decimals=2):
+        val = values[row, -1]
+        if np.isnan(val):
+            return 0.0
+        return round(float(val), decimals)
+
+    return {
+        "current_price": safe_get(arrays["Close"]),
+        "RSI": safe_get(indicators["RSI"]),
+        "MACD": safe_get(indicators["MACD"]),
+        "MACD_Signal": safe_get(indicators["MACD_Signal"]),
+        "SMA_20": safe_get(indicators["SMA_20"]),
+        "SMA_50": safe_get(indicators["SMA_50"]),
+        "SMA_200": safe_get(indicators["SMA_200"]),
+        "BB_High": safe_get(indicators["BB_High"]),
+        "BB_Low": safe_get(indicators["BB_Low"]),
+        "ATR": safe_get(indicators["ATR"]),
+        "Volatility": safe_get(indicators["Volatility"], 4),
+        "Volume_Spike": bool(indicators["Volume_Spike"][row, -1])
+    }
+
+def compute_indicators_panel(panel):
+    """
+    Vectorized compute_indicators() for a {ticker: DataFrame} panel.
+    Returns {ticker: indicators dict} with the same keys and rounding.
+    """
+    tickers, arrays, start = build_price_arrays(panel)
+    if not tickers:
+        return {}
+
+    indicators = indicator_arrays(arrays, start)
+    return {ticker: latest_indicators(arrays, indicators, row) for row, ticker in enumerate(tickers)}
+
 if __name__ == "__main__":
     df = fetch_data("TSLA")
     print(compute_indicators(df))
@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+
+# ============================================================
+# SHARDED INSIGHTS OUTPUT
+# ============================================================
+# One compact JSON file per ticker plus a small manifest, so a reader can
+# load a single ticker without parsing the others:
+#
+#   insights/<TICKER>.json     the ticker's result object
+#   insights/manifest.json     schema version, run info and, per ticker,
+#                              file, revision, last_updated and size
+#
+# Every file is written to a temp file in the same directory, fsynced and
+# renamed over the old one, so readers see either the old or the new
+# version, never a partial file. Shards are written before the manifest.
+#
+# Tickers without a shard are read from the old single-file output
+# (insights_cache.json), so existing data keeps working until it is
+# regenerated. The Node reader (marketController.getStockInsights) uses the
+# same file naming.
+
+INSIGHTS_DIR = "ml_service/insights"
+LEGACY_FILE = "ml_service/insights_cache.json"
+MANIFEST_NAME = "manifest.json"
+
+INSIGHTS_VERSION = 1
+
+
+def shard_name(ticker):
+    """File name for a ticker's shard (same rule as the Node reader)."""
+    return re.sub(r"[^A-Z0-9._-]", "_", ticker.upper()) + ".json"
+
+
+def write_atomic(path, data):
+    """Writes bytes to `path` via temp file + fsync + rename."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        # mkstemp creates 0600 files; the API server may run as another user
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def encode(obj):
+    return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class InsightsStore:
+
+    def __init__(self, root=INSIGHTS_DIR, legacy_path=LEGACY_FILE):
+        self.root = root
+        self.legacy_path = legacy_path
+        self._legacy = None
+
+    def shard_path(self, ticker):
+        return os.path.join(self.root, shard_name(ticker))
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    # ----------------------------------
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == INSIGHTS_VERSION:
+                return manifest
+        except Exception:
+            pass
+        return {"version": INSIGHTS_VERSION, "tickers": {}}
+
+    def _read_legacy(self):
+        if self._legacy is None:
+            try:
+                with open(self.legacy_path, "r") as f:
+                    self._legacy = json.load(f)
+            except Exception:
+                self._legacy = {}
+        return self._legacy
+
+    def read(self, ticker):
+        """One ticker's result, or None (falls back to the legacy file)."""
+        try:
+            with open(self.shard_path(ticker), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        if self.legacy_path:
+            return self._read_legacy().get(ticker.upper())
+        return None
+
+    def tickers(self):
+        """Every ticker with stored insights (shards, then legacy-only ones)."""
+        found = list(self.read_manifest()["tickers"])
+        if self.legacy_path:
+            found += [t for t in self._read_legacy() if t not in found]
+        return found
+
+    def read_all(self):
+        return {ticker: self.read(ticker) for ticker in self.tickers()}
+
+    # ----------------------------------
+
+    def write(self, insights, run=None):
+        """
+        Writes one shard per ticker in `insights`, then the manifest.
+        Tickers not in `insights` keep their existing shards. `run` is
+        stored in the manifest (stages, timings).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.read_manifest()
+        for ticker, result in insights.items():
+            data = encode(result)
+            write_atomic(self.shard_path(ticker), data)
+            previous = manifest["tickers"].get(ticker, {})
+            manifest["tickers"][ticker] = {
+                "file": shard_name(ticker),
+                "revision": previous.get("revision", 0) + 1,
+                "last_updated": result.get("last_updated"),
+                "bytes": len(data),
+            }
+        manifest["version"] = INSIGHTS_VERSION
+        manifest["generated_at"] = datetime.now().isoformat()
+        if run is not None:
+            manifest["run"] = run
+        write_atomic(self.manifest_path, json.dumps(manifest, indent=1, default=str).encode("utf-8"))
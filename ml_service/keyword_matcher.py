@@ -0,0 +1,108 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+# ============================================================
+# MULTI-PATTERN KEYWORD MATCHER
+# ============================================================
+# Finds every keyword of many keyword tables in one pass over the text.
+# All keywords go into a trie that is compiled into a single regex, so at
+# each text position the regex engine follows one trie path and returns
+# the longest keyword starting there. Shorter keywords starting at the
+# same position are exactly the keywords that are prefixes of that match,
+# so they are added from a precomputed table. The result is the same set
+# of keywords as running `kw in text` for every keyword (plain substring
+# semantics, overlaps included).
+
+# Scans remembered per matcher; classifiers re-scanning the same article
+# text reuse the result
+SCAN_CACHE_SIZE = 8192
+
+
+def _trie_regex(keywords):
+    """Compiles keywords into a regex that matches the longest keyword at a position."""
+    trie = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy: prefer the longer keyword, fall back to the one ending here
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _prefix_table(keywords):
+    """Maps each keyword to the other keywords that are prefixes of it."""
+    present = set(keywords)
+    return {kw: [kw[:i] for i in range(1, len(kw)) if kw[:i] in present] for kw in keywords}
+
+
+class KeywordHits:
+    """Keywords found in one text, with per-table lookups."""
+
+    def __init__(self, found, counts):
+        self.found = found
+        self._counts = counts
+
+    def count(self, table):
+        """Number of keywords of `table` present (same as sum(kw in text))."""
+        return self._counts.get(table, 0)
+
+    def any(self, table):
+        return self._counts.get(table, 0) > 0
+
+    def matched_tables(self):
+        """Names of the tables with at least one keyword present."""
+        return list(self._counts)
+
+
+class KeywordMatcher:
+
+    def __init__(self, tables):
+        """`tables` maps a table name to its list of lowercase keywords."""
+        self.tables = {name: list(keywords) for name, keywords in tables.items()}
+
+        # keyword -> tables it belongs to (repeated if listed twice)
+        self._keyword_tables = {}
+        for name, keywords in self.tables.items():
+            for kw in keywords:
+                self._keyword_tables.setdefault(kw, []).append(name)
+
+        keywords = sorted(self._keyword_tables)
+        self._prefixes = _prefix_table(keywords)
+        self._pattern = re.compile("(?=(" + _trie_regex(keywords) + "))") if keywords else None
+
+        self.scan = lru_cache(maxsize=SCAN_CACHE_SIZE)(self._scan)
+
+    def _scan(self, text_lower):
+        found = set()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text_lower):
+                kw = match.group(1)
+                if kw and kw not in found:
+                    found.add(kw)
+                    found.update(self._prefixes[kw])
+
+        counts = Counter()
+        for kw in found:
+            for name in self._keyword_tables[kw]:
+                counts[name] += 1
+        return KeywordHits(frozenset(found), counts)
+
+    def first_table(self, hits, names):
+        """First table in `names` with any keyword present, or None."""
+        for name in names:
+            if hits.any(name):
+                return name
+        return None
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+# ============================================================
+# ASYNC LLM CLIENT (OpenAI-compatible chat completions)
+# ============================================================
+# Sends many chat completions concurrently over one pooled aiohttp
+# session. At most `max_in_flight` requests are open at a time, and a token
+# bucket spaces request starts to `rate` per second (bursts up to `burst`).
+#
+# 429 and 5xx responses, timeouts and connection errors are retried with
+# jittered exponential backoff. A Retry-After header on a 429 or 503 pauses
+# the whole bucket, not just the request that got it, so the other requests
+# back off too.
+#
+# A client can be kept and entered again, also from several threads at
+# once (each running its own event loop): the session and the in-flight
+# cap live for one `async with` block, the token bucket for the client.
+
+API_TIMEOUT = 60
+
+# Requests open at the same time
+MAX_IN_FLIGHT = 8
+
+# Request starts per second, and how many may start at once
+RATE_PER_SECOND = 4
+BURST = 8
+
+MAX_RETRIES = 4
+
+# Backoff before retry n is uniform in [0, min(BACKOFF_MAX, BACKOFF_BASE * 2**n)]
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    pass
+
+
+def retry_after_seconds(value):
+    """Retry-After header (delta-seconds or HTTP date) -> seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Async token bucket, shared by callers on any event loop; pause() holds
+    every caller until a given delay passes.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token and returns 0, or returns the seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            delay = self._take()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class AsyncLLMClient:
+    """
+    Use as `async with AsyncLLMClient(url, headers) as client:`; the
+    session and the in-flight cap live for the duration of the block, the
+    rate limit for the client.
+    """
+
+    def __init__(self, api_url, headers=None, max_in_flight=MAX_IN_FLIGHT, rate=RATE_PER_SECOND,
+                 burst=BURST, max_retries=MAX_RETRIES, timeout=API_TIMEOUT, backoff_base=BACKOFF_BASE):
+        self.api_url = api_url
+        self.headers = headers or {}
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self._bucket = TokenBucket(rate, burst)
+        self._open = {}         # event loop -> (session, in-flight semaphore)
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight)
+        session = aiohttp.ClientSession(
+            headers=self.headers, connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self._open[asyncio.get_running_loop()] = (session, asyncio.Semaphore(self.max_in_flight))
+        return self
+
+    async def __aexit__(self, *exc):
+        session, _ = self._open.pop(asyncio.get_running_loop())
+        await session.close()
+
+    @property
+    def _session(self):
+        return self._open[asyncio.get_running_loop()][0]
+
+    @property
+    def _semaphore(self):
+        return self._open[asyncio.get_running_loop()][1]
+
+    # ----------------------------------
+
+    async def _post(self, payload):
+        """One attempt: (status, Retry-After seconds, JSON body or error text)."""
+        await self._bucket.acquire()
+        async with self._semaphore:
+            self.requests += 1
+            async with self._session.post(self.api_url, json=payload) as r:
+                if r.status == 200:
+                    return r.status, None, await r.json(content_type=None)
+                return r.status, retry_after_seconds(r.headers.get("Retry-After")), await r.text()
+
+    def _retry_delay(self, attempt, status, retry_after, body):
+        """
+        Seconds to wait before retrying a failed attempt. Raises LLMError when
+        the failure is not retryable or the retries are used up.
+        """
+        if status is not None and status not in RETRY_STATUSES:
+            self.failed += 1
+            raise LLMError(f"HTTP {status}: {body[:200]}")
+        if attempt == self.max_retries:
+            self.failed += 1
+            detail = f"HTTP {status}" if status is not None else body
+            raise LLMError(f"{detail} after {self.max_retries + 1} attempts")
+
+        if status == 429:
+            self.rate_limited += 1
+        delay = backoff_delay(attempt, self.backoff_base)
+        if retry_after is not None:
+            self._bucket.pause(retry_after)
+            delay = max(delay, retry_after)
+        self.retries += 1
+        return delay
+
+    async def complete(self, payload):
+        """
+        Sends one chat completion and returns the decoded response.
+        Retries transient failures; raises LLMError once retries are used
+        up or on a non-retryable status.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                status, retry_after, body = await self._post(payload)
+            except ValueError as e:
+                self.failed += 1
+                raise LLMError(f"Invalid response body: {e}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, retry_after, body = None, None, f"{type(e).__name__}: {e}"
+
+            if status == 200:
+                return body
+            await asyncio.sleep(self._retry_delay(attempt, status, retry_after, body))
+
+    async def stream(self, payload):
+        """
+        Streams one chat completion (server-sent events) and yields the
+        content deltas as they arrive. Failures before the first delta are
+        retried like complete(); a stream that breaks later raises LLMError.
+        """
+        payload = dict(payload, stream=True)
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            started = False
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    async with self._session.post(self.api_url, json=payload) as r:
+                        if r.status == 200:
+                            async for line in r.content:
+                                line = line.decode("utf-8").strip()
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                choices = json.loads(data).get("choices") or [{}]
+                                delta = (choices[0].get("delta") or {}).get("content")
+                                if delta:
+                                    started = True
+                                    yield delta
+                            return
+                        status = r.status
+                        retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+                        body = await r.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                if started:
+                    self.failed += 1
+                    raise LLMError(f"Stream interrupted: {type(e).__name__}: {e}")
+                status, retry_after, body = None, None, f"{type(e).__name__}: {e}"
+            await asyncio.sleep(self._retry_delay(attempt, status, retry_after, body))
+
+    async def complete_many(self, payloads):
+        """Responses in the order of `payloads`; failed ones are LLMError instances."""
+        async def guarded(payload):
+            try:
+                return await self.complete(payload)
+            except LLMError as e:
+                return e
+        return await asyncio.gather(*(guarded(p) for p in payloads))
+
+    def report(self):
+        print(f"LLM client: {self.requests} requests, {self.retries} retries "
+              f"({self.rate_limited} rate limited), {self.failed} failed")
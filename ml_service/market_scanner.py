@@ -1,6 +1,5 @@
 import requests
 import re
-import pandas as pd
 from io import StringIO
 
 def get_most_active_tickers(limit=25):
@@ -28,6 +27,7 @@ def get_most_active_tickers(limit=25):
 
         # Method 1: Pandas read_html (Best for tables)
         try:
+            import pandas as pd
             dfs = pd.read_html(StringIO(response.text))
             for df in dfs:
                 if 'Symbol' in df.columns:
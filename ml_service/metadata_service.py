@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# ============================================================
+# TICKER METADATA SERVICE (yfinance .info)
+# ============================================================
+# One on-disk store for the .info fields the pipeline reads, shared by
+# fundamentals and the news company lookup so .info is requested at most
+# once per ticker. Every field has its own TTL: company names are kept
+# for weeks, market data for a day.
+#
+# An expired field is still served while it is younger than
+# MAX_STALE_HOURS; a refresh runs in the background instead of blocking
+# the caller. Only missing (or very old) data is fetched synchronously.
+
+METADATA_FILE = "ml_service/metadata_cache.json"
+
+METADATA_VERSION = 1
+
+# Hours each cached field stays fresh
+FIELD_TTL_HOURS = {
+    "shortName": 24 * 30,
+    "longName": 24 * 30,
+    "marketCap": 24,
+    "trailingPE": 24,
+    "trailingEps": 24 * 7,
+    "revenueGrowth": 24 * 7,
+    "beta": 24,
+}
+
+# How long past its TTL a field may still be served while it refreshes
+MAX_STALE_HOURS = 72
+
+# Concurrent .info requests during prefetch and background refresh
+MAX_WORKERS = 4
+
+
+def fetch_info(ticker):
+    """Fetches the tracked .info fields for one ticker from yfinance."""
+    import yfinance as yf
+    info = yf.Ticker(ticker).info
+    return {field: info.get(field) for field in FIELD_TTL_HOURS}
+
+
+class MetadataService:
+
+    def __init__(self, path=METADATA_FILE, fetch=fetch_info, max_workers=MAX_WORKERS):
+        self.path = path
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._data = {}         # ticker -> {field: [value, fetched_at]}
+        self._pending = {}      # ticker -> in-flight refresh future
+        self._executor = None
+        self._dirty = False
+
+        self.fresh = 0
+        self.stale = 0
+        self.fetched = 0
+        self.failed = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != METADATA_VERSION:
+                raise ValueError("metadata version changed")
+            self._data = data["tickers"]
+        except Exception as e:
+            print(f"Metadata cache reset ({e})")
+            self._data = {}
+
+    # ----------------------------------
+
+    def _age_hours(self, ticker, field, now):
+        entry = self._data.get(ticker, {}).get(field)
+        if entry is None:
+            return None
+        return (now - entry[1]) / 3600
+
+    def _status(self, ticker, fields, now):
+        """'fresh', 'stale' (servable, needs refresh) or 'missing'."""
+        status = "fresh"
+        for field in fields:
+            age = self._age_hours(ticker, field, now)
+            ttl = FIELD_TTL_HOURS.get(field, 24)
+            if age is None or age > ttl + MAX_STALE_HOURS:
+                return "missing"
+            if age > ttl:
+                status = "stale"
+        return status
+
+    def staleness(self, ticker, fields=None):
+        """Hours the oldest of `fields` is past its TTL (0 when fresh, None when missing)."""
+        now = time.time()
+        worst = 0.0
+        for field in fields or FIELD_TTL_HOURS:
+            age = self._age_hours(ticker, field, now)
+            if age is None:
+                return None
+            worst = max(worst, age - FIELD_TTL_HOURS.get(field, 24))
+        return worst
+
+    def _refresh(self, ticker):
+        """Fetches .info for `ticker` and stores every tracked field."""
+        try:
+            values = self.fetch(ticker)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+                self._pending.pop(ticker, None)
+            raise
+        now = time.time()
+        with self._lock:
+            entry = self._data.setdefault(ticker, {})
+            for field, value in values.items():
+                entry[field] = [value, now]
+            self.fetched += 1
+            self._dirty = True
+            self._pending.pop(ticker, None)
+        return values
+
+    def _submit(self, ticker):
+        """Starts (or joins) a background refresh for `ticker`."""
+        with self._lock:
+            future = self._pending.get(ticker)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                future = self._executor.submit(self._refresh, ticker)
+                self._pending[ticker] = future
+        return future
+
+    # ----------------------------------
+
+    def get(self, ticker, fields):
+        """
+        Returns {field: value} for `fields`. Fresh and slightly stale values
+        come from the store (stale ones trigger a background refresh);
+        missing values are fetched now. Raises when nothing is cached and
+        the fetch fails.
+        """
+        status = self._status(ticker, fields, time.time())
+        if status == "missing":
+            try:
+                self._submit(ticker).result()
+            except Exception:
+                # Serve whatever old values exist rather than nothing
+                if not all(f in self._data.get(ticker, {}) for f in fields):
+                    raise
+        elif status == "stale":
+            self._submit(ticker)
+
+        with self._lock:
+            if status == "stale":
+                self.stale += 1
+            elif status == "fresh":
+                self.fresh += 1
+            entry = self._data.get(ticker, {})
+            return {field: entry[field][0] if field in entry else None for field in fields}
+
+    def prefetch(self, tickers, timeout=None):
+        """
+        Refreshes every ticker with missing or expired fields, concurrently.
+        Waits up to `timeout` seconds; refreshes still running afterwards
+        finish in the background and callers use the stale values meanwhile.
+        """
+        now = time.time()
+        fields = list(FIELD_TTL_HOURS)
+        due = [t for t in tickers if self._status(t, fields, now) != "fresh"]
+        if not due:
+            return
+        print(f"Metadata: refreshing {len(due)}/{len(tickers)} tickers...")
+        futures = [self._submit(t) for t in due]
+        done, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            print(f"Metadata: {len(not_done)} refreshes still running, using stale values")
+
+    def drain(self, timeout=None):
+        """
+        Waits up to `timeout` seconds for the background refreshes in flight,
+        so their values are in the next save(). Returns how many are still
+        running.
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+        if not pending:
+            return 0
+        _, not_done = wait(pending, timeout=timeout)
+        if not_done:
+            print(f"Metadata: {len(not_done)} refreshes still running, not saved")
+        return len(not_done)
+
+    def close(self, timeout=None):
+        """Drains the background refreshes and stops the refresh threads (restarted on demand)."""
+        running = self.drain(timeout)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        return running
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": METADATA_VERSION, "tickers": self._data}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def report(self):
+        print(f"Metadata: {self.fresh} fresh, {self.stale} stale reads, "
+              f"{self.fetched} fetched, {self.failed} failed")
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_metadata_service():
+    """Process-wide MetadataService (loaded on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = MetadataService()
+    return _service
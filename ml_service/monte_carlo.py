@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+
+# ============================================================
+# MONTE-CARLO LEVEL PROBABILITIES
+# ============================================================
+# Estimates, for every ticker at once, the probability that the price
+# reaches an upside level before a downside level (and the reverse, and
+# neither) within HORIZON_DAYS trading days. Paths are geometric Brownian
+# motion with the ticker's daily volatility from the indicators
+# (Volatility, the 20-day std of daily returns; ATR / price when it is
+# missing) and an optional daily drift (zero by default).
+#
+# Prices are simulated daily; a Brownian-bridge test catches levels
+# touched between two closes, so the estimate matches intraday touches
+# rather than closes only.
+#
+# Every ticker uses the same random draws (common random numbers),
+# generated in fixed-size blocks of paths seeded by (seed, block). A
+# ticker's result therefore depends only on its own inputs, the seed and
+# the path count - not on which other tickers are in the batch or on the
+# memory budget, which only sets how many tickers are simulated together.
+
+HORIZON_DAYS = 20
+
+N_PATHS = 10_000
+
+SEED = 7
+
+# Paths per random block (fixed so results do not depend on chunking)
+PATH_BLOCK = 2_000
+
+# Working memory per chunk; each simulated (ticker, path) cell needs
+# about BYTES_PER_CELL bytes
+CHUNK_BYTES = 64 * 2 ** 20
+BYTES_PER_CELL = 64
+
+# Levels (in ATRs from the price) for sides without a trade-plan level
+ATR_BAND = 2.0
+
+
+def daily_volatility(price, volatility, atr):
+    """Daily return volatility from the indicators (ATR / price as fallback); NaN when unknown."""
+    price = np.asarray(price, dtype=np.float64)
+    volatility = np.asarray(volatility, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fallback = np.asarray(atr, dtype=np.float64) / price
+    vol = np.where(volatility > 0, volatility, fallback)
+    return np.where(vol > 0, vol, np.nan)
+
+
+def _chunk_rows(paths, chunk_bytes):
+    return max(1, chunk_bytes // (BYTES_PER_CELL * min(paths, PATH_BLOCK)))
+
+
+def level_probabilities(price, up, down, vol, drift=0.0, horizon=HORIZON_DAYS, paths=N_PATHS, seed=SEED,
+                        chunk_bytes=CHUNK_BYTES):
+    """
+    P(up first), P(down first) and P(neither) within `horizon` days, as
+    three arrays over tickers. `price`, `up`, `down`, `vol` (daily) and
+    `drift` (daily, log) are per-ticker arrays or scalars; rows with an
+    unknown volatility get NaN.
+    """
+    price, up, down, vol, drift = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64)
+                                                        for x in (price, up, down, vol, drift)))
+    n = price.shape[0] if price.ndim else 1
+    price, up, down, vol, drift = (x.reshape(n) for x in (price, up, down, vol, drift))
+
+    valid = (vol > 0) & (price > 0) & (up > price) & (down < price) & (down > 0)
+    hits_up = np.zeros(n)
+    hits_down = np.zeros(n)
+    rows_per_chunk = _chunk_rows(paths, chunk_bytes)
+    blocks = [(b, min(PATH_BLOCK, paths - b * PATH_BLOCK)) for b in range(math.ceil(paths / PATH_BLOCK))]
+
+    index = np.flatnonzero(valid)
+    for lo in range(0, len(index), rows_per_chunk):
+        rows = index[lo:lo + rows_per_chunk]
+        sigma = vol[rows, None]
+        step_mean = drift[rows, None] - 0.5 * sigma ** 2
+        upper = np.log(up[rows] / price[rows])[:, None]
+        lower = np.log(down[rows] / price[rows])[:, None]
+        for block, size in blocks:
+            rng = np.random.default_rng([seed, block])
+            normals = rng.standard_normal((horizon, size))
+            uniforms = rng.random((horizon, size))
+            x = np.zeros((len(rows), size))
+            outcome = np.zeros((len(rows), size), dtype=np.int8)     # 1 up, -1 down, 0 open
+            for day in range(horizon):
+                open_ = outcome == 0
+                nxt = x + step_mean + sigma * normals[day]
+                # Chance the path touched a level between the two closes
+                with np.errstate(over="ignore"):
+                    bridge_up = np.exp(-2 * np.maximum(upper - x, 0) * np.maximum(upper - nxt, 0) / sigma ** 2)
+                    bridge_down = np.exp(-2 * np.maximum(x - lower, 0) * np.maximum(nxt - lower, 0) / sigma ** 2)
+                u = uniforms[day]
+                went_up = open_ & ((nxt >= upper) | (u < bridge_up))
+                went_down = open_ & ~went_up & ((nxt <= lower) | (u >= 1 - bridge_down))
+                outcome[went_up] = 1
+                outcome[went_down] = -1
+                x = nxt
+            hits_up[rows] += (outcome == 1).sum(axis=1)
+            hits_down[rows] += (outcome == -1).sum(axis=1)
+
+    p_up = np.where(valid, hits_up / paths, np.nan)
+    p_down = np.where(valid, hits_down / paths, np.nan)
+    return p_up, p_down, 1 - p_up - p_down
+
+
+def probabilities_dict(p_up, p_down, p_none, up, down, horizon=HORIZON_DAYS, paths=N_PATHS):
+    """The trade plan's `probabilities` block for one ticker."""
+    return {
+        "bull_case": f"{round(p_up * 100)}%",
+        "bear_case": f"{round(p_down * 100)}%",
+        "neutral_case": f"{round(p_none * 100)}%",
+        "upside_level": round(up, 2),
+        "downside_level": round(down, 2),
+        "horizon_days": horizon,
+        "paths": paths,
+        "method": "monte_carlo",
+    }
+
@@ -0,0 +1,212 @@
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+
+# ============================================================
+# NEAR-DUPLICATE ARTICLE INDEX
+# ============================================================
+# MinHash signatures over the word shingles of an article's title and
+# lead, bucketed with LSH banding. A lookup only compares against articles
+# that share a band bucket, so the cost per article stays roughly
+# constant as the index grows. Candidates are confirmed with the exact
+# Jaccard similarity of the shingle sets.
+#
+# With 20 bands of 3 rows, pairs at the default threshold (0.6) share a
+# bucket with ~99% probability, pairs below 0.2 rarely do.
+
+# Jaccard similarity of the shingle sets at which two articles are copies
+SIMILARITY_THRESHOLD = 0.6
+
+NUM_BANDS = 20
+ROWS_PER_BAND = 3
+
+# Articles older than this are dropped from a persisted index
+WINDOW_DAYS = 30
+
+INDEX_FILE = "ml_service/near_dup_index.json"
+
+INDEX_VERSION = 1
+
+# Summary words added to the title; feed summaries run on for paragraphs
+LEAD_WORDS = 30
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "will", "with",
+}
+
+# " - MSN", " | Reuters", " — Yahoo Finance" appended by aggregators
+SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, 1 << 29, size=NUM_BANDS * ROWS_PER_BAND).astype(np.uint64)
+_B = _rng.randint(0, 1 << 29, size=NUM_BANDS * ROWS_PER_BAND).astype(np.uint64)
+
+
+def strip_source(title):
+    """Title without a trailing ' - Source' attribution."""
+    return SOURCE_SUFFIX.sub("", title.strip())
+
+
+def _tokens(text):
+    return [w for w in re.findall(r"[a-z0-9]+", text.lower()) if w not in STOPWORDS]
+
+
+def article_shingles(article):
+    """Word unigrams and bigrams of the title plus the start of the summary."""
+    title = strip_source(article.get("title", ""))
+    summary = strip_source(article.get("summary", ""))
+    words = _tokens(title)
+    if summary and summary != title:
+        words += _tokens(summary)[:LEAD_WORDS]
+    grams = words + [a + " " + b for a, b in zip(words, words[1:])]
+    return frozenset(zlib.crc32(g.encode("utf-8")) for g in grams)
+
+
+def article_key(article):
+    return article.get("link") or re.sub(r"\W+", "", strip_source(article.get("title", "")).lower())
+
+
+def article_timestamp(article):
+    """Publication time in epoch seconds (now when missing or unparsable)."""
+    published = article.get("published", "")
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(published, fmt).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return time.time()
+
+
+def minhash(shingles):
+    x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateIndex:
+    """
+    Articles keyed by (scope, key); scope is the ticker, or None for a
+    batch-wide index. Safe to share between threads.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, window_days=WINDOW_DAYS):
+        self.threshold = threshold
+        self.window = window_days * 86400
+        self._lock = threading.Lock()
+        self._entries = {}      # (scope, key) -> (timestamp, shingles, band keys)
+        self._buckets = [{} for _ in range(NUM_BANDS)]
+        self._expiry = []       # heap of (timestamp, (scope, key))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bands(self, shingles):
+        sig = minhash(shingles)
+        return [sig[i * ROWS_PER_BAND:(i + 1) * ROWS_PER_BAND].tobytes() for i in range(NUM_BANDS)]
+
+    # ----------------------------------
+
+    def contains(self, key, scope=None):
+        return (scope, key) in self._entries
+
+    def find(self, shingles, scope=None):
+        """
+        Key of the most similar stored article in `scope` at or above the
+        threshold, or None.
+        """
+        if not shingles:
+            return None
+        bands = self._bands(shingles)
+        with self._lock:
+            candidates = set()
+            for bucket, band in zip(self._buckets, bands):
+                candidates.update(bucket.get(band, ()))
+
+            best, best_sim = None, self.threshold
+            for entry_id in candidates:
+                if entry_id[0] != scope:
+                    continue
+                sim = jaccard(shingles, self._entries[entry_id][1])
+                if sim >= best_sim:
+                    best, best_sim = entry_id[1], sim
+        return best
+
+    def add(self, key, shingles, timestamp, scope=None):
+        bands = self._bands(shingles) if shingles else []
+        entry_id = (scope, key)
+        with self._lock:
+            self._remove(entry_id)
+            self._entries[entry_id] = (timestamp, shingles, bands)
+            for bucket, band in zip(self._buckets, bands):
+                bucket.setdefault(band, set()).add(entry_id)
+            heapq.heappush(self._expiry, (timestamp, entry_id))
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for bucket, band in zip(self._buckets, entry[2]):
+            members = bucket.get(band)
+            members.discard(entry_id)
+            if not members:
+                del bucket[band]
+
+    def prune(self, now=None):
+        """Drops articles published more than `window_days` before `now`."""
+        cutoff = (now or time.time()) - self.window
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < cutoff:
+                timestamp, entry_id = heapq.heappop(self._expiry)
+                entry = self._entries.get(entry_id)
+                # Stale heap item when the article was re-added later
+                if entry is not None and entry[0] == timestamp:
+                    self._remove(entry_id)
+                    removed += 1
+        return removed
+
+    # ----------------------------------
+
+    def save(self, path=INDEX_FILE):
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "entries": [[scope, key, ts, sorted(shingles)]
+                            for (scope, key), (ts, shingles, _) in self._entries.items()],
+            }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE, **kwargs):
+        index = cls(**kwargs)
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError("index version changed")
+            for scope, key, ts, shingles in data["entries"]:
+                index.add(key, frozenset(shingles), ts, scope)
+        except Exception as e:
+            print(f"Near-duplicate index reset ({e})")
+            return cls(**kwargs)
+        index.prune()
+        return index
@@ -1,3 +1,8 @@
+from keyword_matcher import KeywordMatcher
+
+# ============================================================
+# NEWS TOPICS
+# ============================================================
 
 CATEGORIES = {
     "Earnings & Financials": ["earnings", "revenue", "profit", "margin", "eps", "financial", "quarterly", "forecast", "guidance", "balance sheet", "net income", "sales", "dividend"],
@@ -9,6 +14,71 @@ CATEGORIES = {
     "Management & Strategy": ["ceo", "management", "strategy", "executive", "board", "hire", "fire", "layoff", "shareholder", "vote", "acquisition", "merger"]
 }
 
+# ============================================================
+# FINANCIAL INTENT (news_ingest scoring)
+# ============================================================
+
+CATEGORY_RULES = {
+    "earnings": ["earnings", "eps", "revenue", "quarter", "results", "guidance", "forecast", "profit", "loss", "beat", "miss"],
+    "analyst": ["upgrade", "downgrade", "price target", "rating", "initiated", "reiterate", "analyst"],
+    "management": ["ceo", "cfo", "board", "resigns", "appoints", "executive", "leadership"],
+    "corporate": ["acquisition", "merger", "buyback", "dividend", "split", "deal", "partnership", "expansion"],
+    "filing": ["13f", "stake", "holdings", "llc increases", "llc reduces", "management purchased", "increases position", 
+               "reduces position", "institutional", "buys shares", "sells shares", "buys new shares", "new position in"],
+    "regulation": ["sec", "lawsuit", "settlement", "investigation", "fine", "penalty", "compliance"],
+}
+
+# Ownership spam patterns (HARD BLOCK)
+OWNERSHIP_SPAM_PATTERNS = [
+    "buys shares", "sells shares", "buys new shares", "increases holdings",
+    "reduces holdings", "new position in", "llc buys", "llc sells",
+    "advisors buys", "advisors sells", "management increases", "management reduces",
+    "grows stock holdings", "raises stock position", "sells 4,", "sells 3,", "sells 2,", "sells 1,"
+]
+
+# Off-topic news (blocked on 2+ mentions)
+NOISE_KEYWORDS = [
+    # Weather
+    "weather", "storm", "hurricane", "flood", "tornado", "freeze", "snow",
+    # Violence/Crime
+    "shooting", "murder", "crime", "arrest", "police",
+    # War/Military
+    "war", "military", "invasion", "troops", "missile", "ukraine", "russia",
+    # Politics (unless directly business-related)
+    "election", "vote", "congress", "senate", "democrat", "republican", "trump", "biden",
+    # Sports/Entertainment
+    "sports", "game", "celebrity", "movie", "concert", "nfl", "nba",
+    # Travel disruptions
+    "airline delays", "flight cancel", "airport",
+    # Crypto-only noise (unless it's about the company's crypto strategy)
+    "bitcoin price", "crypto crash", "meme coin",
+]
+
+# High-impact keywords (score bonus)
+HIGH_IMPACT_KEYWORDS = [
+    "earnings", "revenue", "guidance", "quarter", "profit", "loss",
+    "upgrade", "downgrade", "beat", "miss", "forecast", "outlook",
+    "acquisition", "merger", "buyback", "dividend", "split",
+    "sec", "filing", "lawsuit", "settlement", "investigation",
+    "ceo", "cfo", "executive", "board", "analyst"
+]
+
+# ============================================================
+# SHARED KEYWORD MATCHER
+# ============================================================
+
+# Every keyword table above, compiled once and shared by categorize_news()
+# and news_ingest's classifiers. Each article text is scanned a single
+# time; all classifiers read the cached result.
+NEWS_MATCHER = KeywordMatcher({
+    **{f"category:{name}": keywords for name, keywords in CATEGORY_RULES.items()},
+    "ownership_spam": OWNERSHIP_SPAM_PATTERNS,
+    "noise": NOISE_KEYWORDS,
+    "high_impact": HIGH_IMPACT_KEYWORDS,
+    **{f"topic:{name}": keywords for name, keywords in CATEGORIES.items()},
+})
+
+
 def categorize_news(articles):
     """
     Categorizes a list of articles.
@@ -17,22 +87,18 @@ def categorize_news(articles):
     """
     grouped = {k: [] for k in CATEGORIES.keys()}
     grouped["General"] = []
+    topics = [f"topic:{category}" for category in CATEGORIES]
     
     for article in articles:
         text_lower = (article['title'] + " " + article['summary']).lower()
-        assigned = False
-        
-        for category, keywords in CATEGORIES.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    article['category'] = category
-                    grouped[category].append(article)
-                    assigned = True
-                    break
-            if assigned:
-                break
+        hits = NEWS_MATCHER.scan(text_lower)
+        topic = NEWS_MATCHER.first_table(hits, topics)
         
-        if not assigned:
+        if topic:
+            category = topic[len("topic:"):]
+            article['category'] = category
+            grouped[category].append(article)
+        else:
             article['category'] = "General"
             grouped["General"].append(article)
             
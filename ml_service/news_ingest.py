@@ -1,13 +1,23 @@
-import feedparser
-import requests
+import heapq
+import importlib.util
+import itertools
+import os
 import re
-import yfinance as yf
+import threading
 from datetime import datetime, timedelta
-import time
 import ssl
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import numpy as np
+
+from embedding_cache import EmbeddingCache, normalize_text
+from feed_cache import get_feed_cache
+from keyword_matcher import KeywordMatcher
+from metadata_service import get_metadata_service
+from near_duplicates import NearDuplicateIndex, article_key, article_shingles, article_timestamp
+from news_categorize import CATEGORY_RULES, NEWS_MATCHER
+
 # SSL Fix
 if hasattr(ssl, '_create_unverified_context'):
     ssl._create_default_https_context = ssl._create_unverified_context
@@ -16,60 +26,59 @@ if hasattr(ssl, '_create_unverified_context'):
 # UPGRADE 3: SEMANTIC SIMILARITY FILTER
 # ============================================================
 
-try:
-    from sentence_transformers import SentenceTransformer, util
-    SEMANTIC_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-    FINANCE_REFERENCE = "earnings revenue guidance profit loss merger acquisition regulation lawsuit analyst rating upgrade downgrade CEO CFO quarterly results forecast dividend buyback IPO"
-    REF_EMBEDDING = SEMANTIC_MODEL.encode(FINANCE_REFERENCE)
-    SEMANTIC_ENABLED = True
+SEMANTIC_MODEL_NAME = "all-MiniLM-L6-v2"
+FINANCE_REFERENCE = "earnings revenue guidance profit loss merger acquisition regulation lawsuit analyst rating upgrade downgrade CEO CFO quarterly results forecast dividend buyback IPO"
+
+# Only check the package is installed; torch and the model load on first use
+SEMANTIC_ENABLED = importlib.util.find_spec("sentence_transformers") is not None
+if SEMANTIC_ENABLED:
     print("Semantic filter: ENABLED")
-except ImportError:
-    SEMANTIC_ENABLED = False
+else:
     print("Semantic filter: DISABLED (sentence-transformers not installed)")
 
+_semantic = None
+_semantic_lock = threading.Lock()
+
+def get_semantic_model():
+    """
+    Returns (model, embedding cache, reference embedding), loading the
+    model on first call.
+    """
+    global _semantic
+    with _semantic_lock:
+        if _semantic is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(SEMANTIC_MODEL_NAME)
+            # Headlines repeat across runs; embeddings are reused from disk
+            cache = EmbeddingCache(SEMANTIC_MODEL_NAME)
+            ref_embedding = cache.encode(model, [FINANCE_REFERENCE])[0]
+            _semantic = (model, cache, ref_embedding)
+    return _semantic
+
 # ============================================================
 # UPGRADE 1: FINANCIAL INTENT CLASSIFIER
 # ============================================================
 
-CATEGORY_RULES = {
-    "earnings": ["earnings", "eps", "revenue", "quarter", "results", "guidance", "forecast", "profit", "loss", "beat", "miss"],
-    "analyst": ["upgrade", "downgrade", "price target", "rating", "initiated", "reiterate", "analyst"],
-    "management": ["ceo", "cfo", "board", "resigns", "appoints", "executive", "leadership"],
-    "corporate": ["acquisition", "merger", "buyback", "dividend", "split", "deal", "partnership", "expansion"],
-    "filing": ["13f", "stake", "holdings", "llc increases", "llc reduces", "management purchased", "increases position", 
-               "reduces position", "institutional", "buys shares", "sells shares", "buys new shares", "new position in"],
-    "regulation": ["sec", "lawsuit", "settlement", "investigation", "fine", "penalty", "compliance"],
-}
-
 # Categories to KEEP (high signal)
 KEEP_CATEGORIES = ["earnings", "analyst", "management", "corporate", "regulation"]
 
 # Categories to DISCARD (low signal, high noise)
 DISCARD_CATEGORIES = ["filing"]
 
-# Ownership spam patterns (HARD BLOCK)
-OWNERSHIP_SPAM_PATTERNS = [
-    "buys shares", "sells shares", "buys new shares", "increases holdings",
-    "reduces holdings", "new position in", "llc buys", "llc sells",
-    "advisors buys", "advisors sells", "management increases", "management reduces",
-    "grows stock holdings", "raises stock position", "sells 4,", "sells 3,", "sells 2,", "sells 1,"
-]
-
 def is_ownership_spam(text):
     """Returns True if article is ownership/institutional filing spam."""
-    text_lower = text.lower()
-    return any(pattern in text_lower for pattern in OWNERSHIP_SPAM_PATTERNS)
+    return NEWS_MATCHER.scan(text.lower()).any("ownership_spam")
 
 def classify_article(text):
     """
     Classifies article into financial categories.
     Returns the primary category or 'general'.
     """
-    text_lower = text.lower()
+    hits = NEWS_MATCHER.scan(text.lower())
     scores = {}
     
-    for category, keywords in CATEGORY_RULES.items():
-        score = sum(1 for kw in keywords if kw in text_lower)
+    for category in CATEGORY_RULES:
+        score = hits.count(f"category:{category}")
         if score > 0:
             scores[category] = score
     
@@ -112,27 +121,9 @@ def get_source_weight(link, source_name):
 # UPGRADE 4: STRONGER NOISE BLACKLIST
 # ============================================================
 
-NOISE_KEYWORDS = [
-    # Weather
-    "weather", "storm", "hurricane", "flood", "tornado", "freeze", "snow",
-    # Violence/Crime
-    "shooting", "murder", "crime", "arrest", "police",
-    # War/Military
-    "war", "military", "invasion", "troops", "missile", "ukraine", "russia",
-    # Politics (unless directly business-related)
-    "election", "vote", "congress", "senate", "democrat", "republican", "trump", "biden",
-    # Sports/Entertainment
-    "sports", "game", "celebrity", "movie", "concert", "nfl", "nba",
-    # Travel disruptions
-    "airline delays", "flight cancel", "airport",
-    # Crypto-only noise (unless it's about the company's crypto strategy)
-    "bitcoin price", "crypto crash", "meme coin",
-]
-
 def has_noise(text):
     """Returns True if article contains noise keywords."""
-    text_lower = text.lower()
-    noise_count = sum(1 for kw in NOISE_KEYWORDS if kw in text_lower)
+    noise_count = NEWS_MATCHER.scan(text.lower()).count("noise")
     return noise_count >= 2  # Allow 1 mention, block 2+
 
 # ============================================================
@@ -151,12 +142,20 @@ def get_rss_feeds(ticker):
         f"https://www.nasdaq.com/feed/rssoutbound?symbol={ticker}",
         f"https://stocktwits.com/symbol/{ticker}.rss",
         f"https://seekingalpha.com/api/sa/combined/{ticker}.xml",
-        
-        # Tier B: Quality sources (will be filtered by ticker presence)
-        "https://feeds.benzinga.com/benzinga",
-        "https://seekingalpha.com/market_currents.xml",
     ]
 
+# Tier B: Quality sources (will be filtered by ticker presence).
+# The same for every ticker, so a batch fetches them once and routes each
+# entry to the tickers it mentions.
+SHARED_FEEDS = [
+    "https://feeds.benzinga.com/benzinga",
+    "https://seekingalpha.com/market_currents.xml",
+]
+
+# Feeds listed by relevance rather than newest first; always parsed to the
+# end instead of stopping at the date cutoff
+RELEVANCE_ORDERED_FEEDS = ["news.google.com"]
+
 # ============================================================
 # COMPANY NAME LOOKUP
 # ============================================================
@@ -169,8 +168,7 @@ def get_company_info(ticker):
         return _company_cache[ticker]
     
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = get_metadata_service().get(ticker, ["shortName", "longName"])
         
         company_name = info.get('shortName', '') or info.get('longName', '')
         
@@ -189,18 +187,6 @@ def get_company_info(ticker):
         _company_cache[ticker] = [ticker.lower()]
         return [ticker.lower()]
 
-# ============================================================
-# HIGH IMPACT KEYWORDS
-# ============================================================
-
-HIGH_IMPACT_KEYWORDS = [
-    "earnings", "revenue", "guidance", "quarter", "profit", "loss",
-    "upgrade", "downgrade", "beat", "miss", "forecast", "outlook",
-    "acquisition", "merger", "buyback", "dividend", "split",
-    "sec", "filing", "lawsuit", "settlement", "investigation",
-    "ceo", "cfo", "executive", "board", "analyst"
-]
-
 # ============================================================
 # RELEVANCE FILTER (HARD FILTER)
 # ============================================================
@@ -219,23 +205,38 @@ def is_relevant(article, ticker, company_keywords):
 # UPGRADE 3: SEMANTIC SIMILARITY SCORE
 # ============================================================
 
-def semantic_score(text):
-    """Returns semantic similarity to financial reference text."""
+# Texts per forward pass; larger batches amortize model overhead on CPU
+SEMANTIC_BATCH_SIZE = min(256, 32 * (os.cpu_count() or 1))
+
+def semantic_scores(texts, batch_size=SEMANTIC_BATCH_SIZE):
+    """Returns semantic similarity to financial reference text for many texts at once."""
     if not SEMANTIC_ENABLED:
-        return 1.0  # Bypass if not available
+        return [1.0] * len(texts)  # Bypass if not available
+    if not texts:
+        return []
     
     try:
-        emb = SEMANTIC_MODEL.encode(text[:500])  # Limit text length
-        score = util.cos_sim(emb, REF_EMBEDDING).item()
-        return score
+        model, cache, ref_embedding = get_semantic_model()
+        embs = cache.encode(model, [t[:500] for t in texts], batch_size=batch_size)  # Limit text length
+        cache.flush()
+        norms = np.linalg.norm(embs, axis=1) * np.linalg.norm(ref_embedding)
+        return (embs @ ref_embedding / np.maximum(norms, 1e-8)).tolist()
     except Exception:
-        return 0.5
+        return [0.5] * len(texts)
+
+def semantic_score(text):
+    """Returns semantic similarity to financial reference text."""
+    return semantic_scores([text])[0]
 
 # ============================================================
 # COMPLETE SCORING FUNCTION
 # ============================================================
 
-def score_article(article, ticker, company_keywords):
+def article_text(article):
+    """Lowercased title + summary used by the scorers."""
+    return (article["title"] + " " + article.get("summary", "")).lower()
+
+def score_article(article, ticker, company_keywords, sem_score=None):
     """
     PRO scoring with all upgrades:
     - Ticker/company presence
@@ -244,10 +245,11 @@ def score_article(article, ticker, company_keywords):
     - Semantic similarity
     - Category bonuses
     - Noise penalties
+    Pass `sem_score` when it was computed in a batch with semantic_scores().
     """
     score = 0
     title = article["title"].lower()
-    text = (title + " " + article.get("summary", "")).lower()
+    text = article_text(article)
     link = article.get("link", "").lower()
     source = article.get("source", "")
     
@@ -266,7 +268,7 @@ def score_article(article, ticker, company_keywords):
             break
     
     # High-impact keywords: +2 each (max 8)
-    impact_count = sum(1 for k in HIGH_IMPACT_KEYWORDS if k in text)
+    impact_count = NEWS_MATCHER.scan(text).count("high_impact")
     score += min(impact_count * 2, 8)
     
     # === UPGRADE 2: Source credibility ===
@@ -274,7 +276,9 @@ def score_article(article, ticker, company_keywords):
     
     # === UPGRADE 3: Semantic similarity bonus ===
     if SEMANTIC_ENABLED:
-        sem_score = semantic_score(text)
+        if sem_score is None:
+            sem_score = semantic_score(text)
+        article['semantic_score'] = round(float(sem_score), 4)  # Kept for the news archive
         if sem_score > 0.35:
             score += 5
         elif sem_score > 0.25:
@@ -305,172 +309,418 @@ def score_article(article, ticker, company_keywords):
 # DEDUPLICATION
 # ============================================================
 
-def deduplicate_articles(articles):
-    """Deduplicates articles based on normalized title similarity."""
-    unique_articles = []
+def iter_unique_articles(articles, index=None, scope=None):
+    """
+    Streaming dedup: yields each article unless it repeats one already
+    yielded. Besides exact title prefixes, near-duplicates (syndicated
+    copies with a different source suffix, reworded leads) are dropped.
+    With a persisted NearDuplicateIndex the copy kept for `scope` on
+    earlier runs is kept again: articles the index already knows stream
+    through, new ones are held back until the end of the stream so they
+    cannot displace a known copy, and are dropped when they copy an
+    article the index holds for `scope` (from any day in its window;
+    scope=None indexes across tickers). The yielded articles are added
+    to the index at the end.
+    """
     seen_normalized_titles = set()
+    local_index = NearDuplicateIndex()
+    kept = []
+    held_back = []
     
-    for article in articles:
+    def accept(article, shingles):
         norm_title = re.sub(r'\W+', '', article['title'].lower())
         
         # More aggressive dedup: first 50 chars
         short_key = norm_title[:50]
         
         if short_key in seen_normalized_titles:
-            continue
+            return False
+        if local_index.find(shingles) is not None:
+            return False
             
         seen_normalized_titles.add(short_key)
-        unique_articles.append(article)
-        
-    return unique_articles
+        local_index.add(len(kept), shingles, 0)
+        kept.append((article, shingles))
+        return True
+    
+    for article in articles:
+        shingles = article_shingles(article)
+        if index is not None and not index.contains(article_key(article), scope):
+            held_back.append((article, shingles))
+            continue
+        if accept(article, shingles):
+            yield article
+    
+    for article, shingles in held_back:
+        if index.find(shingles, scope) is not None:
+            continue
+        if accept(article, shingles):
+            yield article
+    
+    if index is not None:
+        for article, shingles in kept:
+            index.add(article_key(article), shingles, article_timestamp(article), scope)
+
+def deduplicate_articles(articles, index=None, scope=None):
+    """Deduplicates articles based on normalized title similarity (see iter_unique_articles)."""
+    return list(iter_unique_articles(articles, index, scope))
 
 # ============================================================
 # UPGRADE 5: CATEGORY QUOTAS
 # ============================================================
 
-def apply_category_quotas(articles, quota_per_category=2, total_limit=10):
+# Categories guaranteed a quota, in output order
+PRIORITY_CATEGORIES = ["earnings", "analyst", "corporate", "management", "regulation", "general"]
+
+class CategoryTopK:
     """
-    Returns balanced articles with max N per category.
-    Ensures diverse summary (Bloomberg style).
+    Streaming top-k selection with category quotas.
+    Keeps one bounded min-heap per priority category (quota_per_category
+    best) plus one for the overall best, so pushing n articles costs
+    O(n log k) and memory stays O(k) however many articles arrive.
+    result() returns exactly what apply_category_quotas() returns for the
+    same articles sorted by key (ties keep arrival order).
     """
-    bucket = defaultdict(list)
     
-    for article in articles:
+    def __init__(self, quota_per_category=2, total_limit=10, priority_categories=PRIORITY_CATEGORIES):
+        self.quota = quota_per_category
+        self.total_limit = total_limit
+        self.priority = priority_categories
+        self._by_category = {cat: [] for cat in priority_categories}
+        # Enough overall candidates to fill up after the quota picks
+        self._overall = []
+        self._overall_size = total_limit + quota_per_category * len(priority_categories)
+        self._count = 0
+    
+    @staticmethod
+    def _push_bounded(heap, item, size):
+        if len(heap) < size:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+    
+    def push(self, article, key):
+        """Adds an article ranked by `key` (higher is better)."""
+        # Earlier arrivals win ties, as with a stable sort
+        item = (key, -self._count, article)
+        self._count += 1
         category = article.get('_category', 'general')
-        bucket[category].append(article)
-    
-    final = []
-    
-    # Priority order
-    priority_categories = ["earnings", "analyst", "corporate", "management", "regulation", "general"]
+        if category in self._by_category:
+            self._push_bounded(self._by_category[category], item, self.quota)
+        self._push_bounded(self._overall, item, self._overall_size)
     
-    for cat in priority_categories:
-        if cat in bucket:
-            final.extend(bucket[cat][:quota_per_category])
-    
-    # Fill remaining with any leftover high-scoring articles
-    if len(final) < total_limit:
-        all_remaining = [a for a in articles if a not in final]
-        final.extend(all_remaining[:total_limit - len(final)])
-    
-    return final[:total_limit]
+    def result(self):
+        def ranked(heap):
+            return [item[2] for item in sorted(heap, key=lambda item: item[:2], reverse=True)]
+        
+        final = []
+        for cat in self.priority:
+            final.extend(ranked(self._by_category[cat]))
+        
+        # Fill remaining with any leftover high-scoring articles
+        if len(final) < self.total_limit:
+            chosen = {id(a) for a in final}
+            remaining = [a for a in ranked(self._overall) if id(a) not in chosen]
+            final.extend(remaining[:self.total_limit - len(final)])
+        
+        return final[:self.total_limit]
+
+def apply_category_quotas(articles, quota_per_category=2, total_limit=10):
+    """
+    Returns balanced articles with max N per category.
+    Ensures diverse summary (Bloomberg style).
+    `articles` must already be ranked best first.
+    """
+    selector = CategoryTopK(quota_per_category, total_limit)
+    for rank, article in enumerate(articles):
+        selector.push(article, -rank)
+    return selector.result()
 
 # ============================================================
 # MAIN FETCH FUNCTION (with all 5 upgrades)
 # ============================================================
 
-def fetch_news_data(ticker, days=14):
-    """
-    INSTITUTIONAL-GRADE news fetcher with 5 upgrades:
-    1. Financial intent classifier
-    2. Source credibility weighting
-    3. Semantic similarity filter
-    4. Stronger noise blacklist
-    5. Category quotas
-    """
-    feeds = get_rss_feeds(ticker)
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    print(f"Fetching news for {ticker} from {len(feeds)} quality sources...")
-    
-    company_keywords = get_company_info(ticker)
-    print(f"Company keywords: {company_keywords[:5]}")
-    
-    raw_articles = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-    }
+def clean_text(text):
+    if not text: return ""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace("&nbsp;", " ").replace("&amp;", "&")
+    return " ".join(text.split())
 
-    def fetch_single_feed(rss_url):
-        articles = []
-        try:
-            response = requests.get(rss_url, headers=headers, timeout=5)
-            if response.status_code != 200:
-                return []
+def fetch_single_feed(rss_url, cutoff_date):
+    """Articles of one feed published after `cutoff_date` ([] on failure)."""
+    articles = []
+    try:
+        # Pooled session; unchanged feeds come back as 304 with cached entries
+        date_sorted = not any(host in rss_url for host in RELEVANCE_ORDERED_FEEDS)
+        fetched = get_feed_cache().fetch(rss_url, timeout=5, cutoff=cutoff_date.timestamp(),
+                                         date_sorted=date_sorted)
+        if fetched is None:
+            return []
+        source_title, entries = fetched
+
+        for entry in entries:
+            published_dt = None
+            if entry['published']:
+                published_dt = datetime.fromtimestamp(entry['published'])
             
-            feed = feedparser.parse(response.content)
-
-            for entry in feed.entries:
-                published_dt = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published_dt = datetime.fromtimestamp(time.mktime(entry.published_parsed))
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    published_dt = datetime.fromtimestamp(time.mktime(entry.updated_parsed))
-                
-                if not published_dt or published_dt < cutoff_date:
-                    continue
-
-                title = entry.title if hasattr(entry, 'title') else ''
-                link = entry.link if hasattr(entry, 'link') else ''
-                summary = entry.summary if hasattr(entry, 'summary') else ''
-                
-                def clean_text(text):
-                    if not text: return ""
-                    text = re.sub(r'<[^>]+>', '', text)
-                    text = text.replace("&nbsp;", " ").replace("&amp;", "&")
-                    return " ".join(text.split())
-
-                title = clean_text(title)
-                summary = clean_text(summary)
-                
-                if len(summary) < 20:
-                    summary = title
-                    
-                source_title = getattr(feed.feed, 'title', 'Unknown')
-
-                articles.append({
-                    'title': title,
-                    'link': link,
-                    'published': published_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                    'summary': summary,
-                    'source': source_title
-                })
-        except Exception:
-            pass
+            if not published_dt or published_dt < cutoff_date:
+                continue
+
+            title = clean_text(entry['title'])
+            summary = clean_text(entry['summary'])
             
-        return articles
+            if len(summary) < 20:
+                summary = title
+
+            articles.append({
+                'title': title,
+                'link': entry['link'],
+                'published': published_dt.strftime('%Y-%m-%d %H:%M:%S'),
+                'summary': summary,
+                'source': source_title
+            })
+    except Exception:
+        pass
+        
+    return articles
 
-    # Parallel fetch
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        future_to_url = {executor.submit(fetch_single_feed, url): url for url in feeds}
+def iter_feed_articles(feeds, cutoff_date, max_workers=8):
+    """Fetches feeds in parallel and yields their articles as each feed arrives."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_to_url = {executor.submit(fetch_single_feed, url, cutoff_date): url for url in feeds}
         for future in as_completed(future_to_url):
             try:
                 data = future.result()
-                raw_articles.extend(data)
             except Exception:
-                pass
+                continue
+            yield from data
+
+def fetch_feeds(feeds, cutoff_date, max_workers=8):
+    """Fetches feeds in parallel and returns all their articles."""
+    return list(iter_feed_articles(feeds, cutoff_date, max_workers))
+
+def route_shared_articles(articles, keywords_by_ticker):
+    """
+    Assigns shared-feed articles to every ticker they mention.
+    All tickers' company keywords are compiled into one matcher, so each
+    article is scanned once whatever the number of tickers. Matches are
+    exactly the articles is_relevant() would accept for that ticker.
+    Returns ticker -> list of article copies.
+    """
+    routed = {ticker: [] for ticker in keywords_by_ticker}
+    if not articles or not keywords_by_ticker:
+        return routed
     
-    print(f"Raw articles fetched: {len(raw_articles)}")
+    matcher = KeywordMatcher(keywords_by_ticker)
+    for article in articles:
+        for ticker in matcher.scan(article_text(article)).matched_tables():
+            routed[ticker].append(dict(article))
+    return routed
+
+def count_stage(articles, counts, stage):
+    """Passes articles through, counting them under `stage`."""
+    for article in articles:
+        counts[stage] += 1
+        yield article
+
+def print_stage_counts(counts):
+    print(f"Raw articles fetched: {counts['raw']}")
+    print(f"After dedup: {counts['dedup']}")
+    print(f"After relevance filter: {counts['relevance']}")
+    print(f"After noise filter: {counts['noise']}")
+
+def iter_collected(ticker, company_keywords, days=14, dedup_index=None, shared_articles=None, counts=None):
+    """
+    Streaming collection stages for one ticker: feeds -> dedup -> relevance
+    -> noise. Articles flow through as feeds arrive; nothing is buffered
+    except near-duplicate bookkeeping. `counts` receives per-stage totals.
+    """
+    feeds = get_rss_feeds(ticker)
+    if shared_articles is None:
+        feeds = feeds + SHARED_FEEDS
+    cutoff_date = datetime.now() - timedelta(days=days)
+    counts = counts if counts is not None else defaultdict(int)
+    
+    print(f"Fetching news for {ticker} from {len(feeds)} quality sources...")
+    
+    # Parallel fetch
+    articles = iter_feed_articles(feeds, cutoff_date)
+    if shared_articles is not None:
+        articles = itertools.chain(articles, shared_articles)
+    articles = count_stage(articles, counts, "raw")
     
     # STEP 1: Deduplicate (more aggressive)
-    articles = deduplicate_articles(raw_articles)
-    print(f"After dedup: {len(articles)}")
+    articles = count_stage(iter_unique_articles(articles, dedup_index, scope=ticker), counts, "dedup")
     
     # STEP 2: Hard ticker filter
-    articles = [a for a in articles if is_relevant(a, ticker, company_keywords)]
-    print(f"After relevance filter: {len(articles)}")
+    articles = (a for a in articles if is_relevant(a, ticker, company_keywords))
+    articles = count_stage(articles, counts, "relevance")
     
     # STEP 3: Remove noise
-    articles = [a for a in articles if not has_noise(a["title"] + " " + a.get("summary", ""))]
-    print(f"After noise filter: {len(articles)}")
-    
-    # STEP 4: Score and rank (includes category classification)
-    for article in articles:
-        article['_score'] = score_article(article, ticker, company_keywords)
-    
-    articles.sort(key=lambda x: x['_score'], reverse=True)
+    articles = (a for a in articles if not has_noise(a["title"] + " " + a.get("summary", "")))
+    return count_stage(articles, counts, "noise")
+
+def collect_articles(ticker, days=14, dedup_index=None, shared_articles=None):
+    """
+    Fetches, deduplicates and filters the articles for one ticker.
+    `shared_articles` are this ticker's articles from the shared feeds when
+    a batch already fetched them; otherwise the shared feeds are fetched here.
+    Returns (articles, company_keywords); articles are not scored yet.
+    """
+    company_keywords = get_company_info(ticker)
+    print(f"Company keywords: {company_keywords[:5]}")
     
-    # STEP 5: Apply category quotas for balanced output
-    top_articles = apply_category_quotas(articles, quota_per_category=2, total_limit=8)
+    counts = defaultdict(int)
+    articles = list(iter_collected(ticker, company_keywords, days, dedup_index, shared_articles, counts))
+    print_stage_counts(counts)
     
-    # Clean up internal fields
+    return articles, company_keywords
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_scored(articles, ticker, company_keywords, batch_size=SEMANTIC_BATCH_SIZE):
+    """
+    Yields (article, score), embedding articles in micro-batches of
+    `batch_size` as they stream in.
+    """
+    for batch in iter_batches(articles, batch_size):
+        sem_scores = semantic_scores([article_text(a) for a in batch])
+        for article, sem_score in zip(batch, sem_scores):
+            yield article, score_article(article, ticker, company_keywords, sem_score)
+
+def select_top_articles(scored, quota_per_category=2, total_limit=8):
+    """Category-balanced top articles from a stream of (article, score)."""
+    selector = CategoryTopK(quota_per_category, total_limit)
+    for article, score in scored:
+        selector.push(article, score)
+    top_articles = selector.result()
+    
+    # Clean up internal fields; the intent bucket stays for the news archive
+    # ('category' is taken by categorize_news topics)
     for a in top_articles:
-        a.pop('_score', None)
-        a.pop('_category', None)
+        a['intent'] = a.pop('_category', None)
     
     print(f"Final top articles: {len(top_articles)}")
     return top_articles
 
+def rank_articles(articles, ticker, company_keywords, sem_scores):
+    """Scores, ranks and applies category quotas to filtered articles."""
+    # STEP 4 + 5: Score (includes category classification), then keep the
+    # best per category with bounded heaps instead of sorting everything
+    scored = ((a, score_article(a, ticker, company_keywords, sem)) for a, sem in zip(articles, sem_scores))
+    return select_top_articles(scored, quota_per_category=2, total_limit=8)
+
+def fetch_news_data(ticker, days=14):
+    """
+    INSTITUTIONAL-GRADE news fetcher with 5 upgrades:
+    1. Financial intent classifier
+    2. Source credibility weighting
+    3. Semantic similarity filter
+    4. Stronger noise blacklist
+    5. Category quotas
+    Runs as one stream: articles are filtered, scored in micro-batches and
+    offered to the top-k selector as their feeds arrive.
+    """
+    company_keywords = get_company_info(ticker)
+    print(f"Company keywords: {company_keywords[:5]}")
+    
+    counts = defaultdict(int)
+    articles = iter_collected(ticker, company_keywords, days, counts=counts)
+    top_articles = select_top_articles(iter_scored(articles, ticker, company_keywords))
+    print_stage_counts(counts)
+    
+    try:
+        get_feed_cache().save()
+    except Exception as e:
+        print(f"Could not save feed cache: {e}")
+    return top_articles
+
+def fetch_news_batch(tickers, days=14, max_workers=4, persist=True):
+    """
+    fetch_news_data() for many tickers.
+    Shared feeds are fetched once for the whole batch and their entries
+    routed to the tickers they mention. Ticker feeds are collected
+    concurrently per ticker, then every surviving article across all
+    tickers is embedded in large batches in one semantic_scores() call
+    before ranking.
+    Without `persist` the near-duplicate index is used but not saved.
+    Returns (news, failed): news maps ticker -> top articles and failed maps
+    ticker -> error message.
+    """
+    collected = {}
+    failed = {}
+    # Keeps the same copy of a story across runs (30-day window)
+    dedup_index = NearDuplicateIndex.load()
+
+    # Shared feeds: fetched once, routed by company keywords
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        keywords_by_ticker = dict(zip(tickers, executor.map(get_company_info, tickers)))
+    cutoff_date = datetime.now() - timedelta(days=days)
+    shared = fetch_feeds(SHARED_FEEDS, cutoff_date)
+    routed = route_shared_articles(shared, keywords_by_ticker)
+    print(f"Shared feeds: {len(shared)} articles, "
+          f"{sum(len(a) for a in routed.values())} routed to {sum(1 for a in routed.values() if a)} tickers")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(collect_articles, ticker, days, dedup_index, routed[ticker])
+                   for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                collected[ticker] = future.result()
+            except Exception as e:
+                failed[ticker] = str(e)
+
+    feed_cache = get_feed_cache()
+    feed_cache.report()
+    try:
+        feed_cache.save()
+        if persist:
+            dedup_index.prune()
+            dedup_index.save()
+    except Exception as e:
+        print(f"Could not save news caches: {e}")
+
+    # A story collected for several tickers is embedded once. Only identical
+    # (normalized) text shares a score; reworded near-duplicates are scored
+    # on their own text
+    texts = []
+    index_of = {}
+    text_of = []
+    for articles, _ in collected.values():
+        for a in articles:
+            text = article_text(a)
+            match = index_of.setdefault(normalize_text(text), len(texts))
+            if match == len(texts):
+                texts.append(text)
+            text_of.append(match)
+
+    print(f"Scoring {len(texts)} articles for {len(collected)} tickers "
+          f"({len(text_of) - len(texts)} cross-ticker copies reuse a score)...")
+    unique_scores = semantic_scores(texts)
+    all_scores = [unique_scores[i] for i in text_of]
+    if SEMANTIC_ENABLED and _semantic is not None:
+        _semantic[1].report()
+
+    news = {}
+    offset = 0
+    for ticker, (articles, company_keywords) in collected.items():
+        sem_scores = all_scores[offset:offset + len(articles)]
+        offset += len(articles)
+        try:
+            news[ticker] = rank_articles(articles, ticker, company_keywords, sem_scores)
+        except Exception as e:
+            failed[ticker] = str(e)
+
+    return news, failed
+
 if __name__ == "__main__":
     news = fetch_news_data("NVDA", days=14)
     print("\n=== TOP ARTICLES ===")
@@ -0,0 +1,351 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+import uuid
+import warnings
+from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+# ============================================================
+# PARTITIONED NEWS STORE
+# ============================================================
+# The news corpus as Arrow IPC files partitioned by ticker and day, so a
+# query such as "TSLA, last 30 days" opens only those 30 directories and
+# reads them memory-mapped instead of parsing whole CSV / JSON files:
+#
+#   news_store/ticker=TSLA/date=2026-03-18/part-<time>-<id>.arrow
+#
+# Partitions are append-only: every write adds a new part file (written to
+# a temp file, then renamed into place) holding only articles whose key is
+# not already in that partition. compact() merges a partition's part files
+# into one. Source, category (the intent buckets of news_ingest and
+# companies_ranked_news.json) and company are dictionary-encoded. The
+# layout is Hive-style, so pyarrow.dataset / pandas can read it directly
+# too (format="ipc", partitioning="hive").
+
+NEWS_STORE_DIR = "ml_service/news_store"
+
+# Partition for articles without a ticker (market-wide scrapes)
+MARKET = "_MARKET"
+
+# Columns of each part file; ticker and date come from the partition path
+SCHEMA = pa.schema([
+    ("key", pa.string()),
+    ("source", pa.dictionary(pa.int32(), pa.string())),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("company", pa.dictionary(pa.int32(), pa.string())),
+    ("title", pa.string()),
+    ("summary", pa.string()),
+    ("url", pa.string()),
+    ("published", pa.string()),
+    ("scraped_at", pa.string()),
+    ("semantic_score", pa.float32()),
+])
+
+FIELDS = [field.name for field in SCHEMA]
+
+PART_SUFFIX = ".arrow"
+
+
+def article_key(*parts):
+    """Identity of an article within its partition (url, title, ...)."""
+    return hashlib.sha1("\n".join(str(p or "") for p in parts).encode("utf-8")).hexdigest()[:20]
+
+
+def article_date(published, fallback=None):
+    """Publication day from ISO, RFC 822 or free-form dates ("27 Feb, 2026, 11:56 PM IST")."""
+    text = str(published or "").strip()
+    if not text:
+        return fallback
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(text).date()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        from dateutil import parser
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return parser.parse(text, fuzzy=True).date()
+    except (ValueError, OverflowError, ImportError):
+        return fallback
+
+
+def _partition_name(ticker):
+    return (ticker or MARKET).upper().replace("/", "_")
+
+
+def _column(field, values):
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, pa.string()).dictionary_encode()
+    return pa.array(values, field.type)
+
+
+def _empty_table(columns=None):
+    schema = pa.schema([("ticker", pa.dictionary(pa.int32(), pa.string())), ("date", pa.date32())] + list(SCHEMA))
+    table = schema.empty_table()
+    return table.select(columns) if columns else table
+
+
+class NewsStore:
+
+    def __init__(self, root=NEWS_STORE_DIR):
+        self.root = root
+        # Part files opened by reads (to check partition pruning)
+        self.files_read = 0
+
+    def partition_dir(self, ticker, day):
+        return os.path.join(self.root, f"ticker={_partition_name(ticker)}", f"date={day.isoformat()}")
+
+    def tickers(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[len("ticker="):] for name in os.listdir(self.root) if name.startswith("ticker="))
+
+    def partitions(self, tickers=None, start=None, end=None):
+        """(ticker, day, directory) of every partition in range; only the listed tickers' directories are opened."""
+        found = []
+        for ticker in (tickers if tickers is not None else self.tickers()):
+            ticker_dir = os.path.join(self.root, f"ticker={_partition_name(ticker)}")
+            if not os.path.isdir(ticker_dir):
+                continue
+            for name in sorted(os.listdir(ticker_dir)):
+                if not name.startswith("date="):
+                    continue
+                day = date.fromisoformat(name[len("date="):])
+                if (start is None or day >= start) and (end is None or day <= end):
+                    found.append((_partition_name(ticker), day, os.path.join(ticker_dir, name)))
+        return found
+
+    # ----------------------------------
+
+    def _read_part(self, path, columns=None):
+        self.files_read += 1
+        # Memory-mapped: only the pages of the selected columns are touched
+        with pa.memory_map(path, "r") as source:
+            table = ipc.open_file(source).read_all()
+        return table.select(columns) if columns else table
+
+    def _part_files(self, directory):
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(PART_SUFFIX)]
+
+    def _stored_keys(self, directory):
+        keys = set()
+        if os.path.isdir(directory):
+            for path in self._part_files(directory):
+                keys.update(self._read_part(path, ["key"]).column("key").to_pylist())
+        return keys
+
+    def read(self, tickers=None, start=None, end=None, columns=None):
+        """
+        Articles of `tickers` (default: all) published between `start` and
+        `end` (dates, inclusive) as one Arrow table with ticker and date
+        columns. `columns` limits the file columns read.
+        """
+        file_columns = [c for c in columns if c in FIELDS] if columns else None
+        tables = []
+        for ticker, day, directory in self.partitions(tickers, start, end):
+            for path in self._part_files(directory):
+                table = self._read_part(path, file_columns)
+                n = table.num_rows
+                table = table.add_column(0, "date", pa.array([day] * n, pa.date32()))
+                table = table.add_column(0, "ticker", pa.array([ticker] * n, pa.string()).dictionary_encode())
+                tables.append(table.select(columns) if columns else table)
+        if not tables:
+            return _empty_table(columns)
+        # Part files have their own dictionaries; combine them once
+        return pa.concat_tables(tables).unify_dictionaries()
+
+    def last_days(self, ticker, days=30, today=None, columns=None):
+        """One ticker's articles from the last `days` days (today included)."""
+        today = today or date.today()
+        return self.read([ticker], today - timedelta(days=days - 1), today, columns)
+
+    def articles(self, ticker, days=14, today=None):
+        """news_ingest-style article dicts for one ticker, newest first."""
+        rows = self.last_days(ticker, days, today).to_pylist()
+        rows.sort(key=lambda r: (r["date"], r["published"] or ""), reverse=True)
+        return [{"title": r["title"] or "", "summary": r["summary"] or "", "link": r["url"] or "",
+                 "published": r["published"] or r["date"].isoformat(), "source": r["source"] or "",
+                 "_category": r["category"]} for r in rows]
+
+    def ranked_news(self, tickers=None, days=30, today=None):
+        """
+        The companies_ranked_news.json layout for the last `days` days:
+        {ticker: {"<days>_day_news": {date: {category: [articles]}}}}.
+        """
+        today = today or date.today()
+        table = self.read(tickers, today - timedelta(days=days - 1), today,
+                          ["ticker", "date", "category", "summary", "source", "semantic_score"])
+        ranked = {}
+        for row in table.to_pylist():
+            by_day = ranked.setdefault(row["ticker"], {}).setdefault(f"{days}_day_news", {})
+            score = row["semantic_score"]
+            by_day.setdefault(row["date"].isoformat(), {}).setdefault(row["category"] or "general", []).append(
+                {"summary": row["summary"], "source": row["source"],
+                 "semantic_score": round(score, 4) if score is not None else 0.0})
+        return ranked
+
+    # ----------------------------------
+
+    def _write_part(self, directory, table):
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}{PART_SUFFIX}"
+        tmp_path = os.path.join(directory, "." + name + ".tmp")
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    def append(self, rows):
+        """
+        Appends article rows (dicts with ticker, date and SCHEMA fields; a
+        missing key is derived from url and title) to their partitions.
+        Articles already stored are skipped. Returns the number added.
+        """
+        grouped = {}
+        for row in rows:
+            day = row["date"] if isinstance(row["date"], date) else date.fromisoformat(str(row["date"])[:10])
+            grouped.setdefault((_partition_name(row.get("ticker")), day), []).append(row)
+
+        added = 0
+        for (ticker, day), group in grouped.items():
+            directory = self.partition_dir(ticker, day)
+            seen = self._stored_keys(directory)
+            fresh = []
+            for row in group:
+                key = row.get("key") or article_key(row.get("url"), row.get("title") or row.get("summary"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                fresh.append({**row, "key": key})
+            if not fresh:
+                continue
+            table = pa.Table.from_arrays([_column(field, [row.get(field.name) for row in fresh]) for field in SCHEMA],
+                                         schema=SCHEMA)
+            self._write_part(directory, table)
+            added += len(fresh)
+        return added
+
+    def compact(self, tickers=None):
+        """
+        Merges each partition's part files into one. Readers running at the
+        same time may briefly see both the merged file and the old parts.
+        """
+        merged = 0
+        for _, _, directory in self.partitions(tickers):
+            parts = self._part_files(directory)
+            if len(parts) < 2:
+                continue
+            table = pa.concat_tables([self._read_part(path) for path in parts]).unify_dictionaries()
+            self._write_part(directory, table.combine_chunks())
+            for path in parts:
+                os.remove(path)
+            merged += 1
+        return merged
+
+    def report(self):
+        partitions = self.partitions()
+        files = sum(len(self._part_files(d)) for _, _, d in partitions)
+        size = sum(os.path.getsize(p) for _, _, d in partitions for p in self._part_files(d))
+        print(f"News store: {len(self.tickers())} tickers, {len(partitions)} partitions, "
+              f"{files} files, {size / 1e6:.1f} MB")
+
+
+# ============================================================
+# IMPORT
+# ============================================================
+
+def article_rows(news_by_ticker, scraped_at=None):
+    """Store rows for {ticker: [news_ingest article dicts]}."""
+    scraped_at = scraped_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    today = date.today()
+    for ticker, articles in news_by_ticker.items():
+        for article in articles:
+            yield {"ticker": ticker, "date": article_date(article.get("published"), today),
+                   "source": article.get("source"), "category": article.get("intent"),
+                   "title": article.get("title"), "summary": article.get("summary"), "url": article.get("link"),
+                   "published": article.get("published"), "scraped_at": scraped_at,
+                   "semantic_score": article.get("semantic_score")}
+
+
+def csv_rows(path):
+    """
+    Store rows from a scraped news CSV (multi_company_news.csv,
+    news_output.csv, ...). Rows without a publication or scrape date are
+    filed under the day the file was written.
+    """
+    written = date.fromtimestamp(os.path.getmtime(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            day = article_date(row.get("published"), article_date(row.get("scraped_at"), written))
+            yield {"ticker": row.get("ticker") or MARKET, "date": day, "source": row.get("source"),
+                   "category": row.get("category"), "company": row.get("company"), "title": row.get("title"),
+                   "summary": row.get("summary"), "url": row.get("url"), "published": row.get("published"),
+                   "scraped_at": row.get("scraped_at")}
+
+
+def ranked_json_rows(path):
+    """
+    Store rows from companies_ranked_news.json ({ticker: {"30_day_news":
+    {date: {category: [...]}}}}). Articles under an empty or unparseable
+    date are filed under the day the file was written, like csv_rows().
+    """
+    written = date.fromtimestamp(os.path.getmtime(path))
+    with open(path, "r", encoding="utf-8") as f:
+        ranked = json.load(f)
+    undated = 0
+    for ticker, data in ranked.items():
+        news_key = next((k for k in data if k.endswith("_news")), None)
+        for day, categories in (data.get(news_key) or {}).items():
+            parsed = article_date(day)
+            if parsed is None:
+                parsed = written
+                undated += sum(len(articles) for articles in categories.values())
+            for category, articles in categories.items():
+                for article in articles:
+                    yield {"ticker": ticker, "date": parsed, "source": article.get("source"), "category": category,
+                           "summary": article.get("summary"), "semantic_score": article.get("semantic_score"),
+                           "key": article_key(category, article.get("source"), article.get("summary"))}
+    if undated:
+        print(f"{path}: {undated} articles without a date filed under {written}")
+
+
+def import_file(store, path):
+    """Appends a CSV or ranked-news JSON file to the store; returns the rows added."""
+    rows = ranked_json_rows(path) if path.endswith(".json") else csv_rows(path)
+    return store.append(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitioned news store: import files and query by ticker and date")
+    parser.add_argument("--import", dest="files", nargs="+", default=[],
+                        help="CSV or ranked-news JSON files to append")
+    parser.add_argument("--ticker", default="", help="Print this ticker's articles")
+    parser.add_argument("--days", type=int, default=30, help="Days to look back for --ticker")
+    parser.add_argument("--compact", action="store_true", help="Merge each partition's part files")
+    args = parser.parse_args()
+
+    store = NewsStore()
+    for path in args.files:
+        t0 = time.perf_counter()
+        print(f"{path}: {import_file(store, path)} new articles ({time.perf_counter() - t0:.1f}s)")
+    if args.compact:
+        print(f"Compacted {store.compact()} partitions")
+    if args.ticker:
+        t0 = time.perf_counter()
+        articles = store.articles(args.ticker.upper(), days=args.days)
+        print(f"{args.ticker.upper()}: {len(articles)} articles in the last {args.days} days "
+              f"({store.files_read} files, {time.perf_counter() - t0:.3f}s)")
+        for article in articles[:20]:
+            print(f"  {article['published'][:10]}  [{article['source']}] {article['title'] or article['summary']}")
+    store.report()
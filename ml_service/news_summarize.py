@@ -1,18 +1,74 @@
+import asyncio
 import os
-import requests
+import queue
+import sys
+import threading
 from dotenv import load_dotenv
 
+from context_builder import ContextBuilder, category_header, estimate_tokens, headline_line
+from llm_client import AsyncLLMClient, MAX_IN_FLIGHT
+from summary_cache import SummaryCache, fingerprint
+
 load_dotenv()
 
+SYSTEM_PROMPT = "You are a professional Wall Street equity research analyst."
+
+PROMPT_TEMPLATE = """Create a structured stock research note.
+
+Rules:
+- Professional tone
+- Bullet points only
+- No fluff
+- No repetition
+- Only factual drivers
+
+Return EXACT format:
+
+### Key News & Market Drivers
+
+**Earnings & Financials**
+- bullets
+
+**Operations & Deliveries**
+- bullets
+
+**Innovation / AI / Growth**
+- bullets
+
+**Regulation & Legal**
+- bullets
+
+**Competition & Market Pressure**
+- bullets
+
+### Analyst View
+2 sentence outlook.
+
+News:
+{context}
+"""
+
+TEMPERATURE = 0.2
+
 class NewsSummarizer:
 
-    def __init__(self, model="mistralai/Mistral-7B-Instruct-v0.2"):
+    def __init__(self, model="mistralai/Mistral-7B-Instruct-v0.2", cache=None, max_in_flight=MAX_IN_FLIGHT,
+                 context=None):
 
         self.hf_token = os.getenv("HUGGING")
         self.model = model
-
-        # Using Together AI provider via HuggingFace Router (OpenAI-compatible)
-        self.api_url = "https://router.huggingface.co/together/v1/chat/completions"
+        self.cache = cache if cache is not None else SummaryCache()
+        self.max_in_flight = max_in_flight
+        # Chooses the headlines and the completion budget for each prompt
+        self.context = context if context is not None else ContextBuilder()
+        # Everything except the headlines that shapes the answer
+        self.prompt_key = fingerprint(model, SYSTEM_PROMPT, PROMPT_TEMPLATE, self.context.max_output_tokens,
+                                      TEMPERATURE)
+        self.fixed_tokens = estimate_tokens(SYSTEM_PROMPT + PROMPT_TEMPLATE.format(context=""))
+
+        # Using Together AI provider via HuggingFace Router (OpenAI-compatible);
+        # LLM_API_URL points it elsewhere, e.g. at fake_llm_server.py
+        self.api_url = os.getenv("LLM_API_URL", "https://router.huggingface.co/together/v1/chat/completions")
 
         self.headers = {
             "Authorization": f"Bearer {self.hf_token}",
@@ -22,89 +78,174 @@ class NewsSummarizer:
         if not self.hf_token:
             print("Warning: HUGGING token missing")
 
+        # One client for every call, so per-ticker summaries share its rate limit
+        self.client = AsyncLLMClient(self.api_url, self.headers, max_in_flight=self.max_in_flight)
+
     # ----------------------------------
 
-    def _call_hf(self, prompt):
+    def _payload(self, prompt, max_tokens):
 
-        payload = {
+        return {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": "You are a professional Wall Street equity research analyst."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            "max_tokens": 500,
-            "temperature": 0.2
+            "max_tokens": max_tokens,
+            "temperature": TEMPERATURE
         }
 
-        try:
-            r = requests.post(self.api_url, headers=self.headers, json=payload, timeout=60)
-            r.raise_for_status()
-            
-            response = r.json()
-            return response["choices"][0]["message"]["content"]
-            
-        except Exception as e:
-            print(f"API Request Failed: {e}")
-            if 'r' in locals() and r:
-                print(f"Response: {r.text}")
-            return f"Error generating summary: {str(e)}"
+    async def _complete_all(self, requests):
+        """(text, total tokens) or an exception for each (prompt, max_tokens), sent concurrently."""
+
+        async with self.client as client:
+            responses = await client.complete_many([self._payload(*r) for r in requests])
+            client.report()
+
+        results = []
+        for response in responses:
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                tokens = (response.get("usage") or {}).get("total_tokens", 0)
+                results.append((response["choices"][0]["message"]["content"], tokens))
+            except Exception as e:
+                print(f"API Request Failed: {e}")
+                results.append(e)
+        return results
 
     # ----------------------------------
 
-    def generate_summary(self, grouped_articles):
+    def build_prompt(self, headlines):
 
         context_str = ""
+        current = None
 
-        for cat, articles in grouped_articles.items():
-
-            if not articles:
-                continue
-
-            context_str += f"\n### {cat}\n"
-
-            for a in articles[:3]:
-                title = a.get('title','')
-                context_str += f"- {title}\n"
-
-        if not context_str:
-            return "No material news."
-
-        prompt = f"""Create a structured stock research note.
-
-Rules:
-- Professional tone
-- Bullet points only
-- No fluff
-- No repetition
-- Only factual drivers
-
-Return EXACT format:
-
-### Key News & Market Drivers
+        for cat, title in headlines:
+            if cat != current:
+                context_str += category_header(cat)
+                current = cat
+            context_str += headline_line(title)
 
-**Earnings & Financials**
-- bullets
-
-**Operations & Deliveries**
-- bullets
-
-**Innovation / AI / Growth**
-- bullets
+        return PROMPT_TEMPLATE.format(context=context_str)
 
-**Regulation & Legal**
-- bullets
+    def _prepare(self, grouped_by_ticker, previous=None):
+        """
+        Looks every ticker up in the summary cache. Returns ({ticker: note}
+        for cache hits and empty news, [(ticker, cache key, titles, prompt,
+        max_tokens)] for the rest).
+        """
 
-**Competition & Market Pressure**
-- bullets
+        notes = {}
+        pending = []
+        selected = self.context.build_many(grouped_by_ticker, previous, self.fixed_tokens)
 
-### Analyst View
-2 sentence outlook.
+        for ticker, headlines in selected.items():
 
-News:
-{context_str}
-"""
+            if not headlines:
+                notes[ticker] = "No material news."
+                continue
 
-        return self._call_hf(prompt)
+            titles = [title for _, title in headlines]
+            key = fingerprint(self.prompt_key, headlines)
+
+            cached = self.cache.get(key, prompt=self.prompt_key, scope=ticker, headlines=titles)
+            if cached is not None:
+                notes[ticker] = cached
+            else:
+                pending.append((ticker, key, titles, self.build_prompt(headlines),
+                                self.context.output_tokens(len(headlines))))
+
+        return notes, pending
+
+    def summarize_batch(self, grouped_by_ticker, previous=None):
+        """
+        Research notes for {ticker: categorized articles}, as {ticker: note}.
+        Headlines are chosen by the context builder; `previous` maps tickers
+        to their last note so repeated news ranks lower. Notes come from the
+        summary cache when the same headlines were summarized before (or,
+        with reuse enabled, nearly the same headlines for that ticker); all
+        remaining prompts go to the API concurrently. Errors are returned as
+        text and not cached.
+        """
+
+        notes, pending = self._prepare(grouped_by_ticker, previous)
+
+        if pending:
+            results = asyncio.run(self._complete_all([(prompt, max_tokens) for *_, prompt, max_tokens in pending]))
+
+            for (ticker, key, titles, _, _), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    notes[ticker] = f"Error generating summary: {str(result)}"
+                    continue
+                summary, tokens = result
+                self.cache.put(key, summary, prompt=self.prompt_key, scope=ticker, headlines=titles, tokens=tokens)
+                notes[ticker] = summary
+
+        return notes
+
+    def generate_summary(self, grouped_articles, ticker=None, previous=None):
+        """Research note for one ticker's categorized articles (see summarize_batch)."""
+
+        return self.summarize_batch({ticker: grouped_articles}, {ticker: previous})[ticker]
+
+    def stream_summary(self, grouped_articles, ticker=None, previous=None):
+        """
+        Yields the research note in pieces as the model writes it (a cached
+        note comes back in one piece). The finished note is cached; on
+        failure the error text is yielded instead.
+        """
+
+        notes, pending = self._prepare({ticker: grouped_articles}, {ticker: previous})
+        if ticker in notes:
+            yield notes[ticker]
+            return
+        _, key, titles, prompt, max_tokens = pending[0]
+
+        chunks = queue.Queue()
+
+        async def produce():
+            async with self.client as client:
+                async for delta in client.stream(self._payload(prompt, max_tokens)):
+                    chunks.put(delta)
+
+        def run():
+            try:
+                asyncio.run(produce())
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+
+        parts = []
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                print(f"API Request Failed: {chunk}")
+                yield f"Error generating summary: {str(chunk)}"
+                return
+            parts.append(chunk)
+            yield chunk
+
+        # Streamed responses carry no usage; the estimate is close enough for metrics
+        summary = "".join(parts)
+        if summary:
+            tokens = estimate_tokens(SYSTEM_PROMPT + prompt + summary)
+            self.cache.put(key, summary, prompt=self.prompt_key, scope=ticker, headlines=titles, tokens=tokens)
 
 if __name__ == "__main__":
-    pass
+    # On-demand note for one ticker, streamed to stdout as it is written
+    from news_ingest import fetch_news_data
+    from news_categorize import categorize_news
+
+    ticker = sys.argv[1].upper() if len(sys.argv) > 1 else "AAPL"
+    articles = fetch_news_data(ticker, days=14)
+    summarizer = NewsSummarizer()
+    for piece in summarizer.stream_summary(categorize_news(articles), ticker=ticker):
+        print(piece, end="", flush=True)
+    print()
+    summarizer.cache.save()
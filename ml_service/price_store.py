@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# LOCAL OHLCV STORE
+# ============================================================
+# One directory per ticker with one .npy file per column, so history can
+# be memory-mapped without parsing. meta.json records the row count, the
+# date range and a CRC32 per column; a store that fails these checks is
+# treated as missing and downloaded again.
+#
+#   price_store/TSLA/date.npy    int64 days since epoch
+#   price_store/TSLA/Open.npy    float64
+#   ...
+#   price_store/TSLA/meta.json
+
+STORE_DIR = "ml_service/price_store"
+
+STORE_VERSION = 1
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Stored bars re-downloaded on every delta fetch. Adjusted prices are
+# compared on these rows to detect splits and dividend adjustments.
+OVERLAP_DAYS = 10
+
+# Relative close difference on the overlap that triggers a history rewrite
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# Bars kept per ticker (~5 years)
+MAX_ROWS = 1260
+
+
+def _period_start(period, today=None):
+    """Start date for a yfinance-style period string ('1y', '6mo', '30d')."""
+    today = today or datetime.now()
+    if period.endswith("mo"):
+        return today - timedelta(days=30 * int(period[:-2]))
+    if period.endswith("y"):
+        return today - timedelta(days=365 * int(period[:-1]))
+    if period.endswith("d"):
+        return today - timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _normalize(df):
+    """OHLCV columns on a tz-naive, day-resolution, de-duplicated index."""
+    df = df[COLUMNS].astype(np.float64)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df
+
+
+class PriceStore:
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _path(self, ticker, name=""):
+        return os.path.join(self.root, ticker.upper(), name)
+
+    def tickers(self):
+        """Every stored ticker (staging directories of in-flight writes left out)."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(".") and os.path.exists(self._path(name, "meta.json")))
+
+    # ----------------------------------
+
+    def read(self, ticker, mmap=True):
+        """
+        Returns the stored history as a DataFrame, or None when the ticker is
+        not stored or fails the integrity checks.
+        """
+        meta_path = self._path(ticker, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("version") != STORE_VERSION:
+                raise ValueError("store version changed")
+
+            mode = "r" if mmap else None
+            arrays = {name: np.load(self._path(ticker, f"{name}.npy"), mmap_mode=mode)
+                      for name in ["date"] + COLUMNS}
+
+            for name, values in arrays.items():
+                if len(values) != meta["rows"]:
+                    raise ValueError(f"{name} has {len(values)} rows, expected {meta['rows']}")
+                if zlib.crc32(np.ascontiguousarray(values).tobytes()) != meta["checksums"][name]:
+                    raise ValueError(f"{name} checksum mismatch")
+            if meta["rows"] > 1 and not np.all(np.diff(arrays["date"]) > 0):
+                raise ValueError("dates are not strictly increasing")
+
+        except Exception as e:
+            print(f"Price store for {ticker} is invalid, refetching: {e}")
+            return None
+
+        index = pd.DatetimeIndex(arrays["date"].astype("datetime64[D]"))
+        return pd.DataFrame({name: arrays[name] for name in COLUMNS}, index=index)
+
+    def write(self, ticker, df):
+        """
+        Replaces the stored history atomically: the columns are written to a
+        private staging directory under the store root, then swapped in.
+        """
+        df = _normalize(df).iloc[-MAX_ROWS:]
+        final_dir = self._path(ticker).rstrip(os.sep)
+        os.makedirs(self.root, exist_ok=True)
+        # Unique per write, so concurrent writers never share or delete each other's files
+        staging = tempfile.mkdtemp(prefix=f".{ticker.upper()}-", dir=self.root)
+        tmp_dir = os.path.join(staging, "new")
+        old_dir = os.path.join(staging, "old")
+
+        try:
+            os.makedirs(tmp_dir)
+            arrays = {"date": df.index.values.astype("datetime64[D]").astype(np.int64)}
+            arrays.update({name: df[name].to_numpy(dtype=np.float64) for name in COLUMNS})
+
+            for name, values in arrays.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+
+            meta = {
+                "version": STORE_VERSION,
+                "rows": len(df),
+                "first_date": df.index[0].strftime("%Y-%m-%d") if len(df) else None,
+                "last_date": df.index[-1].strftime("%Y-%m-%d") if len(df) else None,
+                "checksums": {name: zlib.crc32(values.tobytes()) for name, values in arrays.items()},
+                "updated_at": datetime.now().isoformat(),
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            try:
+                if os.path.exists(final_dir):
+                    os.replace(final_dir, old_dir)
+                os.replace(tmp_dir, final_dir)
+            except OSError as e:
+                # Another writer swapped its copy in first; keep that one
+                print(f"Price store for {ticker} was replaced concurrently, keeping the other copy: {e}")
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def merge(self, ticker, stored, fresh):
+        """
+        Appends newly downloaded bars to the stored history.
+        Returns the merged DataFrame, or None when the overlapping bars no
+        longer match (split or dividend adjustment) and history must be
+        downloaded again.
+        """
+        fresh = _normalize(fresh)
+        # The last stored bar may have been a partial intraday bar; never compare it
+        overlap = stored.index[:-1].intersection(fresh.index)
+        if len(overlap):
+            old_close = stored.loc[overlap, "Close"].to_numpy()
+            new_close = fresh.loc[overlap, "Close"].to_numpy()
+            if not np.allclose(old_close, new_close, rtol=ADJUSTMENT_TOLERANCE, atol=0):
+                print(f"Adjusted history detected for {ticker}, rewriting store")
+                return None
+
+        merged = pd.concat([stored[stored.index < fresh.index[0]], fresh])
+        self.write(ticker, merged)
+        return merged
+
+    # ----------------------------------
+
+    def sync(self, tickers, download, period="1y"):
+        """
+        Brings the store up to date for `tickers` and returns (panel, failed)
+        like indicators.fetch_data_batch(), with each history cut to `period`.
+
+        `download(tickers, **yf_kwargs)` must return (panel, failed). Stored
+        tickers only fetch the bars since their last stored date (plus the
+        overlap); new or adjusted tickers fetch the full period. When a delta
+        download fails the stored history is served as-is.
+        """
+        stored = {t: self.read(t) for t in tickers}
+        have = [t for t in tickers if stored[t] is not None and not stored[t].empty]
+        missing = [t for t in tickers if t not in have]
+
+        panel = {}
+        failed = {}
+
+        if have:
+            last_date = min(stored[t].index[-1] for t in have)
+            start = (last_date - timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d")
+            print(f"Price store: fetching bars since {start} for {len(have)} stored tickers...")
+            delta, delta_failed = download(have, start=start)
+
+            for ticker in have:
+                if ticker in delta_failed:
+                    print(f"Delta fetch failed for {ticker}, using stored history: {delta_failed[ticker]}")
+                    panel[ticker] = stored[ticker]
+                    continue
+                merged = self.merge(ticker, stored[ticker], delta[ticker])
+                if merged is None:
+                    missing.append(ticker)
+                else:
+                    panel[ticker] = merged
+
+        if missing:
+            print(f"Price store: fetching full history for {len(missing)} tickers...")
+            full, full_failed = download(missing, period=period)
+            failed.update(full_failed)
+            for ticker, df in full.items():
+                self.write(ticker, df)
+                panel[ticker] = _normalize(df)
+
+        cutoff = pd.Timestamp(_period_start(period)).normalize()
+        panel = {t: df[df.index >= cutoff] for t, df in panel.items()}
+        return panel, failed
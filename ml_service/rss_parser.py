@@ -0,0 +1,161 @@
+import calendar
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_tz
+
+# ============================================================
+# STREAMING RSS / ATOM PARSER
+# ============================================================
+# Fast path for the RSS 2.0 and Atom feeds in get_rss_feeds(). The XML is
+# fed to a pull parser in chunks and each <item>/<entry> becomes a small
+# dict as soon as it is closed, then is released. Entries older than the
+# cutoff are skipped without being kept. For feeds published newest first,
+# parsing stops after a few consecutive old entries (as long as the entries
+# seen so far really were in date order).
+#
+# Anything else (RSS 1.0/RDF, malformed XML) returns None so the caller can
+# fall back to feedparser.
+#
+# `published` matches what the feedparser path produced:
+# time.mktime(<UTC struct_time>).
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+CHUNK_SIZE = 16384
+
+# Consecutive entries past the cutoff, in a date-sorted feed, before
+# parsing stops
+OLD_ENTRIES_TO_STOP = 3
+
+
+def _local_epoch(utc_seconds):
+    return time.mktime(time.gmtime(utc_seconds))
+
+
+def parse_rfc822(value):
+    """'Tue, 10 Jun 2025 14:00:00 GMT' -> epoch (feedparser convention), or None."""
+    parsed = parsedate_tz(value.strip()) if value else None
+    if parsed is None:
+        return None
+    return _local_epoch(calendar.timegm(parsed[:9]) - (parsed[9] or 0))
+
+
+def parse_iso8601(value):
+    """'2025-06-10T14:00:00Z' -> epoch (feedparser convention), or None."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return _local_epoch(calendar.timegm(dt.timetuple()))
+    return _local_epoch(int(dt.timestamp()))
+
+
+def _text(elem):
+    return "".join(elem.itertext()) if elem is not None else ""
+
+
+def _rss_entry(item):
+    published = parse_rfc822(item.findtext("pubDate"))
+    if published is None:
+        published = parse_iso8601(item.findtext(DC_DATE))
+    return {
+        'title': _text(item.find("title")),
+        'link': (item.findtext("link") or "").strip(),
+        'summary': _text(item.find("description")),
+        'published': published,
+    }
+
+
+def _atom_entry(entry):
+    link = ""
+    for node in entry.findall(ATOM + "link"):
+        if node.get("rel", "alternate") == "alternate":
+            link = node.get("href", "")
+            break
+    summary = entry.find(ATOM + "summary")
+    if summary is None:
+        summary = entry.find(ATOM + "content")
+    published = parse_iso8601(entry.findtext(ATOM + "published"))
+    if published is None:
+        published = parse_iso8601(entry.findtext(ATOM + "updated"))
+    return {
+        'title': _text(entry.find(ATOM + "title")),
+        'link': link,
+        'summary': _text(summary),
+        'published': published,
+    }
+
+
+FORMATS = {
+    # root tag: (entry tag, feed title tag, entry builder)
+    "rss": ("item", "title", _rss_entry),
+    ATOM + "feed": (ATOM + "entry", ATOM + "title", _atom_entry),
+}
+
+
+def parse_feed(content, cutoff=None, date_sorted=True):
+    """
+    Parses RSS 2.0 or Atom bytes into (feed title, entries).
+    Entries are dicts with title, link, summary and published (epoch or
+    None); entries published before `cutoff` are left out. Pass
+    date_sorted=False for feeds in relevance order so they are read to the end.
+    Returns None when the document is another format or not well-formed.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    fmt = None
+    feed_title = None
+    entries = []
+    depth_in_entry = 0
+    last_published = None
+    in_order = True
+    old_run = 0
+
+    try:
+        for offset in range(0, len(content), CHUNK_SIZE):
+            parser.feed(content[offset:offset + CHUNK_SIZE])
+            for event, elem in parser.read_events():
+                if fmt is None:
+                    fmt = FORMATS.get(elem.tag)
+                    if fmt is None:
+                        return None
+                    entry_tag, title_tag, build = fmt
+                    continue
+
+                if elem.tag == entry_tag:
+                    depth_in_entry += 1 if event == "start" else -1
+                if event != "end":
+                    continue
+
+                if elem.tag == title_tag and not depth_in_entry and feed_title is None:
+                    feed_title = (elem.text or "").strip()
+                    continue
+                if elem.tag != entry_tag:
+                    continue
+
+                entry = build(elem)
+                elem.clear()
+
+                published = entry['published']
+                if published is not None:
+                    if last_published is not None and published > last_published:
+                        in_order = False
+                    last_published = published
+                    if cutoff is not None and published < cutoff:
+                        old_run += 1
+                        if date_sorted and in_order and old_run >= OLD_ENTRIES_TO_STOP:
+                            return feed_title or "Unknown", entries
+                        continue
+                    old_run = 0
+                entries.append(entry)
+        parser.close()
+    except ET.ParseError:
+        return None
+
+    if fmt is None:
+        return None
+    return feed_title or "Unknown", entries
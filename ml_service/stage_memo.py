@@ -0,0 +1,164 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from summary_cache import fingerprint
+
+# ============================================================
+# STAGE MEMO (per-ticker stage results)
+# ============================================================
+# The per-ticker flow is a small graph of stages:
+#
+#   metadata  -> fundamentals -+
+#   price bars -> technicals --+-> strategy
+#   articles  -> categories  ----> summary
+#
+# Each derived stage keeps its last result per ticker under a key built
+# from a fingerprint of its inputs and of the source code that computes
+# it. When neither changed since the last run (weekend runs, tickers
+# without new bars or articles), the stored result is used instead of
+# recomputing it; any upstream change produces a new key and a rerun.
+# Fundamentals are not memoized: they are read from the metadata cache,
+# which has its own TTLs.
+#
+# Only the latest result per stage and ticker is kept; tickers not seen
+# for MAX_AGE_DAYS are dropped on save.
+
+STAGE_MEMO_FILE = "ml_service/stage_memo.json"
+
+STAGE_MEMO_VERSION = 1
+
+MAX_AGE_DAYS = 14
+
+_source_hashes = {}
+_source_lock = threading.Lock()
+
+
+def code_version(*objects):
+    """Fingerprint of the source files defining `objects` (functions, classes or modules)."""
+    hashes = []
+    for path in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        with _source_lock:
+            if path not in _source_hashes:
+                with open(path, "rb") as f:
+                    _source_hashes[path] = hashlib.sha256(f.read()).hexdigest()
+            hashes.append(_source_hashes[path])
+    return fingerprint(*hashes)
+
+
+def stage_key(code, *inputs):
+    """Memo key for a stage's code version and inputs (any JSON-able values)."""
+    blob = json.dumps([code, inputs], sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def frame_fingerprint(df):
+    """Fingerprint of a price frame's dates and values."""
+    import pandas as pd
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class StageMemo:
+
+    def __init__(self, path=STAGE_MEMO_FILE, max_age_days=MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        # Lookups miss while disabled; results are still stored for later runs
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._data = {}         # stage -> {ticker: {key, value, used_at}}
+        self._dirty = False
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != STAGE_MEMO_VERSION:
+                raise ValueError("memo version changed")
+            self._data = data["stages"]
+        except Exception as e:
+            print(f"Stage memo reset ({e})")
+            self._data = {}
+
+    # ----------------------------------
+
+    def get(self, stage, ticker, key):
+        """The stored result when `key` matches the last run's, else None."""
+        with self._lock:
+            entry = self._data.get(stage, {}).get(ticker)
+            if self.enabled and entry is not None and entry["key"] == key:
+                entry["used_at"] = time.time()
+                self._dirty = True
+                self.hits[stage] += 1
+                return entry["value"]
+            self.misses[stage] += 1
+            return None
+
+    def put(self, stage, ticker, key, value):
+        with self._lock:
+            self._data.setdefault(stage, {})[ticker] = {"key": key, "value": value, "used_at": time.time()}
+            self._dirty = True
+
+    def run(self, stage, ticker, key, compute, keep=None):
+        """
+        compute() unless the stored result for `key` can be used. Results
+        for which keep(result) is false (errors) are not stored.
+        """
+        cached = self.get(stage, ticker, key)
+        if cached is not None:
+            return cached
+        result = compute()
+        if keep is None or keep(result):
+            self.put(stage, ticker, key, result)
+        return result
+
+    # ----------------------------------
+
+    def save(self):
+        """Writes the memo to disk, dropping tickers not used for MAX_AGE_DAYS."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            cutoff = time.time() - self.max_age
+            for entries in self._data.values():
+                for ticker in [t for t, e in entries.items() if e["used_at"] < cutoff]:
+                    del entries[ticker]
+            data = {"version": STAGE_MEMO_VERSION, "stages": self._data}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def report(self):
+        stages = sorted(set(self.hits) | set(self.misses))
+        counts = ", ".join(f"{s} {self.hits[s]}/{self.hits[s] + self.misses[s]}" for s in stages)
+        print(f"Stage memo: reused {counts or 'nothing'}")
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_stage_memo():
+    """Process-wide StageMemo (loaded on first use)."""
+    global _memo
+    with _memo_lock:
+        if _memo is None:
+            _memo = StageMemo()
+    return _memo
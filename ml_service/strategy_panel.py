@@ -0,0 +1,294 @@
+import argparse
+import time
+
+import numpy as np
+
+from indicators import round_half
+from monte_carlo import ATR_BAND, daily_volatility, level_probabilities, probabilities_dict
+
+# ============================================================
+# COLUMNAR STRATEGY EVALUATION
+# ============================================================
+# The trade plan rules, for a whole universe at once. The indicator table
+# (one row per ticker) goes through the rules as vectorized columns:
+# interpretations as codes, scenarios and swing setups as flags and
+# rounded levels, and the Monte-Carlo probabilities as one batch. Strings
+# are only built when a report dict is requested, so rescoring every
+# ticker after a rule change is a handful of array operations.
+#
+# This is the only implementation of the rules: generate_detailed_strategy()
+# evaluates a one-row table and backtest.py replays swing_setups() on
+# every historical bar.
+
+# Indicator columns and the value the rules assume when one is missing
+TABLE_DEFAULTS = {
+    "current_price": 0.0,
+    "RSI": 50.0,
+    "MACD": 0.0,
+    "MACD_Signal": 0.0,
+    "SMA_20": 0.0,
+    "SMA_50": 0.0,
+    "SMA_200": 0.0,
+    "ATR": 0.0,
+    "Volatility": 0.0,
+    "trailingPE": np.nan,
+    "sentiment_score": 0.0,
+}
+
+RSI_ZONES = ["Neutral", "Oversold (Buy Signal)", "Approaching Oversold", "Overbought (Sell Signal)",
+             "Momentum Building"]
+
+# Swing setups: 1 Buy Dip, -1 Sell / Avoid, 0 none
+SWING_SIGNALS = {1: "Buy Dip", -1: "Sell / Avoid", 0: "Weak Sell / Avoid"}
+
+NO_DATA_REPORT = {
+    "entry": "N/A",
+    "stop_loss": "N/A",
+    "take_profit": "N/A",
+    "signal": "Neutral (No Data)",
+    "trend_status": "N/A",
+    "technical_table": [],
+    "scenarios": {},
+    "probabilities": {}
+}
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+def indicator_table(technicals, fundamentals=None, sentiment=None):
+    """
+    The indicator table for {ticker: technicals dict}, with the trailing
+    P/E from {ticker: fundamentals dict} and {ticker: sentiment score}.
+    """
+    # pandas loads on first use so importing strategy (and the pipeline) stays cheap
+    import pandas as pd
+
+    fundamentals = fundamentals or {}
+    sentiment = sentiment or {}
+    rows = {}
+    for ticker, tech in technicals.items():
+        row = {column: (tech or {}).get(column) for column in TABLE_DEFAULTS}
+        row["trailingPE"] = _number((fundamentals.get(ticker) or {}).get("trailingPE"))
+        row["sentiment_score"] = sentiment.get(ticker, 0)
+        rows[ticker] = row
+    table = pd.DataFrame.from_dict(rows, orient="index", columns=list(TABLE_DEFAULTS), dtype=np.float64)
+    return table.fillna({column: value for column, value in TABLE_DEFAULTS.items() if not np.isnan(value)})
+
+
+def swing_setups(price, rsi, sma_20):
+    """
+    The short-term swing trade as arrays: side (1 Buy Dip, -1 Sell / Avoid,
+    0 none), trigger, target and stop loss. A price not above SMA 20 is a
+    short setup, whatever the RSI.
+    """
+    short = ~(price > sma_20)
+    long = ~short & (rsi < 35)
+    side = np.where(long, 1, np.where(short, -1, 0)).astype(np.int8)
+    trigger = np.where(long, round_half(price), round_half(price * 0.98))
+    target = np.where(long, round_half(sma_20), round_half(price * 0.94))
+    stop_loss = np.where(long, round_half(price * 0.96), round_half(price * 1.02))
+    return side, trigger, target, stop_loss
+
+
+def evaluate_strategies(table, simulate=True, **options):
+    """
+    The trade plan rules over an indicator table. Returns
+    a frame of the inputs plus one column per decision and level; with
+    `simulate`, the setups' Monte-Carlo probabilities too (options go to
+    level_probabilities).
+    """
+    table = table.reindex(columns=list(TABLE_DEFAULTS)).astype(np.float64)
+    table = table.fillna({column: value for column, value in TABLE_DEFAULTS.items() if not np.isnan(value)})
+    price, rsi, sma_20, sma_200, atr, vol = (table[c].to_numpy() for c in
+                                              ("current_price", "RSI", "SMA_20", "SMA_200", "ATR", "Volatility"))
+    out = table.copy()
+    out["no_data"] = price == 0
+
+    # --- 1. Technical Analysis Interpretation ---
+    out["rsi_zone"] = np.select([rsi < 30, rsi < 45, rsi > 70, rsi > 55], [1, 2, 3, 4], 0)
+    out["macd_bullish"] = table["MACD"].to_numpy() > table["MACD_Signal"].to_numpy()
+    uptrend = price > sma_200
+    out["uptrend"] = uptrend
+    out["above_sma_20"] = price > sma_20
+    out["above_sma_200"] = uptrend
+
+    # --- 2. Scenarios ---
+    out["accumulate"] = uptrend & (rsi < 40)
+    out["rich_valuation"] = table["trailingPE"].to_numpy() > 60
+    buy_zone = round_half(sma_200 * 1.02)
+    out["buy_zone"] = buy_zone
+    out["buy_zone_top"] = round_half(buy_zone * 1.05)
+
+    swing, out["trigger"], out["target"], out["stop_loss"] = swing_setups(price, rsi, sma_20)
+    out["swing"] = swing
+
+    # --- 3. Probability Analysis ---
+    score = (20 * uptrend + 20 * out["macd_bullish"].to_numpy()
+             + np.where((rsi > 40) & (rsi < 60), 10, np.where(rsi < 30, 15, 0)))
+    sent = table["sentiment_score"].to_numpy()
+    score = score + np.where(sent > 0.1, 20, np.where(sent < -0.1, -20, 0))
+    bull = np.clip(score, 10, 80) + 10
+    out["heuristic_bull"] = round_half(bull * 0.75, 0)
+    out["heuristic_bear"] = round_half((100 - bull) * 0.75, 0)
+
+    if simulate:
+        # Setup levels on each side of the price, ATR_BAND ATRs away for a side without one
+        band = np.where(atr > 0, ATR_BAND * atr, ATR_BAND * price * vol)
+        has_setup = swing != 0
+        levels = np.stack([out["stop_loss"].to_numpy(), out["target"].to_numpy()])
+        above = has_setup & (levels > price)
+        below = has_setup & (levels > 0) & (levels < price)
+        up = np.where(above.any(axis=0), np.where(above, levels, np.inf).min(axis=0), price + band)
+        down = np.where(below.any(axis=0), np.where(below, levels, -np.inf).max(axis=0), price - band)
+        sigma = daily_volatility(price, vol, atr)
+        live = ~out["no_data"].to_numpy()
+        p_up, p_down, p_none = level_probabilities(price[live], up[live], down[live], sigma[live], **options)
+        out["upside_level"] = up
+        out["downside_level"] = down
+        for column, values in (("p_up", p_up), ("p_down", p_down), ("p_none", p_none)):
+            out[column] = np.nan
+            out.loc[live, column] = values
+        out.attrs["simulation"] = {"horizon": options.get("horizon"), "paths": options.get("paths")}
+    return out
+
+
+def _probabilities(row, simulation):
+    if not np.isnan(row["p_up"]):
+        return probabilities_dict(np.float64(row["p_up"]), np.float64(row["p_down"]), np.float64(row["p_none"]),
+                                  np.float64(row["upside_level"]), np.float64(row["downside_level"]),
+                                  **{k: v for k, v in simulation.items() if v is not None})
+    return {
+        "bull_case": f"{int(row['heuristic_bull'])}%",
+        "bear_case": f"{int(row['heuristic_bear'])}%",
+        "neutral_case": "25%",
+        "method": "heuristic"
+    }
+
+
+def simulated_probabilities(frame):
+    """{ticker: Monte-Carlo probabilities block} for the simulated rows of an evaluate_strategies() frame."""
+    simulation = {k: v for k, v in frame.attrs.get("simulation", {}).items() if v is not None}
+    live = frame[frame["p_up"].notna()]
+    return {ticker: probabilities_dict(np.float64(p_up), np.float64(p_down), np.float64(p_none),
+                                       np.float64(up), np.float64(down), **simulation)
+            for ticker, p_up, p_down, p_none, up, down in zip(
+                live.index, live["p_up"], live["p_down"], live["p_none"], live["upside_level"],
+                live["downside_level"])}
+
+
+def strategy_report(row, probabilities=None, simulation=None):
+    """One ticker's trade plan report from its evaluated row (a dict)."""
+    if row["no_data"]:
+        return {**NO_DATA_REPORT, "technical_table": [], "scenarios": {}, "probabilities": {}}
+
+    price, rsi, sma_20, sma_200 = row["current_price"], row["RSI"], row["SMA_20"], row["SMA_200"]
+    trend_status = "Uptrend" if row["uptrend"] else "Downtrend"
+    short_term_status = "Bullish" if row["above_sma_20"] else "Bearish/Consolidation"
+    tech_table = [
+        {"indicator": "RSI (14-Day)", "reading": f"{rsi:.2f}", "interpretation": RSI_ZONES[row["rsi_zone"]]},
+        {"indicator": "MACD", "reading": f"{row['MACD']:.2f} / {row['MACD_Signal']:.2f}",
+         "interpretation": f"{'Bullish' if row['macd_bullish'] else 'Bearish'} Cross"},
+        {"indicator": "SMA 200", "reading": f"${sma_200:.2f}",
+         "interpretation": "Long-term Support" if row["above_sma_200"] else "Long-term Resistance"},
+        {"indicator": "SMA 20", "reading": f"${sma_20:.2f}",
+         "interpretation": "Immediate Support" if row["above_sma_20"] else "Immediate Resistance"},
+    ]
+
+    if row["accumulate"]:
+        conservative_action = "ACCUMULATE"
+        conservative_reason = "Long term trend is up and price is pulling back."
+    else:
+        conservative_action = "WAIT / HOLD"
+        conservative_reason = "Volatile market conditions."
+        if row["rich_valuation"]:
+            conservative_reason += " Valuation is high (Growth Premium)."
+
+    swing = row["swing"]
+    swing_setup = {}
+    if swing == -1:
+        swing_setup = {"type": "Bearish", "trigger": f"Break below ${row['trigger']}",
+                       "target": row["target"], "stop_loss": row["stop_loss"]}
+    elif swing == 1:
+        swing_setup = {"type": "Bullish", "trigger": f"Limit Buy at ${row['trigger']}",
+                       "target": row["target"], "stop_loss": row["stop_loss"]}
+
+    if probabilities is None:
+        probabilities = _probabilities(row, simulation or {}) if "p_up" in row else {}
+
+    return {
+        "entry": swing_setup.get("trigger", "Wait"),
+        "stop_loss": swing_setup.get("stop_loss", "N/A"),
+        "take_profit": swing_setup.get("target", "N/A"),
+        "signal": SWING_SIGNALS[swing],
+        "trend_status": f"{short_term_status} within {trend_status}",
+        "technical_table": tech_table,
+        "scenarios": {
+            "conservative": {
+                "action": conservative_action,
+                "reason": conservative_reason,
+                "entry_zone": f"${row['buy_zone']} - ${row['buy_zone_top']}",
+                "target": "18-24 months"
+            },
+            "swing": {
+                "action": SWING_SIGNALS[swing],
+                "setup": swing_setup
+            }
+        },
+        "probabilities": probabilities
+    }
+
+
+def strategy_reports(frame, probabilities=None):
+    """
+    {ticker: report} for an evaluate_strategies() frame. `probabilities`
+    ({ticker: block}) replaces the frame's simulated blocks.
+    """
+    probabilities = probabilities or {}
+    simulation = frame.attrs.get("simulation", {})
+    columns = list(frame.columns)
+    reports = {}
+    for ticker, values in zip(frame.index, frame.itertuples(index=False, name=None)):
+        row = dict(zip(columns, values))
+        for column in ("no_data", "macd_bullish", "uptrend", "above_sma_20", "above_sma_200", "accumulate",
+                       "rich_valuation"):
+            row[column] = bool(row[column])
+        for column in ("rsi_zone", "swing"):
+            row[column] = int(row[column])
+        reports[ticker] = strategy_report(row, probabilities.get(ticker), simulation)
+    return reports
+
+
+def generate_strategy_panel(technicals, fundamentals=None, sentiment=None, simulate=True, **options):
+    """{ticker: trade plan report} for a universe, evaluated as columns."""
+    table = indicator_table(technicals, fundamentals, sentiment)
+    return strategy_reports(evaluate_strategies(table, simulate=simulate, **options))
+
+
+if __name__ == "__main__":
+    from insights_store import InsightsStore
+
+    parser = argparse.ArgumentParser(description="Rescore stored trade plans with the current strategy rules")
+    parser.add_argument("--tickers", default="", help="Comma-separated tickers (default: every stored ticker)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the new signals without writing them")
+    args = parser.parse_args()
+
+    store = InsightsStore()
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()] or store.tickers()
+    stored = {t: store.read(t) for t in tickers}
+    stored = {t: result for t, result in stored.items() if result and "error" not in (result.get("technicals") or {})}
+    if not stored:
+        parser.error(f"No stored technicals in {store.root}; run generate_insights.py first")
+
+    t0 = time.perf_counter()
+    reports = generate_strategy_panel({t: r["technicals"] for t, r in stored.items()},
+                                      {t: r.get("fundamentals") for t, r in stored.items()})
+    print(f"Rescored {len(reports)} tickers in {time.perf_counter() - t0:.2f}s")
+    changed = [t for t, report in reports.items() if report != stored[t].get("trade_report")]
+    for ticker in changed:
+        before = (stored[ticker].get("trade_report") or {}).get("signal")
+        print(f"{ticker:<8} {before} -> {reports[ticker]['signal']}")
+    print(f"{len(changed)} trade plans changed")
+    if changed and not args.dry_run:
+        store.write({t: {**stored[t], "trade_report": reports[t]} for t in changed})
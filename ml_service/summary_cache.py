@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================================
+# LLM SUMMARY CACHE
+# ============================================================
+# Research notes keyed by a fingerprint of everything that goes into the
+# request: model, generation settings, prompt template and the selected
+# headlines in order. A ticker whose headlines did not change since the
+# last run gets its note back without calling the API.
+#
+# Optionally, a note can also be reused when the new headline set overlaps
+# a cached one for the same ticker and prompt by at least `reuse_overlap`
+# (Jaccard over normalized headlines). This is off unless an overlap is
+# given.
+#
+# The fingerprint already changes with the headlines, so the TTL only
+# bounds how long an unchanged note is reused; it spans a week of runs
+# (weekends and holidays included). Beyond MAX_ENTRIES the least recently
+# used ones are dropped.
+
+SUMMARY_CACHE_FILE = "ml_service/summary_cache.json"
+
+SUMMARY_CACHE_VERSION = 1
+
+SUMMARY_TTL_HOURS = 7 * 24
+
+MAX_ENTRIES = 1000
+
+
+def normalize_headline(title):
+    return re.sub(r"\W+", " ", title.lower()).strip()
+
+
+def fingerprint(*parts):
+    """sha256 over a JSON encoding of `parts` (stable across runs)."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def overlap(a, b):
+    """Jaccard similarity of two headline sets."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SummaryCache:
+
+    def __init__(self, path=SUMMARY_CACHE_FILE, ttl_hours=SUMMARY_TTL_HOURS,
+                 max_entries=MAX_ENTRIES, reuse_overlap=None):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.reuse_overlap = reuse_overlap
+        self._lock = threading.Lock()
+        # key -> {summary, prompt, scope, headlines, tokens, created_at}; oldest use first
+        self._entries = OrderedDict()
+        self._dirty = False
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.tokens_spent = 0
+
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != SUMMARY_CACHE_VERSION:
+                raise ValueError("cache version changed")
+            self._entries = OrderedDict(data["entries"])
+        except Exception as e:
+            print(f"Summary cache reset ({e})")
+            self._entries = OrderedDict()
+
+    # ----------------------------------
+
+    def _expired(self, entry, now):
+        return now - entry["created_at"] > self.ttl
+
+    def _near_match(self, prompt, scope, headlines, now):
+        """Cached entry for the same scope and prompt with the most similar headlines."""
+        best, best_overlap = None, self.reuse_overlap
+        for key, entry in self._entries.items():
+            if entry["prompt"] != prompt or entry["scope"] != scope or self._expired(entry, now):
+                continue
+            similarity = overlap(headlines, set(entry["headlines"]))
+            if similarity >= best_overlap:
+                best, best_overlap = key, similarity
+        return best
+
+    def get(self, key, prompt=None, scope=None, headlines=()):
+        """
+        Returns the cached summary for `key`, or None. With a reuse overlap
+        set and a `scope`, falls back to the closest cached headline set
+        for the same scope and `prompt` fingerprint.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None and self.reuse_overlap is not None and scope is not None:
+                near_key = self._near_match(prompt, scope, {normalize_headline(h) for h in headlines}, now)
+                if near_key is not None:
+                    key, entry = near_key, self._entries[near_key]
+                    self.near_hits += 1
+            elif entry is not None:
+                self.hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.tokens_saved += entry["tokens"]
+            return entry["summary"]
+
+    def put(self, key, summary, prompt=None, scope=None, headlines=(), tokens=0):
+        with self._lock:
+            self._entries[key] = {
+                "summary": summary,
+                "prompt": prompt,
+                "scope": scope,
+                "headlines": sorted({normalize_headline(h) for h in headlines}),
+                "tokens": tokens,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.tokens_spent += tokens
+            self._dirty = True
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self):
+        """Writes the cache to disk, dropping expired entries."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            for key in [k for k, e in self._entries.items() if self._expired(e, now)]:
+                del self._entries[key]
+            data = {"version": SUMMARY_CACHE_VERSION, "entries": list(self._entries.items())}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def report(self):
+        total = self.hits + self.near_hits + self.misses
+        print(f"Summary cache: {self.hits}/{total} exact hits, {self.near_hits} near-duplicate reuses, "
+              f"{self.misses} misses; ~{self.tokens_saved} tokens saved, {self.tokens_spent} spent")
@@ -0,0 +1,182 @@
+import sys
+import os
+import math
+import time
+
+import numpy as np
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import (backtest_panel, simulate, swing_signals, SIGNALS, ENTRY_WINDOW, MAX_HOLD, FEE_RATE,
+                      TARGET, STOP, TIME)
+from indicators import build_price_arrays, indicator_arrays, latest_indicators
+from verify_indicators import make_panel
+from verify_strategy_panel import reference_strategy
+
+YEARS = 5
+DAYS = 252 * YEARS
+UNIVERSE = 500
+REFERENCE_TICKERS = 8
+
+
+def strategy_at(arrays, indicators, row, col):
+    """The per-ticker strategy rules on the indicators of that bar (without probabilities)."""
+    sliced_prices = {k: v[:, :col + 1] for k, v in arrays.items()}
+    sliced = {k: v[:, :col + 1] for k, v in indicators.items()}
+    return reference_strategy(latest_indicators(sliced_prices, sliced, row), {"overall_score": 0},
+                              probabilities={})
+
+
+def levels(plan):
+    """(side, entry, stop, target) from a trade plan."""
+    side = {name: s for s, name in SIGNALS.items()}.get(plan["signal"], 0)
+    if not side:
+        return 0, None, None, None
+    entry = float(plan["entry"].split("$")[1])
+    return side, entry, plan["stop_loss"], plan["take_profit"]
+
+
+def reference(arrays, row, signal_at, entry_window=ENTRY_WINDOW, max_hold=MAX_HOLD, fee=FEE_RATE):
+    """Bar-by-bar simulation of one ticker; signal_at(col) gives (side, entry, stop, target)."""
+    o, h, l, c = (arrays[f][row] for f in ("Open", "High", "Low", "Close"))
+    trades = []
+    position = None
+    order = None
+    for col in range(len(c)):
+        if math.isnan(c[col]):
+            continue
+        if order is not None:
+            side, entry, stop, target, until = order
+            if l[col] <= entry:
+                position = (side, min(o[col], entry), stop, target, col)
+                order = None
+            elif col >= until:
+                order = None
+        if position is not None:
+            side, entry, stop, target, entered = position
+            gap = col > entered
+            if (l[col] <= stop) if side == 1 else (h[col] >= stop):
+                price = (min(o[col], stop) if side == 1 else max(o[col], stop)) if gap else stop
+                reason = STOP
+            elif (h[col] >= target) if side == 1 else (l[col] <= target):
+                price = (max(o[col], target) if side == 1 else min(o[col], target)) if gap else target
+                reason = TARGET
+            elif col - entered >= max_hold:
+                price, reason = c[col], TIME
+            else:
+                reason = None
+            if reason:
+                trades.append((side, entered, col, reason, side * (price / entry - 1) - 2 * fee))
+                position = None
+        if position is None and order is None:
+            side, entry, stop, target = signal_at(col)
+            if side:
+                order = (side, entry, stop, target, col + entry_window)
+    return trades
+
+
+def strategy_signals(arrays, indicators, row):
+    """signal_at() applying the per-ticker rules on every bar."""
+    warm = ~np.isnan(indicators["RSI"][row]) & ~np.isnan(indicators["SMA_20"][row])
+    return lambda col: levels(strategy_at(arrays, indicators, row, col)) if warm[col] else (0, None, None, None)
+
+
+def random_signals(arrays, seed):
+    """Sparse long and short signals with levels around the close."""
+    rng = np.random.default_rng(seed)
+    close = np.nan_to_num(arrays["Close"])
+    side = rng.choice([-1, 0, 1], close.shape, p=[0.05, 0.9, 0.05]).astype(np.int8)
+    side[close == 0] = 0
+    return {"side": side,
+            "entry": close * np.where(side == 1, 0.99, 0.98),
+            "stop": close * np.where(side == 1, 0.95, 1.04),
+            "target": close * np.where(side == 1, 1.05, 0.93)}
+
+
+def same_trades(trades, row, expected):
+    mask = trades["row"] == row
+    got = list(zip(trades["side"][mask], trades["entry_col"][mask], trades["exit_col"][mask], trades["reason"][mask]))
+    return got == [t[:4] for t in expected] and np.allclose(trades["ret"][mask], [t[4] for t in expected])
+
+
+if __name__ == "__main__":
+    checks = {}
+
+    # --- Signals match the per-ticker rules on sampled bars ---
+    panel = make_panel(40, n_days=DAYS, seed=11)
+    tickers, arrays, start = build_price_arrays(panel)
+    indicators = indicator_arrays(arrays, start)
+    signals = swing_signals(arrays, indicators)
+    rng = np.random.default_rng(3)
+    warm = ~np.isnan(indicators["RSI"]) & ~np.isnan(indicators["SMA_20"])
+    rows, cols = np.nonzero(warm)
+    sample = rng.choice(len(rows), 3000, replace=False)
+    mismatches = 0
+    for i in sample:
+        row, col = rows[i], cols[i]
+        side, entry, stop, target = levels(strategy_at(arrays, indicators, row, col))
+        got = signals["side"][row, col]
+        if side != got or (side and (entry, stop, target) != (signals["entry"][row, col], signals["stop"][row, col],
+                                                             signals["target"][row, col])):
+            mismatches += 1
+    counts = {name: int((signals["side"][warm] == side).sum()) for side, name in SIGNALS.items()}
+    checks["signals match the strategy on 3000 sampled bars"] = mismatches == 0
+
+    # --- Trades match a bar-by-bar simulation ---
+    results, trades = backtest_panel(panel)
+    t0 = time.perf_counter()
+    expected = [reference(arrays, row, strategy_signals(arrays, indicators, row)) for row in range(REFERENCE_TICKERS)]
+    per_bar_time = (time.perf_counter() - t0) / REFERENCE_TICKERS
+    checks["trades match a bar-by-bar simulation"] = (
+        all(same_trades(trades, row, expected[row]) for row in range(REFERENCE_TICKERS)) and len(trades["ret"]) > 0)
+
+    # Long and short paths with arbitrary signals
+    forced = random_signals(arrays, seed=9)
+    forced_trades, _ = simulate(arrays, forced)
+    checks["long and short trades match with random signals"] = all(
+        same_trades(forced_trades, row, reference(arrays, row, lambda col, row=row: (
+            forced["side"][row, col], forced["entry"][row, col], forced["stop"][row, col], forced["target"][row, col])))
+        for row in range(len(tickers)))
+
+    equity = {t: np.prod([1 + r for *_, r in expected[row]]) - 1 for row, t in enumerate(tickers[:REFERENCE_TICKERS])}
+    checks["total return matches compounded trades"] = all(
+        abs(results[t]["total_return"] - equity[t]) < 1e-4 for t in equity)
+
+    # --- Stop wins when a bar touches both levels ---
+    bars = {f: np.array([[100.0, 100.0, 100.0]]) for f in ("Open", "High", "Low", "Close")}
+    bars["High"][0, 2], bars["Low"][0, 2] = 110.0, 90.0
+    crafted = {"side": np.array([[1, 0, 0]], dtype=np.int8), "entry": np.array([[100.0, 0, 0]]),
+               "stop": np.array([[96.0, 0, 0]]), "target": np.array([[105.0, 0, 0]])}
+    crafted_trades, _ = simulate(bars, crafted, fee=0)
+    checks["stop assumed first on a two-sided bar"] = (list(crafted_trades["reason"]) == [STOP]
+                                                      and abs(crafted_trades["ret"][0] + 0.04) < 1e-12)
+
+    # --- Speed over a large universe ---
+    big = make_panel(UNIVERSE, n_days=DAYS, seed=5)
+    t0 = time.perf_counter()
+    big_results, big_trades = backtest_panel(big)
+    vector_time = time.perf_counter() - t0
+    checks[f"{UNIVERSE} tickers x {YEARS}y in seconds"] = vector_time < 10
+
+    print("--- Backtest Report ---")
+    print(f"signals on {warm.sum()} warm bars: " + ", ".join(f"{name} {n}" for name, n in counts.items()))
+    print(f"{UNIVERSE} tickers x {DAYS} bars: {vector_time:.2f}s vectorized, "
+          f"~{per_bar_time * UNIVERSE:.0f}s bar-by-bar ({per_bar_time:.2f}s per ticker)")
+    ret = big_trades["ret"]
+    for side, name in SIGNALS.items():
+        mask = big_trades["side"] == side
+        if not mask.any():
+            print(f"{name:<13} {0:>6} trades")
+            continue
+        print(f"{name:<13} {mask.sum():>6} trades, hit rate {np.mean(big_trades['reason'][mask] == TARGET):.0%}, "
+              f"win rate {np.mean(ret[mask] > 0):.0%}, avg {ret[mask].mean():+.2%}, "
+              f"time exits {np.mean(big_trades['reason'][mask] == TIME):.0%}")
+    print(f"median per-ticker max drawdown {np.median([r['max_drawdown'] for r in big_results.values()]):.1%} "
+          f"(random-walk prices)")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: backtest checks passed.")
+    else:
+        print("FAIL: see checks above.")
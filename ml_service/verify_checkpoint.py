@@ -0,0 +1,225 @@
+import sys
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+TICKERS = [f"T{i:02d}" for i in range(25)]
+CRASH_AT = "T23"
+
+# Per-call costs of the mocked stages (seconds)
+FUNDAMENTALS_TIME = 0.15
+STRATEGY_TIME = 0.05
+PREFETCH_TIME = 0.3
+LLM_LATENCY = 0.3
+
+# Ticker budget when one ticker hangs in a network call (all tickers run at once)
+HANG_TIMEOUT = 3
+
+
+def child(mode, crash_stage):
+    """Runs the batch over mocked data sources in the current directory."""
+    import generate_insights as gi
+    from fake_llm_server import FakeLLMServer
+
+    def ran(stage, tickers):
+        for ticker in tickers:
+            print(f"RAN {stage} {ticker}", flush=True)
+
+    def crash_point(stage, ticker):
+        if stage == crash_stage and ticker == CRASH_AT:
+            os.kill(os.getpid(), signal.SIGKILL)
+
+    def fundamentals(ticker):
+        crash_point("fundamentals", ticker)
+        ran("fundamentals", [ticker])
+        time.sleep(FUNDAMENTALS_TIME)
+        return {"pe_ratio": 10 + int(ticker[1:])}
+
+    def technicals(tickers):
+        ran("technicals", tickers)
+        time.sleep(PREFETCH_TIME)
+        return {t: {"close": 100.0 + int(t[1:]), "rsi": 50.0} for t in tickers}, {}
+
+    def strategy(tech, sentiment, fund, probabilities=None):
+        crash_point("strategy", f"T{int(tech['close']) - 100:02d}")
+        time.sleep(STRATEGY_TIME)
+        return {"entry": tech["close"], "pe_seen": fund["pe_ratio"]}
+
+    def news(tickers, days=14, max_workers=4, persist=True):
+        ran("news", tickers)
+        time.sleep(PREFETCH_TIME)
+        return {t: [{"title": f"{t} beats estimates on strong demand", "summary": "", "link": "",
+                     "published": "2024-01-01", "source": "Mock"}] for t in tickers}, {}
+
+    summarize_batch = gi.NewsSummarizer.summarize_batch
+
+    def summaries(self, grouped, previous=None):
+        ran("summary", grouped)
+        crash_point("summary", CRASH_AT)
+        return summarize_batch(self, grouped, previous)
+
+    original_process = gi.process_ticker
+
+    def process(ticker, *args):
+        crash_point("ticker", ticker)
+        if crash_stage == "hang" and ticker == CRASH_AT:
+            threading.Event().wait()
+        return original_process(ticker, *args)
+
+    original_run_batch = gi.run_batch
+
+    def run_batch(*args, **kwargs):
+        if crash_stage == "hang":
+            kwargs.update(timeout=HANG_TIMEOUT, workers=len(TICKERS))
+        return original_run_batch(*args, **kwargs)
+
+    gi.get_most_active_tickers = lambda limit=25: list(TICKERS)
+    gi.prefetch_metadata = lambda tickers: None
+    gi.compute_fundamentals = fundamentals
+    gi.prefetch_technicals = technicals
+    gi.generate_detailed_strategy = strategy
+    gi.fetch_news_batch = news
+    gi.NewsSummarizer.summarize_batch = summaries
+    gi.process_ticker = process
+    gi.run_batch = run_batch
+
+    with FakeLLMServer(latency=LLM_LATENCY) as server:
+        os.environ["LLM_API_URL"] = server.url
+        gi.main(workers=1, resume=mode == "resume", compact_only=mode == "compact", dry_run=mode == "dry")
+    gi.exit_past_stuck_workers()
+
+
+def run(workdir, mode="run", crash_stage=None, timeout=None):
+    """(seconds, {stage: [tickers]}, exit code) of a batch run in `workdir`; code None if it hung."""
+    os.makedirs(os.path.join(workdir, "ml_service"), exist_ok=True)
+    t0 = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, crash_stage or ""],
+                              cwd=workdir, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return time.perf_counter() - t0, {}, None
+    seconds = time.perf_counter() - t0
+    ran = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("RAN "):
+            _, stage, ticker = line.split()
+            ran.setdefault(stage, []).append(ticker)
+    if proc.returncode not in (0, -signal.SIGKILL):
+        print(proc.stdout[-2000:], proc.stderr[-2000:])
+    return seconds, ran, proc.returncode
+
+
+def output(workdir):
+    """{ticker: result without timestamps} from the insights shards."""
+    from insights_store import InsightsStore
+    store = InsightsStore(root=os.path.join(workdir, "ml_service", "insights"), legacy_path=None)
+    results = {}
+    for ticker in store.tickers():
+        result = store.read(ticker)
+        result.pop("last_updated", None)
+        results[ticker] = result
+    return results
+
+
+def log_path(workdir):
+    return os.path.join(workdir, "ml_service", "batch_checkpoint.jsonl")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        sys.path.insert(0, HERE)
+        child(sys.argv[2], sys.argv[3] or None)
+        sys.exit(0)
+
+    from checkpoint_log import CheckpointLog, completed_stages
+
+    checks = {}
+    tmp = tempfile.mkdtemp()
+    try:
+        # --- Uninterrupted baseline ---
+        base_dir = os.path.join(tmp, "baseline")
+        full_time, _, code = run(base_dir)
+        baseline = output(base_dir)
+        checks["baseline wrote every ticker"] = code == 0 and sorted(baseline) == TICKERS
+        checks["checkpoint removed after compaction"] = not os.path.exists(log_path(base_dir))
+
+        # --- A dry run prints the results and leaves no files behind ---
+        work = os.path.join(tmp, "dry")
+        _, ran, code = run(work, mode="dry")
+        checks["dry run writes nothing"] = (code == 0 and ran.get("summary") == TICKERS
+                                            and os.listdir(os.path.join(work, "ml_service")) == [])
+
+        # --- Killed as ticker 24 of 25 starts ---
+        work = os.path.join(tmp, "crash")
+        crash_time, _, code = run(work, crash_stage="ticker")
+        records = CheckpointLog(log_path(work)).read()
+        done = completed_stages(records)
+        complete = [t for t in TICKERS if len(done.get(t, {})) == 5]
+        checks["killed run left its checkpoint"] = code == -signal.SIGKILL and complete == TICKERS[:23]
+
+        # A kill mid-write leaves a torn last line
+        with open(log_path(work), "a") as f:
+            f.write('{"type": "stage", "ticker": "T2')
+        resume_time, ran, code = run(work, mode="resume")
+        checks["resume: only the missing tickers run"] = (
+            code == 0 and ran.get("fundamentals") == [CRASH_AT, "T24"]
+            and ran.get("technicals") == [CRASH_AT, "T24"] and ran.get("summary") == [CRASH_AT, "T24"])
+        checks["resume: output matches an uninterrupted run"] = output(work) == baseline
+        checks["resume: checkpoint removed"] = not os.path.exists(log_path(work))
+
+        # --- Killed inside a ticker: finished stages are not repeated ---
+        work = os.path.join(tmp, "midticker")
+        run(work, crash_stage="strategy")
+        done = completed_stages(CheckpointLog(log_path(work)).read())
+        checks["killed mid-ticker: earlier stages checkpointed"] = sorted(done[CRASH_AT]) == ["fundamentals", "technicals"]
+        _, ran, code = run(work, mode="resume")
+        checks["resume: finished stages of a ticker are skipped"] = (
+            code == 0 and ran.get("fundamentals") == ["T24"] and ran.get("technicals") == ["T24"]
+            and ran.get("summary") == [CRASH_AT, "T24"])
+        checks["resume: later stages use checkpointed fields"] = output(work) == baseline
+
+        # --- Killed in the batch summary step: nothing per ticker finished ---
+        work = os.path.join(tmp, "summary")
+        run(work, crash_stage="summary")
+        _, ran, code = run(work, mode="compact")
+        checks["compact: nothing to write without results"] = code == 0 and output(work) == {}
+
+        # --- Compact an interrupted run without resuming ---
+        work = os.path.join(tmp, "compact")
+        run(work, crash_stage="ticker")
+        compact_time, ran, code = run(work, mode="compact")
+        compacted = output(work)
+        checks["compact: runs no stages"] = code == 0 and not ran
+        checks["compact: finished tickers written"] = (sorted(compacted) == TICKERS[:23]
+                                                      and all(compacted[t] == baseline[t] for t in compacted))
+
+        # --- A ticker stuck in a network call does not keep the process alive ---
+        work = os.path.join(tmp, "hang")
+        hang_time, _, code = run(work, crash_stage="hang", timeout=HANG_TIMEOUT + 60)
+        hung = output(work)
+        checks["stuck ticker: run exits after the budget"] = code == 0
+        checks["stuck ticker: others written, stuck one timed out"] = (
+            sorted(hung) == TICKERS and hung[CRASH_AT].get("error") == "Timed out"
+            and all(hung[t] == baseline[t] for t in TICKERS if t != CRASH_AT))
+    finally:
+        shutil.rmtree(tmp)
+
+    print("--- Checkpoint Report ---")
+    print(f"{len(TICKERS)} tickers, killed at {CRASH_AT} (24 of 25)")
+    print(f"full run {full_time:.1f}s, killed run {crash_time:.1f}s, "
+          f"resume {resume_time:.1f}s (instead of a {full_time:.1f}s rerun), compact only {compact_time:.1f}s")
+    print(f"one ticker hung: exited after {hang_time:.1f}s ({HANG_TIMEOUT}s ticker budget)")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: checkpoint checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,129 @@
+import sys
+import os
+import io
+import time
+from contextlib import redirect_stdout
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import news_ingest as ni
+from context_builder import ContextBuilder, estimate_tokens, MAX_INPUT_TOKENS
+from fake_llm_server import FakeLLMServer
+from news_categorize import categorize_news
+from news_summarize import NewsSummarizer, SYSTEM_PROMPT, PROMPT_TEMPLATE, TEMPERATURE
+from summary_cache import SummaryCache
+from verify_news_stream import load_by_ticker
+
+OLD_MAX_TOKENS = 500
+
+def old_prompt(grouped):
+    """The prompt generate_summary built before: first three titles per category."""
+    context_str = ""
+    for cat, articles in grouped.items():
+        if not articles:
+            continue
+        context_str += f"\n### {cat}\n"
+        for a in articles[:3]:
+            context_str += f"- {a.get('title','')}\n"
+    return PROMPT_TEMPLATE.format(context=context_str)
+
+def corpus_groups():
+    """Per-ticker categorized news from the sample corpus, as the pipeline ranks it."""
+    groups = {}
+    for ticker, articles in load_by_ticker().items():
+        keywords = [ticker.lower()]
+        with redirect_stdout(io.StringIO()):
+            ranked = ni.rank_articles(articles, ticker, keywords, [1.0] * len(articles))
+        groups[ticker] = categorize_news(ranked)
+    return groups
+
+def wide_groups():
+    """Same corpus with every article as a candidate (a heavy news day)."""
+    return {t: categorize_news(a) for t, a in load_by_ticker().items()}
+
+def summarizer_for(server, **kwargs):
+    os.environ["LLM_API_URL"] = server.url
+    return NewsSummarizer(cache=SummaryCache(path=None), **kwargs)
+
+def news(*titles, category="earnings"):
+    return {category: [{"title": t} for t in titles]}
+
+if __name__ == "__main__":
+    checks = {}
+    builder = ContextBuilder()
+    fixed = estimate_tokens(SYSTEM_PROMPT + PROMPT_TEMPLATE.format(context=""))
+    prompter = NewsSummarizer(cache=SummaryCache(path=None))
+
+    # --- Prompt and completion sizes over the corpus ---
+    sizes = {}
+    ranked_groups = corpus_groups()
+    for name, groups in (("ranked top 8", ranked_groups), ("all articles", wide_groups())):
+        t0 = time.perf_counter()
+        selected = builder.build_many(groups, fixed_tokens=fixed)
+        build_time = time.perf_counter() - t0
+        old_in = sum(estimate_tokens(SYSTEM_PROMPT + old_prompt(g)) for g in groups.values())
+        new_in = 0
+        new_out = 0
+        within = True
+        for ticker, headlines in selected.items():
+            prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompter.build_prompt(headlines))
+            within &= prompt_tokens <= MAX_INPUT_TOKENS or len(headlines) == 1
+            new_in += prompt_tokens
+            new_out += builder.output_tokens(len(headlines))
+        sizes[name] = (len(groups), old_in, new_in, OLD_MAX_TOKENS * len(groups), new_out, build_time)
+        checks[f"{name}: every prompt within budget"] = within
+
+    # --- Redundant headlines collapse to one ---
+    dupes = news("Acme beats third-quarter earnings estimates - Yahoo Finance",
+                 "Acme beats third quarter earnings estimates, shares rise - MarketBeat",
+                 "Acme names new chief financial officer - Reuters", category="earnings")
+    picked = [t for _, t in builder.build(dupes, fixed_tokens=fixed)]
+    checks["near-copies dropped"] = len(picked) == 2 and "Acme names new chief financial officer" in picked
+
+    # --- Novelty: yesterday's story ranks below today's news ---
+    today = {"earnings": [{"title": "Acme reports record quarterly revenue on cloud demand"}],
+             "management": [{"title": "Acme chief executive to retire next year"}]}
+    yesterday_note = ("### Key News & Market Drivers\n**Earnings & Financials**\n"
+                      "- Acme reports record quarterly revenue on cloud demand, beating estimates.\n")
+    tight = ContextBuilder(max_input_tokens=fixed + 20)
+    checks["novelty: new story kept under a tight budget"] = (
+        [t for _, t in tight.build(today, previous=yesterday_note, fixed_tokens=fixed)]
+        == ["Acme chief executive to retire next year"])
+    checks["without a previous note the top story is kept"] = (
+        [t for _, t in tight.build(today, fixed_tokens=fixed)]
+        == ["Acme reports record quarterly revenue on cloud demand"])
+
+    # --- Smaller requests on the wire, and streaming ---
+    ticker = sorted(ranked_groups)[0]
+    grouped = ranked_groups[ticker]
+    with FakeLLMServer(latency=1.0) as server:
+        s = summarizer_for(server)
+        note = s.generate_summary(grouped, ticker=ticker)
+        sent_chars, sent_max_tokens = server.prompt_chars[0], server.max_tokens[0]
+
+        s = summarizer_for(server)
+        t0 = time.perf_counter()
+        stream = s.stream_summary(grouped, ticker=ticker)
+        first = next(stream)
+        first_byte = time.perf_counter() - t0
+        streamed = first + "".join(stream)
+        full_time = time.perf_counter() - t0
+        checks["stream: same note as a blocking call"] = streamed == note
+        checks["stream: first piece well before the full note"] = first_byte < full_time / 3
+        checks["stream: finished note cached"] = next(s.stream_summary(grouped, ticker=ticker)) == note
+
+    old_chars = len(SYSTEM_PROMPT) + len(old_prompt(grouped)) + 1
+    print("--- Context Builder Report ---")
+    print(f"budget {MAX_INPUT_TOKENS} input tokens (template {fixed}); token counts estimated at 4 chars/token")
+    for name, (n, old_in, new_in, old_out, new_out, build_time) in sizes.items():
+        print(f"{name:<13} {n} tickers: input {old_in} -> {new_in} tokens, "
+              f"max_tokens {old_out} -> {new_out}, built in {build_time * 1000:.0f}ms")
+    print(f"{ticker} request: prompt {old_chars} -> {sent_chars} chars, max_tokens {OLD_MAX_TOKENS} -> {sent_max_tokens}")
+    print(f"{ticker} streamed (1s completion): first piece {first_byte * 1000:.0f}ms, full note {full_time * 1000:.0f}ms")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: context builder checks passed.")
+    else:
+        print("FAIL: see checks above.")
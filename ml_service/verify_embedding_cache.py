@@ -0,0 +1,116 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from embedding_cache import EmbeddingCache, normalize_text
+
+DIM = 384
+THREADS = 8
+
+
+class HashModel:
+    """SentenceTransformer.encode() stand-in: a fixed random unit vector per normalized text."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.encoded = 0
+        self._lock = threading.Lock()
+
+    def vector(self, text):
+        rng = np.random.default_rng(abs(hash(normalize_text(text))) % 2 ** 32)
+        vec = rng.normal(size=DIM).astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+    def encode(self, texts, batch_size=64):
+        time.sleep(self.delay)
+        with self._lock:
+            self.encoded += len(texts)
+        return np.vstack([self.vector(t) for t in texts])
+
+
+def headlines(n, start=0):
+    return [f"Company {i} reports quarterly results" for i in range(start, start + n)]
+
+
+if __name__ == "__main__":
+    checks = {}
+    tmp = tempfile.mkdtemp()
+    try:
+        # --- Hit rate: repeated and re-cased texts are served from the cache ---
+        model = HashModel()
+        cache = EmbeddingCache("mock-model", root=tmp)
+        texts = headlines(200)
+        first = cache.encode(model, texts + texts[:50])
+        second = cache.encode(model, [t.upper() + "  " for t in texts])
+        checks["each distinct text encoded once"] = model.encoded == 200
+        checks["cached vectors returned unchanged"] = np.array_equal(first[:200], second)
+        checks["hit rate counted"] = cache.stats()["hit_rate"] == round(200 / 450, 4)
+
+        cache.flush()
+        reopened = EmbeddingCache("mock-model", root=tmp)
+        checks["index survives a restart"] = (np.array_equal(reopened.encode(model, texts), first[:200])
+                                              and model.encoded == 200)
+
+        # --- TTL: expired entries are encoded again ---
+        cache = EmbeddingCache("ttl-model", root=tmp)
+        cache.encode(model, texts[:10])
+        cache.ttl = 0.05
+        time.sleep(0.1)
+        before = model.encoded
+        cache.encode(model, texts[:10])
+        checks["expired entries re-encoded"] = model.encoded - before == 10 and cache.expired == 10
+
+        # --- LRU: the least recently used entry gives up its row ---
+        cache = EmbeddingCache("lru-model", root=tmp, capacity=4)
+        a, b, c, d, e = headlines(5, start=1000)
+        for text in (a, b, c, d, a, e):
+            cache.encode(model, [text])
+            time.sleep(0.001)
+        before = model.encoded
+        cache.encode(model, [a, c, d, e])
+        checks["least recently used evicted"] = (cache.evictions == 1 and model.encoded == before
+                                                 and cache.stats()["entries"] == 4)
+
+        # --- int8 rows stay close to the float vectors ---
+        cache = EmbeddingCache("int8-model", root=tmp, quantize=True)
+        texts = headlines(500, start=2000)
+        cache.encode(model, texts)
+        exact = np.vstack([model.vector(t) for t in texts])
+        quantized = cache.encode(model, texts)
+        max_error = float(np.max(np.abs(quantized - exact) / np.max(np.abs(exact), axis=1, keepdims=True)))
+        cosine = float(np.min(np.sum(quantized * exact, axis=1) / np.linalg.norm(quantized, axis=1)))
+        checks["int8 error within half a step"] = max_error <= 0.5 / 127 + 1e-6
+        checks["int8 cosine similarity above 0.999"] = cosine > 0.999
+
+        # --- Concurrent misses for the same texts share one row per key ---
+        slow = HashModel(delay=0.05)
+        cache = EmbeddingCache("threads-model", root=tmp)
+        texts = headlines(100, start=3000)
+        threads = [threading.Thread(target=cache.encode, args=(slow, texts)) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        rows = [entry[0] for entry in cache._index.values()]
+        checks["one row per key under concurrent misses"] = (
+            len(cache._index) == 100 and len(set(rows)) == 100 and cache._used == 100)
+    finally:
+        shutil.rmtree(tmp)
+
+    print("--- Embedding Cache Report ---")
+    print(f"int8: max error {max_error * 127:.2f} steps, min cosine {cosine:.5f}; "
+          f"{THREADS} threads missing the same 100 texts used {cache._used} rows")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: embedding cache checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,148 @@
+import sys
+import os
+import hashlib
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from feed_cache import FeedCache, parse_feed
+
+FEEDS = [f"/feed/{i}.xml" for i in range(7)]
+
+def make_feed(name, version=0, items=200):
+    now = time.time()
+    entries = "".join(
+        f"<item><title>{name} headline {i} v{version}</title>"
+        f"<link>https://example.com/{name}/{i}</link>"
+        f"<description>Summary text for {name} item {i}, long enough to keep.</description>"
+        f"<pubDate>{formatdate(now - i * 3600)}</pubDate></item>"
+        for i in range(items)
+    )
+    return (f'<?xml version="1.0"?><rss version="2.0"><channel><title>{name}</title>'
+            f"{entries}</channel></rss>").encode("utf-8")
+
+class FeedStub(BaseHTTPRequestHandler):
+    """Serves RSS with ETag validation and counts requests and connections."""
+    protocol_version = "HTTP/1.1"
+    bodies = {}
+    stats = {"200": 0, "304": 0, "connections": set()}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        body = self.bodies.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        with self.lock:
+            self.stats["connections"].add(self.client_address)
+            status = "304" if self.headers.get("If-None-Match") == etag else "200"
+            self.stats[status] += 1
+        if status == "304":
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def reset_stats():
+    FeedStub.stats.update({"200": 0, "304": 0, "connections": set()})
+
+def run_all(cache, base, tickers=10):
+    """Fetches every feed once per ticker, like collect_articles does."""
+    t0 = time.perf_counter()
+    results = [cache.fetch(base + path) for _ in range(tickers) for path in FEEDS]
+    return results, time.perf_counter() - t0
+
+if __name__ == "__main__":
+    FeedStub.bodies = {path: make_feed(path) for path in FEEDS}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    checks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "feed_cache.json")
+
+        # Baseline: bare requests.get, full download and parse every time
+        reset_stats()
+        t0 = time.perf_counter()
+        for _ in range(10):
+            for feed in FEEDS:
+                parse_feed(requests.get(base + feed, timeout=5).content)
+        bare_time = time.perf_counter() - t0
+        bare_connections = len(FeedStub.stats["connections"])
+
+        reset_stats()
+        cache = FeedCache(path=path)
+        first, first_time = run_all(cache, base)
+        checks["first run downloads each feed once"] = FeedStub.stats["200"] == len(FEEDS)
+        checks["pooled session reuses connections"] = len(FeedStub.stats["connections"]) < bare_connections
+        cache.save()
+
+        # New process within the TTL: served from disk without a request
+        reset_stats()
+        fresh, fresh_time = run_all(FeedCache(path=path), base)
+        checks["fresh feeds served without a request"] = (FeedStub.stats["200"] + FeedStub.stats["304"] == 0
+                                                         and fresh == first)
+
+        # Past the TTL every feed is revalidated with its validators
+        reset_stats()
+        cache = FeedCache(path=path, ttl_minutes=0)
+        second, second_time = run_all(cache, base)
+        checks["unchanged feeds come back as 304"] = FeedStub.stats["200"] == 0 and FeedStub.stats["304"] == 70
+        checks["cached entries identical"] = first == second
+
+        # One feed changes upstream
+        FeedStub.bodies[FEEDS[0]] = make_feed(FEEDS[0], version=1)
+        reset_stats()
+        changed = cache.fetch(base + FEEDS[0])
+        checks["changed feed is downloaded"] = FeedStub.stats["200"] == 1 and "v1" in changed[1][0]["title"]
+
+        # Validators outlive the TTL on disk; only FEED_KEEP_DAYS drops them
+        cache.save()
+        reset_stats()
+        reloaded = FeedCache(path=path, ttl_minutes=0)
+        reloaded.fetch(base + FEEDS[1])
+        checks["expired entries kept and revalidated"] = (len(reloaded._feeds) == len(FEEDS)
+                                                         and FeedStub.stats["304"] == 1
+                                                         and FeedStub.stats["200"] == 0)
+        reloaded.keep = 0
+        reloaded._dirty = True
+        reloaded.save()
+        checks["feeds past the retention dropped"] = not FeedCache(path=path)._feeds
+
+        missing = cache.fetch(base + "/missing.xml")
+        checks["failed feed returns None"] = missing is None
+
+    server.shutdown()
+
+    print("--- Feed Cache Report ---")
+    print(f"bare requests.get:  {bare_time:.3f}s, {bare_connections} connections for 70 fetches")
+    print(f"cold cache:         {first_time:.3f}s")
+    print(f"fresh cache:        {fresh_time:.3f}s")
+    print(f"warm cache (304):   {second_time:.3f}s")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: feed cache checks passed.")
+    else:
+        print("FAIL: see checks above.")
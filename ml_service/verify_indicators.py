@@ -0,0 +1,128 @@
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicators import compute_indicators, compute_indicators_panel
+from indicator_state import IndicatorState
+
+# Max allowed difference after rounding (one unit in the last rounded digit)
+TOLERANCE = {"Volatility": 1e-4}
+DEFAULT_TOLERANCE = 1e-2
+
+def make_panel(n_tickers, n_days=252, seed=7):
+    """Random-walk OHLCV histories; every 5th ticker has a short history."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-01-30", periods=n_days)
+    panel = {}
+
+    for i in range(n_tickers):
+        length = n_days if i % 5 else int(rng.integers(30, n_days))
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+        spread = close * rng.uniform(0.005, 0.03, length)
+        panel[f"T{i:04d}"] = pd.DataFrame({
+            "Open": close + rng.normal(0, 0.5, length) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 5_000_000, length).astype(float) * rng.choice([1, 3], length, p=[0.9, 0.1]),
+        }, index=dates[-length:])
+
+    return panel
+
+def check_parity(panel):
+    """Compares the panel engine against the per-series `ta` implementation."""
+    expected = {t: compute_indicators(df.copy()) for t, df in panel.items()}
+    actual = compute_indicators_panel(panel)
+
+    mismatches = []
+    for ticker, exp in expected.items():
+        got = actual.get(ticker, {})
+        for key, exp_val in exp.items():
+            got_val = got.get(key)
+            if isinstance(exp_val, bool):
+                ok = exp_val == got_val
+            else:
+                ok = got_val is not None and abs(exp_val - got_val) <= TOLERANCE.get(key, DEFAULT_TOLERANCE) + 1e-9
+            if not ok:
+                mismatches.append((ticker, key, exp_val, got_val))
+
+    return mismatches
+
+def check_streaming(panel, warmup=120):
+    """
+    Builds state from the first `warmup` bars, then appends the rest one at
+    a time (each bar first as an intraday tick) and compares every step
+    against a full recompute.
+    """
+    mismatches = []
+    for ticker, df in panel.items():
+        state = IndicatorState.from_history(df.iloc[:warmup])
+        for i in range(warmup, len(df)):
+            bar = df.iloc[i]
+            state.update_tick(bar)
+            expected = compute_indicators(df.iloc[:i + 1].copy())
+            ticked = state.values()
+            state.append(bar, df.index[i].strftime("%Y-%m-%d"))
+            for label, got in (("tick", ticked), ("bar", state.values())):
+                for key, exp_val in expected.items():
+                    if isinstance(exp_val, bool):
+                        ok = exp_val == got[key]
+                    else:
+                        ok = abs(exp_val - got[key]) <= TOLERANCE.get(key, DEFAULT_TOLERANCE) + 1e-9
+                    if not ok:
+                        mismatches.append((ticker, f"{key}@{i} ({label})", exp_val, got[key]))
+    return mismatches
+
+def benchmark(sizes=(10, 100, 500)):
+    """Times the `ta` loop against the panel engine for growing universes."""
+    print("\n--- Benchmark ---")
+    print(f"{'tickers':>8} {'ta loop (s)':>12} {'panel (s)':>10} {'speedup':>8}")
+    for n in sizes:
+        panel = make_panel(n)
+
+        t0 = time.perf_counter()
+        for df in panel.values():
+            compute_indicators(df.copy())
+        loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        compute_indicators_panel(panel)
+        panel_time = time.perf_counter() - t0
+
+        print(f"{n:>8} {loop_time:>12.3f} {panel_time:>10.3f} {loop_time / panel_time:>7.1f}x")
+
+if __name__ == "__main__":
+    panel = make_panel(50)
+    mismatches = check_parity(panel)
+
+    print("--- Parity Report ---")
+    print(f"Tickers checked: {len(panel)}")
+    for ticker, key, exp_val, got_val in mismatches[:20]:
+        print(f"MISMATCH {ticker} {key}: ta={exp_val} panel={got_val}")
+
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} mismatching values.")
+    else:
+        print("Success: panel engine matches ta for every indicator.")
+
+    # Streaming state is checked bar by bar, so keep the universe small
+    stream_panel = dict(list(make_panel(5, n_days=260).items())[1:])
+    mismatches = check_streaming(stream_panel)
+
+    print("\n--- Streaming State Report ---")
+    for ticker, key, exp_val, got_val in mismatches[:20]:
+        print(f"MISMATCH {ticker} {key}: ta={exp_val} state={got_val}")
+
+    if mismatches:
+        print(f"FAIL: {len(mismatches)} mismatching values.")
+    else:
+        print("Success: incremental state matches a full recompute on every bar.")
+
+    if "--bench" in sys.argv:
+        benchmark()
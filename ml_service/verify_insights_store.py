@@ -0,0 +1,139 @@
+import sys
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+from insights_store import InsightsStore, shard_name
+
+SAMPLE = os.path.join(HERE, "insights_cache.json")
+UNIVERSE = 500
+
+NODE_BENCH = r"""
+const fs = require("fs"), path = require("path");
+const [root, legacy, ticker, rounds] = process.argv.slice(1);
+function time(fn) { const t0 = process.hrtime.bigint(); for (let i = 0; i < rounds; i++) fn(); return Number(process.hrtime.bigint() - t0) / 1e6 / rounds; }
+const shardName = ticker.toUpperCase().replace(/[^A-Z0-9._-]/g, "_") + ".json";
+const legacyMs = time(() => JSON.parse(fs.readFileSync(legacy, "utf-8"))[ticker]);
+const shardMs = time(() => JSON.parse(fs.readFileSync(path.join(root, shardName), "utf-8")));
+const names = ["BRK-B", "^GSPC", "rds.a", "../etc", "TSLA"].map(t => t.toUpperCase().replace(/[^A-Z0-9._-]/g, "_") + ".json");
+console.log(JSON.stringify({legacyMs, shardMs, names}));
+"""
+
+def universe():
+    """UNIVERSE tickers shaped like the real output."""
+    with open(SAMPLE, "r") as f:
+        sample = json.load(f)
+    results = list(sample.values())
+    return {f"T{i:03d}": dict(results[i % len(results)]) for i in range(UNIVERSE)}
+
+def time_it(fn, rounds=50):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) / rounds
+
+if __name__ == "__main__":
+    checks = {}
+    insights = universe()
+    tmp = tempfile.mkdtemp()
+    try:
+        root = os.path.join(tmp, "insights")
+        legacy = os.path.join(tmp, "insights_cache.json")
+        # The old output: one indented file with every ticker
+        with open(legacy, "w") as f:
+            json.dump(dict(insights, OLD=insights["T001"]), f, indent=4, default=str)
+
+        store = InsightsStore(root=root, legacy_path=legacy)
+        checks["legacy fallback before first write"] = store.read("T007") == insights["T007"]
+
+        t0 = time.perf_counter()
+        store.write(insights, run={"stages": ["all"]})
+        write_time = time.perf_counter() - t0
+        manifest = store.read_manifest()
+        checks["one shard per ticker + manifest"] = (len(os.listdir(root)) == UNIVERSE + 1
+                                                   and len(manifest["tickers"]) == UNIVERSE)
+        checks["shards round-trip"] = all(store.read(t) == r for t, r in insights.items())
+
+        # Rewriting a subset leaves the others alone and bumps revisions
+        before = os.path.getmtime(store.shard_path("T001"))
+        store.write({"T000": dict(insights["T000"], news_count=99)})
+        manifest = store.read_manifest()
+        checks["partial write: revision bumped"] = (manifest["tickers"]["T000"]["revision"] == 2
+                                                    and manifest["tickers"]["T001"]["revision"] == 1)
+        checks["partial write: other shards untouched"] = os.path.getmtime(store.shard_path("T001")) == before
+        checks["legacy-only tickers still readable"] = ("OLD" in store.tickers()
+                                                        and store.read("OLD") == insights["T001"])
+
+        # A news-only run keeps the other stages' fields from the shard
+        from generate_insights import merge_partial, empty_result
+        partial = dict(empty_result(), news_count=7)
+        merged = merge_partial({"T003": partial}, ["news"], store)["T003"]
+        checks["partial run keeps other stages"] = (merged["news_count"] == 7
+                                                    and merged["fundamentals"] == insights["T003"]["fundamentals"])
+
+        # Readers never see a half-written shard
+        big = dict(insights["T002"], news_summary="x" * 200_000)
+        small = dict(insights["T002"], news_summary="short")
+        done = threading.Event()
+        errors = []
+
+        def writer():
+            for i in range(200):
+                store.write({"T002": big if i % 2 else small})
+            done.set()
+
+        def reader():
+            while not done.is_set():
+                try:
+                    with open(store.shard_path("T002")) as f:
+                        json.load(f)
+                except ValueError as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=writer), threading.Thread(target=reader), threading.Thread(target=reader)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        checks["concurrent readers never see partial files"] = not errors
+        checks["no temp files left behind"] = not [n for n in os.listdir(root) if n.startswith(".tmp-")]
+
+        # One-ticker read: parse everything vs. one shard
+        def legacy_read():
+            with open(legacy, "r") as f:
+                return json.load(f)["T250"]
+        legacy_time = time_it(legacy_read)
+        shard_time = time_it(lambda: InsightsStore(root=root, legacy_path=None).read("T250"))
+        legacy_bytes = os.path.getsize(legacy)
+        shard_bytes = os.path.getsize(store.shard_path("T250"))
+
+        node = None
+        if shutil.which("node"):
+            out = subprocess.run(["node", "-e", NODE_BENCH, root, legacy, "T250", "50"],
+                                 capture_output=True, text=True, check=True).stdout
+            node = json.loads(out)
+            expected = [shard_name(t) for t in ["BRK-B", "^GSPC", "rds.a", "../etc", "TSLA"]]
+            checks["Node and Python agree on shard names"] = node["names"] == expected
+    finally:
+        shutil.rmtree(tmp)
+
+    print("--- Insights Store Report ---")
+    print(f"{UNIVERSE} tickers written in {write_time * 1000:.0f}ms")
+    print(f"one ticker, python: whole file ({legacy_bytes / 1e6:.1f}MB) {legacy_time * 1000:.2f}ms, "
+          f"shard ({shard_bytes / 1024:.1f}KB) {shard_time * 1000:.3f}ms")
+    if node:
+        print(f"one ticker, node:   whole file {node['legacyMs']:.2f}ms, shard {node['shardMs']:.3f}ms")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: insights store checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,114 @@
+import sys
+import os
+import csv
+import time
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+import news_categorize as nc
+import news_ingest as ni
+from news_categorize import CATEGORIES, categorize_news
+from keyword_matcher import KeywordMatcher
+
+CORPUS = os.path.join(HERE, "multi_company_news.csv")
+
+# --- Reference: the per-keyword `in` loops the matcher replaces ---
+
+def legacy_is_ownership_spam(text):
+    text_lower = text.lower()
+    return any(pattern in text_lower for pattern in nc.OWNERSHIP_SPAM_PATTERNS)
+
+def legacy_classify_article(text):
+    text_lower = text.lower()
+    scores = {}
+    for category, keywords in nc.CATEGORY_RULES.items():
+        score = sum(1 for kw in keywords if kw in text_lower)
+        if score > 0:
+            scores[category] = score
+    if not scores:
+        return "general"
+    return max(scores, key=scores.get)
+
+def legacy_has_noise(text):
+    text_lower = text.lower()
+    return sum(1 for kw in nc.NOISE_KEYWORDS if kw in text_lower) >= 2
+
+def legacy_impact_count(text):
+    return sum(1 for k in nc.HIGH_IMPACT_KEYWORDS if k in text)
+
+def legacy_categorize(text_lower):
+    for category, keywords in CATEGORIES.items():
+        for keyword in keywords:
+            if keyword in text_lower:
+                return category
+    return "General"
+
+def legacy_all(text):
+    return (legacy_is_ownership_spam(text), legacy_classify_article(text), legacy_has_noise(text),
+            legacy_has_noise(text), legacy_impact_count(text), legacy_categorize(text))
+
+def matcher_all(text):
+    article = {"title": text, "summary": ""}
+    grouped = categorize_news([article])
+    return (ni.is_ownership_spam(text), ni.classify_article(text), ni.has_noise(text),
+            ni.has_noise(text), ni.NEWS_MATCHER.scan(text).count("high_impact"), article["category"])
+
+def load_texts():
+    with open(CORPUS, newline="", encoding="utf-8") as f:
+        return [(row["title"] + " " + row["summary"]).lower() for row in csv.DictReader(f)]
+
+if __name__ == "__main__":
+    texts = load_texts()
+
+    mismatches = [t for t in texts if legacy_all(t) != matcher_all(t)]
+
+    # Overlapping and nested keywords must all be reported
+    tricky = KeywordMatcher({"a": ["tech", "technology", "ai"], "b": ["chn", "olog", "gy"]})
+    tricky_hits = tricky.scan("technology and ai")
+    overlap_ok = tricky_hits.found == {"tech", "technology", "ai", "chn", "olog", "gy"}
+
+    print("--- Parity Report ---")
+    print(f"Articles checked: {len(texts)}")
+    for text in mismatches[:10]:
+        print(f"MISMATCH: {text[:80]}\n  legacy={legacy_all(text)}\n  matcher={matcher_all(text)}")
+    if mismatches or not overlap_ok:
+        print(f"FAIL: {len(mismatches)} articles differ, overlap check {'ok' if overlap_ok else 'failed'}.")
+    else:
+        print("Success: matcher output identical to the keyword loops.")
+
+    print("\n--- Benchmark (all classifiers, every article) ---")
+    t0 = time.perf_counter()
+    for text in texts:
+        legacy_all(text)
+    legacy_time = time.perf_counter() - t0
+
+    # Fresh matcher so scans are not already cached (shared like the module-level one)
+    ni.NEWS_MATCHER = nc.NEWS_MATCHER = KeywordMatcher(nc.NEWS_MATCHER.tables)
+    t0 = time.perf_counter()
+    for text in texts:
+        ni.is_ownership_spam(text), ni.classify_article(text), ni.has_noise(text)
+        ni.has_noise(text), ni.NEWS_MATCHER.scan(text).count("high_impact")
+    # The pipeline categorizes a ticker's articles in one call
+    categorize_news([{"title": text, "summary": ""} for text in texts])
+    matcher_time = time.perf_counter() - t0
+
+    print(f"keyword loops: {legacy_time:.3f}s")
+    print(f"matcher:       {matcher_time:.3f}s ({legacy_time / matcher_time:.1f}x)")
+
+    # Loop cost grows with the keyword count, the single scan barely does
+    print("\n--- Scaling (synthetic keyword tables) ---")
+    base = [kw for kws in ni.NEWS_MATCHER.tables.values() for kw in kws]
+    for factor in (1, 4, 16):
+        keywords = [f"{kw}{'' if i == 0 else f' x{i}'}" for i in range(factor) for kw in base]
+        matcher = KeywordMatcher({"all": keywords})
+        t0 = time.perf_counter()
+        loop_counts = [sum(1 for kw in keywords if kw in text) for text in texts]
+        loop_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        scan_counts = [matcher.scan(text).count("all") for text in texts]
+        scan_time = time.perf_counter() - t0
+        same = "ok" if loop_counts == scan_counts else "MISMATCH"
+        print(f"{len(keywords):>6} keywords: loops {loop_time:.3f}s, scan {scan_time:.3f}s "
+              f"({loop_time / scan_time:.1f}x, {same})")
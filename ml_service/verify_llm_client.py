@@ -0,0 +1,145 @@
+import sys
+import os
+import asyncio
+import math
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm_server import FakeLLMServer, BAD_REQUEST_MARKER
+from llm_client import AsyncLLMClient, LLMError, retry_after_seconds, RATE_PER_SECOND, BURST
+from news_summarize import NewsSummarizer
+from summary_cache import SummaryCache
+
+TICKERS = [f"T{i:02d}" for i in range(25)]
+LATENCY = 0.5
+
+def universe():
+    return {t: {"earnings": [{"title": f"{t} headline {i}"} for i in range(3)]} for t in TICKERS}
+
+def payload(text="hello"):
+    return {"model": "fake", "messages": [{"role": "user", "content": text}]}
+
+def run(client, payloads):
+    async def go():
+        async with client:
+            return await client.complete_many(payloads)
+    return asyncio.run(go())
+
+def summarizer_for(server, **kwargs):
+    os.environ["LLM_API_URL"] = server.url
+    return NewsSummarizer(cache=SummaryCache(path=None), **kwargs)
+
+def sequential_baseline(url, n):
+    """What _call_hf did: one blocking requests.post per ticker."""
+    for i in range(n):
+        r = requests.post(url, json=payload(f"ticker {i}"), timeout=60)
+        r.raise_for_status()
+
+if __name__ == "__main__":
+    checks = {}
+
+    # --- Whole universe: concurrent vs one blocking call per ticker ---
+    with FakeLLMServer(latency=LATENCY) as server:
+        t0 = time.perf_counter()
+        sequential_baseline(server.url, len(TICKERS))
+        sequential_time = time.perf_counter() - t0
+
+    with FakeLLMServer(latency=LATENCY) as server:
+        s = summarizer_for(server, max_in_flight=8)
+        t0 = time.perf_counter()
+        notes = s.summarize_batch(universe())
+        batch_time = time.perf_counter() - t0
+        checks["every ticker summarized"] = (len(notes) == len(TICKERS)
+                                             and all(n.startswith("### Key News") for n in notes.values()))
+        checks["in-flight requests capped"] = server.max_in_flight <= 8
+        checks["connections pooled"] = len(server.connections) <= 8
+        # Lower bound from the in-flight cap (waves of 8) and the token bucket
+        floor = max(math.ceil(len(TICKERS) / 8) * LATENCY, (len(TICKERS) - BURST) / RATE_PER_SECOND + LATENCY)
+        checks["batch close to the in-flight / rate-limit floor"] = batch_time < floor * 1.25
+        t0 = time.perf_counter()
+        s.summarize_batch(universe())
+        cached_time = time.perf_counter() - t0
+        checks["second batch fully cached"] = server.requests == len(TICKERS)
+
+    # --- 429 with Retry-After: everyone backs off, nothing is lost ---
+    with FakeLLMServer(latency=0.2, max_concurrent=3, retry_after=1) as server:
+        client = AsyncLLMClient(server.url, max_in_flight=8, backoff_base=0.05)
+        results = run(client, [payload(f"p{i}") for i in range(12)])
+        checks["429: all requests succeed"] = not any(isinstance(r, Exception) for r in results)
+        checks["429: rate limits seen and retried"] = client.rate_limited > 0 and server.statuses[200] == 12
+        early = 0
+        for t in server.rate_limited_at[:1]:
+            early += sum(1 for r in server.request_times if t + 0.1 < r < t + server.retry_after - 0.1)
+        checks["429: no new requests during Retry-After"] = early == 0
+        limited_report = (client.requests, client.retries, client.rate_limited)
+
+    # --- Transient 503s are retried with backoff ---
+    with FakeLLMServer(latency=0.0, fail_first=3) as server:
+        client = AsyncLLMClient(server.url, backoff_base=0.05)
+        results = run(client, [payload()])
+        checks["503: retried until success"] = not isinstance(results[0], Exception) and client.retries == 3
+
+    with FakeLLMServer(latency=0.0, fail_first=100) as server:
+        client = AsyncLLMClient(server.url, max_retries=2, backoff_base=0.01)
+        results = run(client, [payload()])
+        checks["503: gives up after max_retries"] = isinstance(results[0], LLMError) and server.requests == 3
+
+    # --- Non-retryable errors fail fast and are not cached ---
+    with FakeLLMServer(latency=0.0) as server:
+        s = summarizer_for(server)
+        bad = {"BAD": {"earnings": [{"title": BAD_REQUEST_MARKER}]}}
+        note = s.summarize_batch(bad)["BAD"]
+        s.summarize_batch(bad)
+        checks["400: error text, one request per batch, not cached"] = (
+            note.startswith("Error generating summary: HTTP 400") and server.requests == 2)
+
+    # --- Token bucket spaces request starts ---
+    with FakeLLMServer(latency=0.0) as server:
+        client = AsyncLLMClient(server.url, rate=5, burst=1)
+        t0 = time.perf_counter()
+        run(client, [payload() for _ in range(10)])
+        paced_time = time.perf_counter() - t0
+        checks["token bucket: 10 requests at 5/s take ~2s"] = paced_time >= 1.7
+
+    # --- One client shared by worker threads (per-ticker summaries) keeps one rate limit ---
+    with FakeLLMServer(latency=0.0) as server:
+        client = AsyncLLMClient(server.url, rate=5, burst=1)
+        threads = [threading.Thread(target=run, args=(client, [payload() for _ in range(5)])) for _ in range(2)]
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        shared_time = time.perf_counter() - t0
+        checks["token bucket shared across threads"] = shared_time >= 1.7 and server.statuses[200] == 10
+
+        s = summarizer_for(server)
+        workers = [threading.Thread(target=s.generate_summary, args=(grouped, ticker))
+                   for ticker, grouped in list(universe().items())[:4]]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        checks["per-ticker summaries reuse the summarizer's client"] = s.client.requests == 4
+
+    checks["Retry-After http-date parsed"] = 1 < retry_after_seconds(formatdate(time.time() + 5, usegmt=True)) <= 5
+    checks["Retry-After seconds parsed"] = retry_after_seconds("3") == 3.0 and retry_after_seconds("soon") is None
+
+    print("--- LLM Client Report ---")
+    print(f"{len(TICKERS)} summaries, {LATENCY}s per call: sequential {sequential_time:.1f}s, "
+          f"async batch {batch_time:.1f}s (floor {floor:.1f}s), cached rerun {cached_time * 1000:.0f}ms")
+    print("429 run: %d requests, %d retries, %d rate limited" % limited_report)
+    print(f"token bucket (5/s, burst 1), 10 requests: {paced_time:.2f}s, "
+          f"{shared_time:.2f}s from two threads on one client")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: LLM client checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,111 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metadata_service import MetadataService, FIELD_TTL_HOURS
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMD", "F"]
+
+class FakeInfo:
+    """Stands in for yf.Ticker(t).info: counts calls, optional delay or failure."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = {}
+        self.fail = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, ticker):
+        with self.lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        time.sleep(self.delay)
+        if ticker in self.fail:
+            raise RuntimeError("network down")
+        info = {field: None for field in FIELD_TTL_HOURS}
+        info.update({"shortName": f"{ticker} Inc.", "marketCap": 1e12, "beta": 1.2, "trailingPE": 30.0})
+        return info
+
+def age(service, ticker, field, hours):
+    """Pretends `field` was fetched `hours` ago."""
+    service._data[ticker][field][1] = time.time() - hours * 3600
+
+def fundamentals_and_names(service, ticker):
+    service.get(ticker, ["marketCap", "trailingPE", "trailingEps", "revenueGrowth", "beta"])
+    service.get(ticker, ["shortName", "longName"])
+
+if __name__ == "__main__":
+    checks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metadata.json")
+
+        # One .info request per ticker for fundamentals + company lookup
+        fake = FakeInfo(delay=0.2)
+        service = MetadataService(path=path, fetch=fake)
+        t0 = time.perf_counter()
+        service.prefetch(TICKERS)
+        prefetch_time = time.perf_counter() - t0
+        for ticker in TICKERS:
+            fundamentals_and_names(service, ticker)
+        checks["one .info call per ticker"] = all(fake.calls[t] == 1 for t in TICKERS)
+        checks["prefetch runs concurrently"] = prefetch_time < 0.2 * len(TICKERS) / 2
+        service.save()
+
+        # Next run: everything from disk, no network
+        fake = FakeInfo()
+        service = MetadataService(path=path, fetch=fake)
+        t0 = time.perf_counter()
+        for ticker in TICKERS:
+            fundamentals_and_names(service, ticker)
+        warm_time = time.perf_counter() - t0
+        checks["warm run makes no requests"] = not fake.calls
+
+        # Per-field TTL: names still fresh after 2 days, beta is not
+        for field in FIELD_TTL_HOURS:
+            age(service, "AAPL", field, 48)
+        checks["names fresh after 2 days"] = service._status("AAPL", ["shortName", "longName"], time.time()) == "fresh"
+        checks["beta stale after 2 days"] = service._status("AAPL", ["beta"], time.time()) == "stale"
+
+        # Stale values are served at once while a slow refresh runs
+        fake.delay = 1.0
+        t0 = time.perf_counter()
+        value = service.get("AAPL", ["beta"])
+        stale_latency = time.perf_counter() - t0
+        checks["stale read does not block"] = value == {"beta": 1.2} and stale_latency < 0.1
+        service.prefetch(["AAPL"], timeout=0.05)
+        checks["staleness reported"] = service.staleness("AAPL") > 0
+
+        # The refresh still in flight is waited for before saving
+        checks["bounded drain reports running refreshes"] = service.close(timeout=0.05) == 1
+        checks["close drains pending refreshes"] = service.close() == 0 and service._executor is None
+        service.save()
+        reloaded = MetadataService(path=path, fetch=FakeInfo())
+        checks["drained refresh saved"] = reloaded._status("AAPL", ["beta"], time.time()) == "fresh"
+
+        # Too old to serve: fetched synchronously; failure falls back to old values
+        fake.delay = 0.0
+        for field in FIELD_TTL_HOURS:
+            age(service, "MSFT", field, 24 * 60)
+        fake.fail.add("MSFT")
+        checks["failed refresh serves old values"] = service.get("MSFT", ["shortName"]) == {"shortName": "MSFT Inc."}
+        fake.fail.add("ZZZZ")
+        try:
+            service.get("ZZZZ", ["shortName"])
+            checks["unknown ticker with failed fetch raises"] = False
+        except RuntimeError:
+            checks["unknown ticker with failed fetch raises"] = True
+
+    print("--- Metadata Service Report ---")
+    print(f"cold prefetch of {len(TICKERS)} tickers (0.2s each): {prefetch_time:.2f}s")
+    print(f"warm run, fundamentals + names: {warm_time * 1000:.1f}ms")
+    print(f"stale read latency with 1s refresh in flight: {stale_latency * 1000:.1f}ms")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: metadata service checks passed.")
+    else:
+        print("FAIL: see checks above.")
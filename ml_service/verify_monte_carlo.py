@@ -0,0 +1,120 @@
+import sys
+import os
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from indicators import build_price_arrays, indicator_arrays, latest_indicators
+from monte_carlo import level_probabilities, N_PATHS, HORIZON_DAYS
+from strategy import generate_detailed_strategy, strategy_probabilities
+from verify_indicators import make_panel
+
+UNIVERSE = 500
+CHECK_PATHS = 40_000
+TOLERANCE = 0.01
+
+
+def normal_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def first_passage(level, sigma, mu, horizon):
+    """P(max of a Brownian motion with drift mu and vol sigma reaches level > 0 within horizon)."""
+    s = sigma * math.sqrt(horizon)
+    return (normal_cdf((-level + mu * horizon) / s)
+            + math.exp(2 * mu * level / sigma ** 2) * normal_cdf((-level - mu * horizon) / s))
+
+
+def universe_technicals(n, seed):
+    """compute_indicators()-style dicts for the last bar of a random-walk panel."""
+    tickers, arrays, start = build_price_arrays(make_panel(n, n_days=300, seed=seed))
+    indicators = indicator_arrays(arrays, start)
+    return {t: latest_indicators(arrays, indicators, row) for row, t in enumerate(tickers)}
+
+
+if __name__ == "__main__":
+    checks = {}
+
+    # --- Single level: matches the closed-form first-passage probability ---
+    sigma = np.array([0.01, 0.02, 0.03, 0.02])
+    up = np.array([1.05, 1.08, 1.10, 1.03])
+    drift = np.array([0.0, 0.0, 0.001, -0.002])
+    p_up, _, _ = level_probabilities(1.0, up, 1e-9, sigma, drift=drift, paths=CHECK_PATHS)
+    exact = [first_passage(math.log(u), s, d - s * s / 2, HORIZON_DAYS) for u, s, d in zip(up, sigma, drift)]
+    single_error = np.max(np.abs(p_up - exact))
+    checks["single level matches closed form"] = single_error < TOLERANCE
+
+    # --- Two levels, long horizon, no log drift: P(up first) = distance down / range ---
+    sigma = np.array([0.02, 0.02, 0.015])
+    up = np.array([1.05, 1.10, 1.02])
+    down = np.array([0.95, 0.97, 0.90])
+    p_up, p_down, p_none = level_probabilities(1.0, up, down, sigma, drift=sigma ** 2 / 2, horizon=1500,
+                                               paths=CHECK_PATHS)
+    gambler = -np.log(down) / (np.log(up) - np.log(down))
+    two_error = np.max(np.abs(p_up - gambler))
+    checks["two levels match the gambler's-ruin odds"] = two_error < TOLERANCE and np.all(p_none < 1e-3)
+
+    # --- Reproducibility and independence from batching ---
+    technicals = universe_technicals(UNIVERSE, seed=4)
+    base = strategy_probabilities(technicals)
+    checks["same seed, same probabilities"] = strategy_probabilities(technicals) == base
+    checks["other seed, other probabilities"] = strategy_probabilities(technicals, seed=8) != base
+    checks["memory budget does not change results"] = strategy_probabilities(technicals, chunk_bytes=2 ** 20) == base
+    sample = list(technicals)[::50]
+    checks["ticker alone matches the batch"] = all(
+        generate_detailed_strategy(technicals[t], {"overall_score": 0})["probabilities"] == base[t] for t in sample)
+    checks["batch block used by the strategy"] = all(
+        generate_detailed_strategy(technicals[t], {"overall_score": 0}, probabilities=base[t])["probabilities"]
+        == base[t] for t in sample)
+
+    shares = np.array([[float(base[t][k].rstrip("%")) for k in ("bull_case", "bear_case", "neutral_case")]
+                       for t in base])
+    checks["cases add up to 100%"] = np.all(np.abs(shares.sum(axis=1) - 100) <= 2)
+    longer = strategy_probabilities(technicals, horizon=3 * HORIZON_DAYS)
+    checks["longer horizon, fewer open paths"] = all(
+        float(longer[t]["neutral_case"].rstrip("%")) <= float(base[t]["neutral_case"].rstrip("%")) for t in base)
+
+    # --- No volatility: heuristic split ---
+    blind = dict(technicals[sample[1]], Volatility=0.0, ATR=0.0)
+    checks["no volatility falls back to the heuristic"] = (
+        generate_detailed_strategy(blind, {"overall_score": 0})["probabilities"]["method"] == "heuristic")
+
+    # --- Memory stays within the chunk budget ---
+    budget = 4 * 2 ** 20
+    n = len(base)
+    price = np.full(n, 100.0)
+    tracemalloc.start()
+    level_probabilities(price, price * 1.06, price * 0.96, np.full(n, 0.02), chunk_bytes=budget)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    checks["peak memory within the chunk budget"] = peak < 1.25 * budget
+
+    # --- Speed over the universe ---
+    t0 = time.perf_counter()
+    strategy_probabilities(technicals)
+    batch_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for t in sample:
+        strategy_probabilities({t: technicals[t]})
+    single_time = (time.perf_counter() - t0) / len(sample)
+    checks[f"{UNIVERSE} tickers in seconds"] = batch_time < 10
+
+    print("--- Monte-Carlo Report ---")
+    print(f"closed form: single level max error {single_error:.4f}, two levels max error {two_error:.4f} "
+          f"({CHECK_PATHS} paths)")
+    print(f"{len(base)} tickers x {N_PATHS} paths x {HORIZON_DAYS} days: {batch_time:.2f}s batched, "
+          f"~{single_time * len(base):.1f}s one ticker at a time; peak {peak / 2 ** 20:.1f} MiB "
+          f"with a {budget / 2 ** 20:.0f} MiB budget")
+    mean = shares.mean(axis=0)
+    print(f"mean bull / bear / neutral: {mean[0]:.0f}% / {mean[1]:.0f}% / {mean[2]:.0f}%")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: Monte-Carlo checks passed.")
+    else:
+        print("FAIL: see checks above.")
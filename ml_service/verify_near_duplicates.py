@@ -0,0 +1,151 @@
+import sys
+import os
+import csv
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+from news_ingest import deduplicate_articles
+from near_duplicates import NearDuplicateIndex, article_key, article_shingles, article_timestamp
+
+CORPUS = os.path.join(HERE, "multi_company_news.csv")
+
+def legacy_dedup(articles):
+    """The 50-character title prefix check deduplicate_articles used before."""
+    import re
+    seen, unique = set(), []
+    for article in articles:
+        key = re.sub(r'\W+', '', article['title'].lower())[:50]
+        if key not in seen:
+            seen.add(key)
+            unique.append(article)
+    return unique
+
+def load_by_ticker():
+    by_ticker = defaultdict(list)
+    with open(CORPUS, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            by_ticker[row["ticker"]].append({
+                "title": row["title"], "summary": row["summary"], "link": row["url"],
+                "published": row["published"], "source": row["source"],
+            })
+    return by_ticker
+
+def check_cases():
+    """Hand-written pairs that must (or must not) be treated as copies."""
+    base = {"title": "Nvidia unveils new Blackwell chips at GTC conference - Reuters", "summary": "", "link": "a"}
+    copies = [
+        {"title": "Nvidia unveils new Blackwell chips at GTC conference - MSN", "summary": "", "link": "b"},
+        {"title": "Nvidia unveils new Blackwell chips at GTC conference | Yahoo Finance", "summary": "", "link": "c"},
+        {"title": "Nvidia unveils its new Blackwell chips at annual GTC conference", "summary": "", "link": "d"},
+    ]
+    distinct = [
+        {"title": "Nvidia shares fall as export curbs tighten - CNBC", "summary": "", "link": "e"},
+        {"title": "AMD unveils MI400 accelerators to rival Blackwell - Reuters", "summary": "", "link": "f"},
+    ]
+    kept = deduplicate_articles([base] + copies + distinct)
+    return [a["link"] for a in kept] == ["a", "e", "f"]
+
+def check_persistence(by_ticker):
+    """A second run over the same articles keeps exactly the same copies."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        index = NearDuplicateIndex(window_days=3650)
+        first = {t: deduplicate_articles(a, index, scope=t) for t, a in by_ticker.items()}
+        index.save(path)
+
+        reloaded = NearDuplicateIndex.load(path, window_days=3650)
+        shuffled = {t: random.Random(1).sample(a, len(a)) for t, a in by_ticker.items()}
+        second = {t: deduplicate_articles(a, reloaded, scope=t) for t, a in shuffled.items()}
+
+    return all({article_key(a) for a in first[t]} == {article_key(a) for a in second[t]} for t in first)
+
+def check_later_copies():
+    """Copies published on a later run are dropped, per ticker and with a batch-wide scope."""
+    story = {"title": "Tesla recalls 200,000 vehicles over steering issue - Reuters", "summary": "",
+             "link": "day1", "published": "2024-06-01"}
+    copy = {"title": "Tesla recalls 200,000 vehicles over a steering issue - MSN", "summary": "",
+            "link": "day2", "published": "2024-06-02"}
+    other = {"title": "Ford raises full-year outlook on truck demand", "summary": "", "link": "ford"}
+    index = NearDuplicateIndex(window_days=3650)
+    deduplicate_articles([story], index, scope="TSLA")
+    next_day = deduplicate_articles([copy, other], index, scope="TSLA")
+    other_ticker = deduplicate_articles([copy], index, scope="GM")
+
+    batch_index = NearDuplicateIndex(window_days=3650)
+    deduplicate_articles([story], batch_index)
+    cross = deduplicate_articles([copy, other], batch_index)
+    return (next_day == [other] and other_ticker == [copy] and cross == [other])
+
+def check_window():
+    index = NearDuplicateIndex(window_days=30)
+    now = time.time()
+    shingles = article_shingles({"title": "Tesla recalls vehicles over steering issue"})
+    index.add("old", shingles, now - 40 * 86400, "TSLA")
+    index.add("new", shingles, now - 5 * 86400, "TSLA")
+    removed = index.prune(now)
+    return removed == 1 and len(index) == 1 and index.find(shingles, "TSLA") == "new"
+
+def bench_inserts(sizes=(1000, 10000, 40000)):
+    """Per-article find+add cost as the index grows (synthetic headlines)."""
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(20000)]
+    print("\n--- Insert scaling (synthetic headlines) ---")
+    for size in sizes:
+        index = NearDuplicateIndex()
+        articles = [{"title": " ".join(rng.choice(vocab) for _ in range(10))} for _ in range(size)]
+        t0 = time.perf_counter()
+        for i, article in enumerate(articles):
+            shingles = article_shingles(article)
+            if index.find(shingles, "X") is None:
+                index.add(i, shingles, 0, "X")
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>6} articles: {elapsed:.2f}s total, {elapsed / size * 1e6:.0f}us per article")
+
+if __name__ == "__main__":
+    by_ticker = load_by_ticker()
+    total = sum(len(a) for a in by_ticker.values())
+    legacy_kept = sum(len(legacy_dedup(a)) for a in by_ticker.values())
+
+    t0 = time.perf_counter()
+    index = NearDuplicateIndex(window_days=3650)
+    kept = {t: deduplicate_articles(a, index, scope=t) for t, a in by_ticker.items()}
+    elapsed = time.perf_counter() - t0
+    new_kept = sum(len(a) for a in kept.values())
+
+    # Stories that survive for several tickers (scored once by fetch_news_batch)
+    batch_index = NearDuplicateIndex()
+    cross = 0
+    for articles in kept.values():
+        for a in articles:
+            shingles = article_shingles(a)
+            if batch_index.find(shingles) is None:
+                batch_index.add(article_key(a), shingles, article_timestamp(a))
+            else:
+                cross += 1
+
+    print("--- Dedup Report ---")
+    print(f"Articles: {total} across {len(by_ticker)} tickers")
+    print(f"Kept by title prefix check: {legacy_kept}")
+    print(f"Kept with near-duplicate index: {new_kept} ({legacy_kept - new_kept} more copies dropped, {elapsed:.2f}s)")
+    print(f"Cross-ticker copies sharing one score: {cross}")
+
+    results = {
+        "syndication/reword cases": check_cases(),
+        "stable copies across runs": check_persistence(by_ticker),
+        "later copies dropped (same ticker, batch-wide)": check_later_copies(),
+        "30-day window pruning": check_window(),
+    }
+    for name, ok in results.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(results.values()):
+        print("Success: near-duplicate checks passed.")
+    else:
+        print("FAIL: see checks above.")
+
+    bench_inserts()
@@ -0,0 +1,129 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+import news_ingest as ni
+from news_store import NewsStore, article_key, article_rows, csv_rows, import_file
+
+CSV_FILES = ["multi_company_news.csv", "news_output.csv", "scraped_news_output.csv"]
+RANKED_FILE = "companies_ranked_news.json"
+QUERY_DAYS = 30
+
+
+def expected_rows(paths):
+    """{(ticker, day, key): row} the store should hold after importing the CSVs."""
+    rows = {}
+    for path in paths:
+        for row in csv_rows(path):
+            key = article_key(row["url"], row["title"] or row["summary"])
+            day = row["date"]
+            rows.setdefault((row["ticker"].upper(), day, key), row)
+    return rows
+
+
+def full_parse_query(ticker, start, end):
+    """The old way: parse every CSV to answer one ticker / date-range query."""
+    found = set()
+    for path in CSV_FILES:
+        for row in csv_rows(os.path.join(HERE, path)):
+            if row["ticker"] == ticker and start <= row["date"] <= end:
+                found.add(article_key(row["url"], row["title"] or row["summary"]))
+    return found
+
+
+if __name__ == "__main__":
+    checks = {}
+    tmp = tempfile.mkdtemp()
+    try:
+        store = NewsStore(os.path.join(tmp, "news_store"))
+        ranked_store = NewsStore(os.path.join(tmp, "ranked_store"))
+
+        # --- Import the CSV corpus and the ranked JSON ---
+        t0 = time.perf_counter()
+        added = sum(import_file(store, os.path.join(HERE, path)) for path in CSV_FILES)
+        ranked_added = import_file(ranked_store, os.path.join(HERE, RANKED_FILE))
+        import_time = time.perf_counter() - t0
+        expected = expected_rows([os.path.join(HERE, path) for path in CSV_FILES])
+        checks["every distinct article imported once"] = added == len(expected)
+        checks["re-import adds nothing"] = sum(import_file(store, os.path.join(HERE, p)) for p in CSV_FILES) == 0
+
+        stored = store.read(columns=["ticker", "date", "key", "source", "category"])
+        checks["source and category dictionary-encoded"] = all(
+            str(stored.schema.field(name).type).startswith("dictionary") for name in ("source", "category"))
+
+        # --- Ticker / date-range query touches only its partitions ---
+        ticker = max(store.tickers(), key=lambda t: len(store.partitions([t])))
+        last = max(day for _, day, _ in store.partitions([ticker]))
+        start = last - timedelta(days=QUERY_DAYS - 1)
+        wanted = store.partitions([ticker], start, last)
+        store.files_read = 0
+        t0 = time.perf_counter()
+        window = store.last_days(ticker, QUERY_DAYS, today=last, columns=["key", "title", "date"])
+        query_time = time.perf_counter() - t0
+        files_needed = sum(len(os.listdir(d)) for _, _, d in wanted)
+        checks["query opens only the partitions it needs"] = store.files_read == files_needed
+        t0 = time.perf_counter()
+        reference = full_parse_query(ticker, start, last)
+        parse_time = time.perf_counter() - t0
+        checks["query matches a full CSV parse"] = set(window.column("key").to_pylist()) == reference
+
+        # --- Ranked-news layout round-trips ---
+        with open(os.path.join(HERE, RANKED_FILE), "r", encoding="utf-8") as f:
+            original = json.load(f)
+        # Articles under an empty date key are filed under the day the file was written
+        written = date.fromtimestamp(os.path.getmtime(os.path.join(HERE, RANKED_FILE))).isoformat()
+        distinct = {(t, d or written, c, a.get("source"), a.get("summary")) for t, data in original.items()
+                    for d, cats in next(iter(data.values())).items() for c, articles in cats.items() for a in articles}
+        days = [date.fromisoformat(d) for _, d, *_ in distinct]
+        rebuilt = ranked_store.ranked_news(list(original), days=(max(days) - min(days)).days + 1, today=max(days))
+        rebuilt_count = sum(len(a) for data in rebuilt.values() for cats in next(iter(data.values())).values()
+                            for a in cats.values())
+        checks["ranked news rebuilt from the store"] = (ranked_added == rebuilt_count == len(distinct)
+                                                        and set(rebuilt) == set(original))
+
+        # --- Appends add part files; compaction merges them without changing reads ---
+        before = store.read([ticker]).sort_by("key").to_pylist()
+        extra = [{"ticker": ticker, "date": last, "title": "Extra headline", "url": "http://example.com/extra",
+                  "source": "Mock", "summary": "", "published": last.isoformat()}]
+        checks["append writes a new part"] = store.append(extra) == 1 and store.append(extra) == 0
+        partitions = store.compact([ticker])
+        after = store.read([ticker]).sort_by("key").to_pylist()
+        checks["compaction keeps every article"] = (
+            partitions >= 1 and len(after) == len(before) + 1
+            and all(len(os.listdir(d)) == 1 for _, _, d in store.partitions([ticker])))
+
+        # --- Pipeline articles are archived with their intent category and semantic score ---
+        corpus = [{"title": r["title"] or "", "summary": r["summary"] or "", "link": r["url"] or "",
+                   "published": r["published"] or "", "source": r["source"] or ""}
+                  for r in csv_rows(os.path.join(HERE, CSV_FILES[0])) if r["ticker"] == ticker]
+        # Batch scores as fetch_news_batch passes them (no embedding model needed)
+        ni.SEMANTIC_ENABLED = True
+        sem_scores = [0.1 + 0.01 * (i % 30) for i in range(len(corpus))]
+        selected = ni.rank_articles(corpus, ticker, [ticker.lower()], sem_scores)
+        pipeline_store = NewsStore(os.path.join(tmp, "pipeline_store"))
+        archived = pipeline_store.append(article_rows({ticker: selected}))
+        pipeline = pipeline_store.read(columns=["category", "semantic_score"]).to_pylist()
+        checks["pipeline rows keep category and semantic score"] = (
+            archived == len(pipeline) > 0
+            and all(r["category"] is not None and r["semantic_score"] is not None for r in pipeline))
+    finally:
+        shutil.rmtree(tmp)
+
+    print("--- News Store Report ---")
+    print(f"imported {added} CSV articles + {ranked_added} ranked articles in {import_time:.1f}s")
+    print(f"{ticker}, last {QUERY_DAYS} days: {len(window)} articles from {len(wanted)} partitions "
+          f"({files_needed} files) in {query_time * 1000:.1f}ms; full CSV parse {parse_time * 1000:.0f}ms")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: news store checks passed.")
+    else:
+        print("FAIL: see checks above.")
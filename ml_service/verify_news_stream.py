@@ -0,0 +1,147 @@
+import sys
+import os
+import csv
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+import news_ingest as ni
+
+CORPUS = os.path.join(HERE, "multi_company_news.csv")
+
+# --- Reference: list pipeline with a full sort and the list-based quotas ---
+
+def legacy_quotas(articles, quota_per_category=2, total_limit=10):
+    bucket = defaultdict(list)
+    for article in articles:
+        bucket[article.get('_category', 'general')].append(article)
+    final = []
+    for cat in ["earnings", "analyst", "corporate", "management", "regulation", "general"]:
+        if cat in bucket:
+            final.extend(bucket[cat][:quota_per_category])
+    if len(final) < total_limit:
+        all_remaining = [a for a in articles if a not in final]
+        final.extend(all_remaining[:total_limit - len(final)])
+    return final[:total_limit]
+
+def legacy_rank(articles, ticker, company_keywords):
+    for article in articles:
+        article['_score'] = ni.score_article(article, ticker, company_keywords, 1.0)
+    articles.sort(key=lambda x: x['_score'], reverse=True)
+    return legacy_quotas(articles, quota_per_category=2, total_limit=8)
+
+def load_by_ticker():
+    by_ticker = defaultdict(list)
+    with open(CORPUS, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            by_ticker[row["ticker"]].append({
+                "title": row["title"], "summary": row["summary"], "link": row["url"],
+                "published": row["published"], "source": row["source"], "_ticker": row["ticker"],
+            })
+    return by_ticker
+
+def check_corpus_parity(by_ticker):
+    """Same top articles, in the same order, as sort + list quotas."""
+    for ticker, articles in by_ticker.items():
+        keywords = [ticker.lower()]
+        expected = [a["link"] for a in legacy_rank([dict(a) for a in articles], ticker, keywords)]
+        got = [a["link"] for a in ni.rank_articles([dict(a) for a in articles], ticker, keywords,
+                                                    [1.0] * len(articles))]
+        if expected != got:
+            print(f"MISMATCH for {ticker}:\n  expected {expected}\n  got      {got}")
+            return False
+    return True
+
+def check_random_parity(rounds=300):
+    """Heavy ties and lopsided categories, several quota/limit settings."""
+    rng = random.Random(3)
+    categories = ni.PRIORITY_CATEGORIES + ["filing"]
+    for _ in range(rounds):
+        n = rng.randint(0, 60)
+        quota, limit = rng.randint(1, 3), rng.randint(1, 15)
+        articles = [{"id": i, "_category": rng.choice(categories), "_score": rng.randint(-5, 5)} for i in range(n)]
+        ranked = sorted(articles, key=lambda a: a["_score"], reverse=True)
+        expected = [a["id"] for a in legacy_quotas(ranked, quota, limit)]
+
+        selector = ni.CategoryTopK(quota, limit)
+        for a in articles:
+            selector.push(a, a["_score"])
+        if [a["id"] for a in selector.result()] != expected:
+            return False
+        if [a["id"] for a in ni.apply_category_quotas(ranked, quota, limit)] != expected:
+            return False
+    return True
+
+def synthetic_stream(n, seed=11):
+    """A big news event: n articles for one ticker."""
+    rng = random.Random(seed)
+    words = ["earnings", "analyst", "upgrade", "ceo", "merger", "lawsuit", "shares", "guidance", "rally", "chip"]
+    for i in range(n):
+        yield {
+            "title": f"ACME {' '.join(rng.choice(words) for _ in range(6))} {i}",
+            "summary": " ".join(rng.choice(words) for _ in range(25)),
+            "link": f"https://example.com/{i}", "published": "2026-01-01", "source": "Wire",
+        }
+
+def measure(fn):
+    # Same cold keyword-scan cache for both pipelines
+    ni.NEWS_MATCHER.scan.cache_clear()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+if __name__ == "__main__":
+    by_ticker = load_by_ticker()
+    checks = {
+        "corpus: same top articles as sort + quotas": check_corpus_parity(by_ticker),
+        "random ties/quotas: identical selection": check_random_parity(),
+    }
+
+    print("--- News Stream Report ---")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+
+    print("\n--- One ticker with a large news event (score + select) ---")
+    keywords = ["acme"]
+    for n in (2000, 20000):
+        legacy, legacy_time, legacy_peak = measure(
+            lambda: [a["link"] for a in legacy_rank(list(synthetic_stream(n)), "ACME", keywords)])
+        stream, stream_time, stream_peak = measure(
+            lambda: [a["link"] for a in ni.select_top_articles(
+                ((a, ni.score_article(a, "ACME", keywords, 1.0)) for a in synthetic_stream(n)))])
+        same = "same" if legacy == stream else "DIFFERENT"
+        print(f"{n:>6} articles: list+sort {legacy_time:.2f}s {legacy_peak / 1e6:.1f}MB | "
+              f"stream+heaps {stream_time:.2f}s {stream_peak / 1e6:.1f}MB ({same} output)")
+        checks[f"{n} articles: same output"] = legacy == stream
+
+    print("\n--- Selection only (pre-scored articles) ---")
+    rng = random.Random(5)
+    for n in (20000, 200000):
+        scored = [({"id": i, "_category": rng.choice(ni.PRIORITY_CATEGORIES + ["filing"])}, rng.random())
+                  for i in range(n)]
+        t0 = time.perf_counter()
+        ranked = [a for a, _ in sorted(scored, key=lambda pair: pair[1], reverse=True)]
+        legacy = [a["id"] for a in legacy_quotas(ranked, 2, 8)]
+        sort_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        selector = ni.CategoryTopK(2, 8)
+        for a, score in scored:
+            selector.push(a, score)
+        heap = [a["id"] for a in selector.result()]
+        heap_time = time.perf_counter() - t0
+        print(f"{n:>7} articles: sort + quotas {sort_time * 1000:.0f}ms, bounded heaps {heap_time * 1000:.0f}ms")
+        checks[f"{n} pre-scored: same output"] = legacy == heap
+
+    if all(checks.values()):
+        print("Success: streaming selection matches the list pipeline.")
+    else:
+        print("FAIL: see checks above.")
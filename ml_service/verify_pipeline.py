@@ -1,11 +1,11 @@
 import sys
 import os
-import json
 
 # Add current directory to path so we can import modules
 sys.path.append(os.getcwd())
 
 import ml_service.generate_insights as gi
+from ml_service.insights_store import InsightsStore
 
 # Mock to avoid scraping 25 tickers
 def mock_get_tickers(limit=25):
@@ -19,20 +19,21 @@ def mock_fetch_news(ticker, days=14):
         {"title": "Elon Musk Tweets", "summary": "Something about AI.", "link": "http://example.com", "published": "2024-01-02", "source": "Mock"}
     ]
 
+def mock_fetch_news_batch(tickers, days=14, max_workers=4, persist=True):
+    return {t: mock_fetch_news(t, days) for t in tickers}, {}
+
 if __name__ == "__main__":
     gi.get_most_active_tickers = mock_get_tickers
     gi.fetch_news_data = mock_fetch_news
+    gi.fetch_news_batch = mock_fetch_news_batch
     
     # Run pipeline
     gi.main()
     
     # Verify Output
-    OUTPUT_FILE = "ml_service/insights_cache.json"
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "r") as f:
-            data = json.load(f)
-            
-        tsla = data.get("TSLA", {})
+    store = InsightsStore(legacy_path=None)
+    if os.path.exists(store.shard_path("TSLA")):
+        tsla = store.read("TSLA")
         print("\n--- Verification Report ---")
         print(f"Fundamentals Present: {bool(tsla.get('fundamentals'))}")
         print(f"Technicals Present: {bool(tsla.get('technicals'))}")
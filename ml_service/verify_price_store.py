@@ -0,0 +1,140 @@
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from price_store import PriceStore, OVERLAP_DAYS
+
+TICKERS = ["AAA", "BBB", "CCC"]
+HISTORY_DAYS = 400
+NEW_DAYS = 5
+
+
+class StubDownload:
+    """
+    download(tickers, **yf_kwargs) over synthetic daily bars ending `today`,
+    recording every call. `adjust` scales closes before a date, like a
+    split or dividend back-adjustment.
+    """
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.bars = {}
+        self.calls = []
+        self.today = pd.Timestamp.now().normalize() - pd.Timedelta(days=NEW_DAYS)
+        for ticker in TICKERS:
+            self.bars[ticker] = self._bars(pd.date_range(end=self.today, periods=HISTORY_DAYS, freq="D"))
+
+    def _bars(self, index):
+        close = 100 * np.exp(np.cumsum(self.rng.normal(0, 0.01, len(index))))
+        return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                             "Volume": self.rng.integers(1e5, 1e6, len(index)).astype(float)}, index=index)
+
+    def advance(self, days):
+        self.today += pd.Timedelta(days=days)
+        for ticker, df in self.bars.items():
+            new = self._bars(pd.date_range(df.index[-1] + pd.Timedelta(days=1), self.today, freq="D"))
+            new *= df["Close"].iloc[-1] / new["Close"].iloc[0]
+            self.bars[ticker] = pd.concat([df, new])
+
+    def adjust(self, ticker, before, factor):
+        df = self.bars[ticker].copy()
+        df.loc[df.index < before, ["Open", "High", "Low", "Close"]] *= factor
+        self.bars[ticker] = df
+
+    def __call__(self, tickers, start=None, period=None):
+        self.calls.append((tuple(tickers), start, period))
+        if start is not None:
+            return {t: self.bars[t][self.bars[t].index >= start] for t in tickers}, {}
+        return {t: self.bars[t] for t in tickers}, {}
+
+
+def matches(panel, download):
+    """Every history (served or stored) ends with the stub's current bars."""
+    return all(df.index[-1] == download.bars[t].index[-1]
+               and np.allclose(df["Close"].to_numpy(), download.bars[t]["Close"].iloc[-len(df):].to_numpy())
+               for t, df in panel.items()) and set(panel) == set(TICKERS)
+
+
+if __name__ == "__main__":
+    checks = {}
+    tmp = tempfile.mkdtemp()
+    try:
+        store = PriceStore(os.path.join(tmp, "price_store"))
+        download = StubDownload()
+
+        # --- First sync downloads the full period ---
+        panel, failed = store.sync(TICKERS, download)
+        checks["first sync downloads full history"] = (download.calls == [(tuple(TICKERS), None, "1y")]
+                                                       and not failed and matches(panel, download))
+
+        # --- Second sync is a delta with the overlap ---
+        download.advance(NEW_DAYS)
+        download.calls.clear()
+        panel, _ = store.sync(TICKERS, download)
+        (_, start, period), = download.calls
+        last_stored = download.bars[TICKERS[0]].index[-NEW_DAYS - 1]
+        checks["second sync is a delta with the overlap"] = (
+            period is None and pd.Timestamp(start) == last_stored - pd.Timedelta(days=OVERLAP_DAYS))
+        checks["delta merged onto stored history"] = (
+            matches(panel, download) and matches({t: store.read(t) for t in TICKERS}, download))
+
+        # --- A changed back-adjusted close forces a rewrite ---
+        download.advance(1)
+        download.adjust("BBB", download.today - pd.Timedelta(days=3), 0.5)
+        download.calls.clear()
+        panel, _ = store.sync(TICKERS, download)
+        checks["adjusted close rewrites the history"] = (
+            [c[0] for c in download.calls] == [tuple(TICKERS), ("BBB",)] and download.calls[1][2] == "1y"
+            and matches(panel, download) and matches({t: store.read(t) for t in TICKERS}, download))
+
+        # --- A corrupted column fails the CRC32 check and is refetched ---
+        path = os.path.join(store.root, "CCC", "Close.npy")
+        with open(path, "r+b") as f:
+            f.seek(-8, os.SEEK_END)
+            f.write(b"\x00" * 8)
+        checks["corrupted column fails the checksum"] = store.read("CCC") is None
+        download.calls.clear()
+        panel, _ = store.sync(TICKERS, download)
+        checks["corrupted ticker refetched in full"] = (
+            ("CCC",) in [c[0] for c in download.calls if c[2] == "1y"] and matches(panel, download)
+            and store.read("CCC") is not None)
+
+        # --- Concurrent writers stage in private directories ---
+        frame = download.bars["AAA"]
+        errors = []
+
+        def write():
+            try:
+                store.write("AAA", frame)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        checks["concurrent writes leave one valid copy"] = (
+            not errors and store.read("AAA") is not None and sorted(os.listdir(store.root)) == TICKERS)
+
+        # A crashed writer's staging directory is not a ticker
+        os.makedirs(os.path.join(store.root, ".AAA-crashed", "new"))
+        checks["stored tickers skip staging directories"] = store.tickers() == TICKERS
+    finally:
+        shutil.rmtree(tmp)
+
+    print("--- Price Store Report ---")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: price store checks passed.")
+    else:
+        print("FAIL: see checks above.")
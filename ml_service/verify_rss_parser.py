@@ -0,0 +1,124 @@
+import sys
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import feedparser
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rss_parser
+from feed_cache import parse_feed, _entry_time
+from news_ingest import clean_text
+
+# --- Fixtures shaped like the feeds in get_rss_feeds() ---
+
+def rss_fixture(items=300, hours_apart=5, shuffled=False):
+    """RSS 2.0 like Yahoo/Nasdaq (date-sorted) or Google News (relevance order)."""
+    now = time.time()
+    order = list(range(items))
+    if shuffled:
+        order = order[1::2] + order[::2]
+    body = []
+    for i in order:
+        zone = timezone(timedelta(minutes=[0, -300, 330, 60][i % 4]))
+        stamp = format_datetime(datetime.fromtimestamp(now - i * hours_apart * 3600, zone))
+        body.append(
+            f"<item><title>Acme Corp &amp; Partners headline {i}</title>"
+            f"<link>https://example.com/news/{i}</link>"
+            f"<description><![CDATA[<p>Acme <b>shares</b> moved&nbsp;today in story {i}.</p>]]></description>"
+            f"<pubDate>{stamp}</pubDate>"
+            f'<source url="https://example.com">Example Wire</source></item>'
+        )
+    return ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            "<title>Acme headlines</title><link>https://example.com</link>"
+            "<image><title>logo</title><url>https://example.com/logo.png</url></image>"
+            + "".join(body) + "</channel></rss>").encode("utf-8")
+
+def atom_fixture(items=300, hours_apart=5):
+    now = datetime.utcnow()
+    body = []
+    for i in range(items):
+        stamp = (now - timedelta(hours=i * hours_apart)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        body.append(
+            f'<entry><title type="html">Acme update {i} &lt;b&gt;live&lt;/b&gt;</title>'
+            f'<link rel="alternate" href="https://example.com/atom/{i}"/>'
+            f'<link rel="self" href="https://example.com/api/{i}"/>'
+            f"<updated>{stamp}</updated>"
+            f'<summary type="html">&lt;p&gt;Summary of Acme update {i} for investors.&lt;/p&gt;</summary></entry>'
+        )
+    return ('<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            "<title>Acme Atom</title>" + "".join(body) + "</feed>").encode("utf-8")
+
+def rdf_fixture():
+    return ('<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns="http://purl.org/rss/1.0/"><channel><title>RDF feed</title></channel>'
+            '<item><title>RDF item</title><link>https://example.com/rdf</link></item></rdf:RDF>').encode()
+
+FIXTURES = {
+    "rss sorted": rss_fixture(),
+    "rss relevance order": rss_fixture(shuffled=True),
+    "atom": atom_fixture(),
+}
+
+# --- Reference: what fetch_single_feed got from feedparser ---
+
+def feedparser_entries(content):
+    feed = feedparser.parse(content)
+    return getattr(feed.feed, 'title', 'Unknown'), [{
+        'title': getattr(e, 'title', ''), 'link': getattr(e, 'link', ''),
+        'summary': getattr(e, 'summary', ''), 'published': _entry_time(e),
+    } for e in feed.entries]
+
+def comparable(parsed, cutoff=None):
+    title, entries = parsed
+    return title, [(clean_text(e['title']), e['link'], clean_text(e['summary']), e['published'])
+                   for e in entries
+                   if e['published'] is not None and (cutoff is None or e['published'] >= cutoff)]
+
+def measure(fn, repeat=20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - t0) / repeat
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == "__main__":
+    cutoff = (datetime.now() - timedelta(days=14)).timestamp()
+    checks = {}
+
+    for name, content in FIXTURES.items():
+        reference = feedparser_entries(content)
+        date_sorted = name != "rss relevance order"
+        checks[f"{name}: same entries as feedparser"] = comparable(rss_parser.parse_feed(content)) == comparable(reference)
+        checks[f"{name}: same entries after cutoff"] = (
+            comparable(rss_parser.parse_feed(content, cutoff, date_sorted)) == comparable(reference, cutoff))
+
+    checks["rdf falls back to feedparser"] = (rss_parser.parse_feed(rdf_fixture()) is None
+                                              and parse_feed(rdf_fixture())[1][0]['title'] == "RDF item")
+    broken = FIXTURES["rss sorted"][:-200]
+    checks["malformed xml falls back"] = rss_parser.parse_feed(broken) is None and len(parse_feed(broken)[1]) > 0
+
+    print("--- RSS Parser Report ---")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+
+    print("\n--- Benchmark (300 entries, 14-day cutoff) ---")
+    print(f"{'fixture':<22} {'feedparser':>18} {'streaming':>18}  speedup")
+    for name, content in FIXTURES.items():
+        old_time, old_peak = measure(lambda: feedparser_entries(content))
+        new_time, new_peak = measure(lambda: rss_parser.parse_feed(content, cutoff, name != "rss relevance order"))
+        print(f"{name:<22} {old_time * 1000:>7.1f}ms {old_peak / 1024:>6.0f}KB "
+              f"{new_time * 1000:>7.1f}ms {new_peak / 1024:>6.0f}KB  {old_time / new_time:.0f}x")
+
+    if all(checks.values()):
+        print("Success: streaming parser matches feedparser.")
+    else:
+        print("FAIL: see checks above.")
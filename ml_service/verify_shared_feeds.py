@@ -0,0 +1,113 @@
+import sys
+import os
+import csv
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+import feed_cache
+import news_ingest as ni
+from verify_feed_cache import FeedStub, make_feed, reset_stats
+
+CORPUS = os.path.join(HERE, "multi_company_news.csv")
+
+def company_keywords(ticker, company_name):
+    """Same keyword list get_company_info() builds from yfinance's shortName."""
+    keywords = [ticker.lower(), company_name.lower()]
+    keywords += [word.lower() for word in company_name.split() if len(word) > 3]
+    return keywords
+
+def load_corpus():
+    articles, keywords = [], {}
+    with open(CORPUS, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            articles.append({"title": row["title"], "summary": row["summary"], "link": row["url"]})
+            keywords[row["ticker"]] = company_keywords(row["ticker"], row["company"])
+    return articles, keywords
+
+def check_routing(articles, keywords):
+    """Routing must pick exactly the articles is_relevant() accepts per ticker."""
+    routed = ni.route_shared_articles(articles, keywords)
+    for ticker, kws in keywords.items():
+        expected = [a["link"] for a in articles if ni.is_relevant(a, ticker, kws)]
+        if [a["link"] for a in routed[ticker]] != expected:
+            print(f"MISMATCH for {ticker}")
+            return False
+    return True
+
+def bench_routing(articles, keywords):
+    print("\n--- Routing cost vs universe size ---")
+    tickers = list(keywords)
+    for size in (len(tickers) // 4, len(tickers) // 2, len(tickers)):
+        subset = {t: keywords[t] for t in tickers[:size]}
+        t0 = time.perf_counter()
+        for ticker, kws in subset.items():
+            [a for a in articles if ni.is_relevant(a, ticker, kws)]
+        loop_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ni.route_shared_articles(articles, subset)
+        route_time = time.perf_counter() - t0
+        print(f"{size:>4} tickers: is_relevant per ticker {loop_time:.3f}s, one-pass routing {route_time:.3f}s")
+
+def check_batch_fetches(tickers):
+    """fetch_news_batch against a stub server: shared feeds requested once per batch."""
+    ticker_paths = {t: [f"/{t}/{i}.xml" for i in range(5)] for t in tickers}
+    shared_paths = ["/shared/benzinga.xml", "/shared/market_currents.xml"]
+    FeedStub.bodies = {p: make_feed(p, items=20) for paths in ticker_paths.values() for p in paths}
+    # Each shared headline mentions one of the tickers
+    for path in shared_paths:
+        body = make_feed(path, items=40).decode()
+        for i in range(40):
+            body = body.replace(f"{path} headline {i} ", f"{tickers[i % len(tickers)]} headline {i} ", 1)
+        FeedStub.bodies[path] = body.encode()
+
+    requests_by_path = {}
+    original_get = FeedStub.do_GET
+    def counting_get(self):
+        requests_by_path[self.path] = requests_by_path.get(self.path, 0) + 1
+        original_get(self)
+    FeedStub.do_GET = counting_get
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the pipeline at the stub instead of the live feeds
+        feed_cache._feed_cache = feed_cache.FeedCache(path=os.path.join(tmp, "feeds.json"))
+        ni.get_rss_feeds = lambda t: [base + p for p in ticker_paths[t]]
+        ni.SHARED_FEEDS = [base + p for p in shared_paths]
+        ni.get_company_info = lambda t: [t.lower()]
+        ni.NearDuplicateIndex.load = classmethod(lambda cls, path=None, **kw: cls(**kw))
+        ni.NearDuplicateIndex.save = lambda self, path=None: None
+
+        reset_stats()
+        news, failed = ni.fetch_news_batch(tickers, days=30)
+
+    server.shutdown()
+    FeedStub.do_GET = original_get
+    shared_requests = sum(requests_by_path.get(p, 0) for p in shared_paths)
+    print(f"\nShared feed requests for {len(tickers)} tickers: {shared_requests} "
+          f"(previously {len(shared_paths) * len(tickers)})")
+    return shared_requests == len(shared_paths) and not failed and all(news.values())
+
+if __name__ == "__main__":
+    articles, keywords = load_corpus()
+
+    print("--- Shared Feed Report ---")
+    results = {"routing matches is_relevant": check_routing(articles, keywords)}
+    bench_routing(articles, keywords)
+    results["shared feeds fetched once per batch"] = check_batch_fetches(["AAPL", "MSFT", "NVDA", "TSLA"])
+
+    print()
+    for name, ok in results.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(results.values()):
+        print("Success: shared feed checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,181 @@
+import sys
+import os
+import io
+import copy
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Add current directory to path so we can import modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(HERE)
+
+import generate_insights as gi
+from fake_llm_server import FakeLLMServer
+from insights_store import InsightsStore
+from news_summarize import NewsSummarizer
+from stage_memo import get_stage_memo
+from summary_cache import SummaryCache, SUMMARY_TTL_HOURS
+from verify_news_stream import load_by_ticker
+
+BARS = 300
+LLM_LATENCY = 0.5
+
+
+def synthetic_bars(seed, days=BARS):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    index = pd.bdate_range("2024-01-01", periods=days)
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99,
+                         "Close": close, "Volume": rng.integers(1e6, 2e6, days).astype(float)}, index=index)
+
+
+class Inputs:
+    """Mutable stand-in for the price and news sources."""
+
+    def __init__(self):
+        self.news = {t: a[:12] for t, a in sorted(load_by_ticker().items())}
+        self.tickers = list(self.news)
+        self.bars = {t: synthetic_bars(i) for i, t in enumerate(self.tickers)}
+
+    def fetch_data_batch(self, tickers):
+        return {t: self.bars[t].copy() for t in tickers}, {}
+
+    def fetch_news_batch(self, tickers, days=14, max_workers=4, persist=True):
+        return {t: copy.deepcopy(self.news[t]) for t in tickers}, {}
+
+    def add_bar(self, ticker):
+        df = self.bars[ticker]
+        row = df.iloc[[-1]].copy()
+        row.index = [df.index[-1] + pd.offsets.BDay()]
+        row["Close"] *= 1.03
+        self.bars[ticker] = pd.concat([df, row])
+
+    def add_article(self, ticker):
+        self.news[ticker] = [{"title": f"{ticker} announces surprise buyback program", "summary": "",
+                              "link": f"http://example.com/{ticker}/buyback", "published": "2024-06-01",
+                              "source": "Mock"}] + self.news[ticker][:-1]
+
+
+class NextWeek(datetime):
+    """datetime as seen by the pipeline eight days from now."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=8)
+
+
+class Counting:
+    """Counts calls through a module attribute."""
+
+    def __init__(self, module, name):
+        self.calls = 0
+        self.fn = getattr(module, name)
+        setattr(module, name, self)
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.fn(*args, **kwargs)
+
+
+def batch(inputs, server, memo=True, summary_ttl_hours=SUMMARY_TTL_HOURS):
+    """One batch over the inputs, written to the store like main() does."""
+    counters = {name: Counting(gi, name) for name in
+                ("compute_indicators_incremental", "generate_detailed_strategy", "categorize_news")}
+    requests = server.requests
+    get_stage_memo().enabled = memo
+    summarizer = NewsSummarizer(cache=SummaryCache(ttl_hours=summary_ttl_hours))
+    with redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        insights = gi.run_batch(inputs.tickers, summarizer, workers=4,
+                                stages=["technicals", "strategy", "news", "summary"])
+        seconds = time.perf_counter() - t0
+        InsightsStore().write(insights)
+    for name, counter in counters.items():
+        setattr(gi, name, counter.fn)
+    calls = {name: c.calls for name, c in counters.items()}
+    calls["llm"] = server.requests - requests
+    for result in insights.values():
+        result.pop("last_updated")
+    return insights, calls, seconds
+
+
+if __name__ == "__main__":
+    checks = {}
+    inputs = Inputs()
+    gi.fetch_data_batch = inputs.fetch_data_batch
+    gi.fetch_news_batch = inputs.fetch_news_batch
+    gi.prefetch_metadata = lambda tickers: None
+    n = len(inputs.tickers)
+
+    cwd = os.getcwd()
+    tmp = tempfile.mkdtemp()
+    os.makedirs(os.path.join(tmp, "ml_service"))
+    os.chdir(tmp)
+    try:
+        with FakeLLMServer(latency=LLM_LATENCY) as server:
+            os.environ["LLM_API_URL"] = server.url
+            first, cold, cold_time = batch(inputs, server)
+            checks["first run computes every stage"] = (cold["compute_indicators_incremental"] == 1
+                                                        and cold["generate_detailed_strategy"] == n
+                                                        and cold["llm"] == n)
+
+            # Same inputs: nothing is recomputed, same output
+            again, warm, warm_time = batch(inputs, server)
+            checks["unchanged rerun: no stage recomputed"] = (warm["compute_indicators_incremental"] == 0
+                                                             and warm["generate_detailed_strategy"] == 0
+                                                             and warm["categorize_news"] == 0 and warm["llm"] == 0)
+            checks["unchanged rerun: same output"] = again == first
+
+            # Summary cache alone: last run's note steers headline choice
+            _, plain, plain_time = batch(inputs, server, memo=False)
+
+            # A new bar reruns that ticker's technicals and strategy only
+            bar_ticker, news_ticker = inputs.tickers[0], inputs.tickers[1]
+            inputs.add_bar(bar_ticker)
+            after_bar, bar, _ = batch(inputs, server)
+            checks["new bar: only that ticker's technicals + strategy"] = (
+                bar["compute_indicators_incremental"] == 1 and bar["generate_detailed_strategy"] == 1
+                and bar["llm"] == 0 and after_bar[bar_ticker]["technicals"] != first[bar_ticker]["technicals"])
+            checks["new bar: matches a full recompute"] = batch(inputs, server, memo=False)[0][bar_ticker] == after_bar[bar_ticker]
+
+            # A new article reruns that ticker's categories and summary only
+            inputs.add_article(news_ticker)
+            _, article, _ = batch(inputs, server)
+            checks["new article: only that ticker's categories + summary"] = (
+                article["categorize_news"] == 1 and article["llm"] == 1
+                and article["generate_detailed_strategy"] == 0)
+
+            # Changed code invalidates the stage
+            gi.STAGE_CODE["strategy"] = "edited"
+            _, edited, _ = batch(inputs, server)
+            checks["code change: stage reruns for every ticker"] = (edited["generate_detailed_strategy"] == n
+                                                                  and edited["compute_indicators_incremental"] == 0)
+
+            # A week later the notes have expired from the summary cache; the memo does not outlive them
+            gi.datetime = NextWeek
+            _, later, _ = batch(inputs, server, summary_ttl_hours=0)
+            gi.datetime = datetime
+            checks["expired summaries regenerated on a later day"] = later["llm"] == n
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+
+    print("--- Stage Memo Report ---")
+    print(f"{n} tickers, {BARS} bars each, {LLM_LATENCY}s per LLM call")
+    for name, calls, seconds in (("first run", cold, cold_time), ("unchanged, memo", warm, warm_time),
+                                 ("unchanged, no memo", plain, plain_time)):
+        print(f"{name:<19} {seconds:5.2f}s  indicator batches {calls['compute_indicators_incremental']}, "
+              f"strategies {calls['generate_detailed_strategy']}, categorizations {calls['categorize_news']}, "
+              f"LLM calls {calls['llm']}")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: stage memo checks passed.")
+    else:
+        print("FAIL: see checks above.")
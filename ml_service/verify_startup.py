@@ -0,0 +1,61 @@
+import sys
+import os
+import json
+import subprocess
+
+# Import-time budget per module (seconds); heavy libraries must load lazily
+IMPORT_BUDGET = 1.0
+
+MODULES = [
+    "fundamentals",
+    "indicators",
+    "strategy",
+    "news_categorize",
+    "news_summarize",
+    "news_ingest",
+    "market_scanner",
+    "generate_insights",
+]
+
+# Libraries that must not be loaded just by importing a pipeline module
+HEAVY_LIBRARIES = ["torch", "transformers", "sentence_transformers", "yfinance", "pandas", "ta"]
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "heavy": heavy}}))
+"""
+
+def measure(module):
+    """Imports `module` in a fresh interpreter and returns its timing report."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_LIBRARIES)],
+        cwd=here, capture_output=True, text=True, timeout=300,
+    )
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    print("--- Startup Report ---")
+    print(f"{'module':<20} {'import (s)':>10} {'peak RSS (MB)':>14}  heavy libs loaded")
+
+    failures = []
+    for module in MODULES:
+        report = measure(module)
+        if "error" in report:
+            print(f"{module:<20} ERROR: {report['error']}")
+            failures.append(module)
+            continue
+        print(f"{module:<20} {report['seconds']:>10.3f} {report['peak_rss_mb']:>14.1f}  {', '.join(report['heavy']) or '-'}")
+        if report["seconds"] > IMPORT_BUDGET or report["heavy"]:
+            failures.append(module)
+
+    if failures:
+        print(f"FAIL: over budget or eager heavy imports: {', '.join(failures)}")
+    else:
+        print(f"Success: every module imports in under {IMPORT_BUDGET}s without heavy libraries.")
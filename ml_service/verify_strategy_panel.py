@@ -0,0 +1,281 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from monte_carlo import ATR_BAND, daily_volatility, level_probabilities, probabilities_dict
+from strategy import generate_detailed_strategy
+from strategy_panel import generate_strategy_panel, evaluate_strategies, indicator_table, strategy_reports
+from verify_monte_carlo import universe_technicals
+
+UNIVERSE = 5000
+PARITY_TICKERS = 1000
+
+
+# ============================================================
+# REFERENCE: THE PER-TICKER RULES
+# ============================================================
+# Frozen copy of generate_detailed_strategy() as it was before the rules
+# moved into strategy_panel.py (strategy.py now wraps the panel, so it
+# can't serve as its own reference). Only the path simulation is shared.
+
+def reference_swing_setup(price, rsi, sma_20):
+    if not price > sma_20:
+        return "Sell / Avoid", {
+            "type": "Bearish",
+            "trigger": f"Break below ${round(price * 0.98, 2)}",
+            "target": round(price * 0.94, 2),
+            "stop_loss": round(price * 1.02, 2)
+        }
+    if rsi < 35:
+        return "Buy Dip", {
+            "type": "Bullish",
+            "trigger": f"Limit Buy at ${round(price, 2)}",
+            "target": round(sma_20, 2),
+            "stop_loss": round(price * 0.96, 2)
+        }
+    return "Weak Sell / Avoid", {}
+
+
+def reference_plan_levels(technicals, setup=None):
+    price = float(technicals.get("current_price", 0) or 0)
+    atr = float(technicals.get("ATR", 0) or 0)
+    band = ATR_BAND * atr if atr > 0 else ATR_BAND * price * float(technicals.get("Volatility", 0) or 0)
+    levels = [v for v in ((setup or {}).get("stop_loss"), (setup or {}).get("target")) if isinstance(v, (int, float))]
+    above = [v for v in levels if v > price]
+    below = [v for v in levels if 0 < v < price]
+    up = min(above) if above else price + band
+    down = max(below) if below else price - band
+    return price, up, down
+
+
+def reference_probabilities(technicals):
+    """Monte-Carlo block for one ticker's swing setup, or None."""
+    if not technicals or "error" in technicals or not technicals.get("current_price"):
+        return None
+    _, setup = reference_swing_setup(technicals["current_price"], technicals.get("RSI", 50),
+                                     technicals.get("SMA_20", 0))
+    price, up, down = reference_plan_levels(technicals, setup)
+    vol = daily_volatility(technicals.get("current_price", 0) or 0, technicals.get("Volatility", 0) or 0,
+                           technicals.get("ATR", 0) or 0)
+    p_up, p_down, p_none = level_probabilities(*(np.array([v], dtype=np.float64) for v in (price, up, down, vol)))
+    if np.isnan(p_up[0]):
+        return None
+    return probabilities_dict(p_up[0], p_down[0], p_none[0], up, down)
+
+
+def reference_heuristic(technicals, sentiment_data):
+    price = technicals.get("current_price", 0)
+    rsi = technicals.get("RSI", 50)
+    macd = technicals.get("MACD", 0)
+    macd_signal = technicals.get("MACD_Signal", 0)
+    sma_200 = technicals.get("SMA_200", 0)
+
+    score = 0
+    if price > sma_200: score += 20
+    if macd > macd_signal: score += 20
+    if rsi > 40 and rsi < 60: score += 10
+    elif rsi < 30: score += 15
+
+    sent_score = sentiment_data.get("overall_score", 0)
+    if sent_score > 0.1: score += 20
+    elif sent_score < -0.1: score -= 20
+
+    bull_prob = min(max(score, 10), 80) + 10
+    bear_prob = 100 - bull_prob
+    neutral_prob = 25
+    bull_prob = round(bull_prob * 0.75)
+    bear_prob = round(bear_prob * 0.75)
+
+    return {
+        "bull_case": f"{bull_prob}%",
+        "bear_case": f"{bear_prob}%",
+        "neutral_case": f"{neutral_prob}%",
+        "method": "heuristic"
+    }
+
+
+def reference_strategy(technicals, sentiment_data, fundamentals=None, probabilities=None):
+    price = technicals.get("current_price", 0)
+    rsi = technicals.get("RSI", 50)
+    macd = technicals.get("MACD", 0)
+    macd_signal = technicals.get("MACD_Signal", 0)
+    sma_20 = technicals.get("SMA_20", 0)
+    sma_200 = technicals.get("SMA_200", 0)
+
+    if price == 0:
+        return {
+            "entry": "N/A",
+            "stop_loss": "N/A",
+            "take_profit": "N/A",
+            "signal": "Neutral (No Data)",
+            "trend_status": "N/A",
+            "technical_table": [],
+            "scenarios": {},
+            "probabilities": {}
+        }
+
+    tech_table = []
+    rsi_interp = "Neutral"
+    if rsi < 30: rsi_interp = "Oversold (Buy Signal)"
+    elif rsi < 45: rsi_interp = "Approaching Oversold"
+    elif rsi > 70: rsi_interp = "Overbought (Sell Signal)"
+    elif rsi > 55: rsi_interp = "Momentum Building"
+    tech_table.append({"indicator": "RSI (14-Day)", "reading": f"{rsi:.2f}", "interpretation": rsi_interp})
+
+    macd_interp = "Bullish" if macd > macd_signal else "Bearish"
+    tech_table.append({"indicator": "MACD", "reading": f"{macd:.2f} / {macd_signal:.2f}", "interpretation": f"{macd_interp} Cross"})
+
+    trend_status = "Uptrend" if price > sma_200 else "Downtrend"
+    short_term_status = "Bullish" if price > sma_20 else "Bearish/Consolidation"
+    tech_table.append({"indicator": "SMA 200", "reading": f"${sma_200:.2f}", "interpretation": "Long-term Support" if price > sma_200 else "Long-term Resistance"})
+    tech_table.append({"indicator": "SMA 20", "reading": f"${sma_20:.2f}", "interpretation": "Immediate Support" if price > sma_20 else "Immediate Resistance"})
+
+    conservative_action = "WAIT / HOLD"
+    conservative_reason = "Volatile market conditions."
+    target_buy_zone = round(sma_200 * 1.02, 2)
+    pe_ratio = fundamentals.get("trailingPE", "N/A") if fundamentals else "N/A"
+    if isinstance(pe_ratio, (int, float)) and pe_ratio > 60:
+        conservative_reason += " Valuation is high (Growth Premium)."
+    if trend_status == "Uptrend" and rsi < 40:
+        conservative_action = "ACCUMULATE"
+        conservative_reason = "Long term trend is up and price is pulling back."
+
+    swing_signal, swing_setup = reference_swing_setup(price, rsi, sma_20)
+    scenarios = {
+        "conservative": {
+            "action": conservative_action,
+            "reason": conservative_reason,
+            "entry_zone": f"${target_buy_zone} - ${round(target_buy_zone*1.05, 2)}",
+            "target": "18-24 months"
+        },
+        "swing": {
+            "action": swing_signal,
+            "setup": swing_setup
+        }
+    }
+
+    if probabilities is None:
+        probabilities = reference_probabilities(technicals)
+    if probabilities is None:
+        probabilities = reference_heuristic(technicals, sentiment_data)
+
+    return {
+        "entry": scenarios["swing"]["setup"].get("trigger", "Wait"),
+        "stop_loss": scenarios["swing"]["setup"].get("stop_loss", "N/A"),
+        "take_profit": scenarios["swing"]["setup"].get("target", "N/A"),
+        "signal": swing_signal,
+        "trend_status": f"{short_term_status} within {trend_status}",
+        "technical_table": tech_table,
+        "scenarios": scenarios,
+        "probabilities": probabilities
+    }
+
+
+def varied_inputs(n, seed):
+    """
+    Technicals that reach every branch of the rules (oversold dips, rich
+    valuations, missing volatility, no data), with fundamentals and
+    sentiment scores.
+    """
+    rng = np.random.default_rng(seed)
+    base = list(universe_technicals(200, seed=seed).values())
+    technicals, fundamentals, sentiment = {}, {}, {}
+    for i in range(n):
+        tech = dict(base[i % len(base)])
+        price = tech["current_price"]
+        tech["RSI"] = round(float(rng.uniform(10, 90)), 2)
+        tech["SMA_20"] = round(price * float(rng.uniform(0.9, 1.1)), 2)
+        tech["SMA_200"] = round(price * float(rng.uniform(0.8, 1.2)), 2)
+        if i % 17 == 0:
+            tech["Volatility"] = 0.0
+        if i % 29 == 0:
+            tech["Volatility"] = tech["ATR"] = 0.0
+        if i % 31 == 0:
+            tech = {"error": "No data returned"}
+        if i % 37 == 0:
+            tech.pop("RSI", None)
+        ticker = f"S{i:05d}"
+        technicals[ticker] = tech
+        fundamentals[ticker] = {"trailingPE": [12.5, 75.0, "N/A", None][i % 4]} if i % 11 else {"error": "x"}
+        sentiment[ticker] = float(rng.choice([-0.5, 0.0, 0.05, 0.5]))
+    return technicals, fundamentals, sentiment
+
+
+def scalar_reports(technicals, fundamentals, sentiment, probabilities=None):
+    return {t: reference_strategy(technicals[t], {"overall_score": sentiment[t]}, fundamentals[t],
+                                  probabilities=probabilities)
+            for t in technicals}
+
+
+if __name__ == "__main__":
+    checks = {}
+
+    # --- Same reports as the per-ticker reference ---
+    technicals, fundamentals, sentiment = varied_inputs(PARITY_TICKERS, seed=2)
+    panel = generate_strategy_panel(technicals, fundamentals, sentiment)
+    scalar = scalar_reports(technicals, fundamentals, sentiment)
+    mismatched = [t for t in technicals if panel[t] != scalar[t]]
+    checks["reports match the per-ticker reference"] = not mismatched
+    signals = {}
+    for report in scalar.values():
+        signals[report["signal"]] = signals.get(report["signal"], 0) + 1
+    methods = {report["probabilities"].get("method") for report in scalar.values()}
+    checks["every branch exercised"] = (len(signals) == 4 and methods == {"monte_carlo", "heuristic", None}
+                                        and any("Growth Premium" in r["scenarios"].get("conservative", {}).get("reason", "")
+                                                for r in scalar.values()))
+
+    checks["generate_detailed_strategy matches the reference"] = all(
+        generate_detailed_strategy(technicals[t], {"overall_score": sentiment[t]}, fundamentals[t]) == scalar[t]
+        for t in list(technicals)[:200])
+
+    # Precomputed probabilities pass through like the scalar argument
+    blocks = {t: {"bull_case": "1%"} for t in technicals}
+    table = indicator_table(technicals, fundamentals, sentiment)
+    passed = strategy_reports(evaluate_strategies(table, simulate=False), blocks)
+    checks["precomputed probabilities used"] = all(
+        passed[t] == reference_strategy(technicals[t], {"overall_score": sentiment[t]}, fundamentals[t],
+                                        probabilities=blocks[t])
+        for t in list(technicals)[:200])
+
+    # --- Rescoring a large universe ---
+    big, big_fund, big_sent = varied_inputs(UNIVERSE, seed=3)
+    t0 = time.perf_counter()
+    big_table = indicator_table(big, big_fund, big_sent)
+    frame = evaluate_strategies(big_table, simulate=False)
+    columns_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rules_panel = strategy_reports(frame)
+    format_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rules_scalar = scalar_reports(big, big_fund, big_sent, probabilities={})
+    scalar_rules_time = time.perf_counter() - t0
+    checks["rules-only reports match"] = rules_panel == rules_scalar
+
+    t0 = time.perf_counter()
+    generate_strategy_panel(big, big_fund, big_sent)
+    panel_time = time.perf_counter() - t0
+    sample = list(big)[::25]
+    t0 = time.perf_counter()
+    scalar_reports({t: big[t] for t in sample}, big_fund, big_sent)
+    scalar_time = (time.perf_counter() - t0) * UNIVERSE / len(sample)
+    checks[f"{UNIVERSE} tickers rescored faster than per-ticker calls"] = panel_time < scalar_time
+
+    print("--- Strategy Panel Report ---")
+    print(f"{PARITY_TICKERS} tickers compared: " + ", ".join(f"{name} {n}" for name, n in sorted(signals.items())))
+    if mismatched:
+        print(f"mismatched: {mismatched[:5]}")
+    print(f"{UNIVERSE} tickers, rules only: {columns_time:.3f}s as columns + {format_time:.2f}s formatting, "
+          f"{scalar_rules_time:.2f}s per-ticker calls")
+    print(f"{UNIVERSE} tickers with probabilities: {panel_time:.2f}s as columns, "
+          f"~{scalar_time:.1f}s per-ticker calls")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: strategy panel checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -0,0 +1,96 @@
+import sys
+import os
+import tempfile
+import time
+
+# Add current directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from summary_cache import SummaryCache, SUMMARY_TTL_HOURS
+from news_summarize import NewsSummarizer
+
+class CountingSummarizer(NewsSummarizer):
+    """NewsSummarizer whose API call is replaced by a counter."""
+
+    def __init__(self, cache, fail=False):
+        super().__init__(cache=cache)
+        self.calls = 0
+        self.fail = fail
+
+    async def _complete_all(self, prompts):
+        results = []
+        for _ in prompts:
+            self.calls += 1
+            results.append(RuntimeError("503 Service Unavailable") if self.fail else (f"note #{self.calls}", 700))
+        return results
+
+def news(*titles, category="earnings"):
+    return {category: [{"title": t} for t in titles]}
+
+QUIET = news("Acme beats Q3 estimates", "Acme raises guidance", "Analysts lift Acme target")
+MOVED = news("Acme beats Q3 estimates", "Acme raises guidance", "Acme CFO to step down")
+
+if __name__ == "__main__":
+    checks = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "summaries.json")
+
+        # Day 1: one call per distinct headline set
+        s = CountingSummarizer(SummaryCache(path=path))
+        first = s.generate_summary(QUIET, ticker="ACME")
+        checks["same headlines, same run: cached"] = s.generate_summary(QUIET, ticker="ACME") == first and s.calls == 1
+        s.generate_summary(MOVED, ticker="ACME")
+        checks["changed headline: new call"] = s.calls == 2
+        s.cache.save()
+
+        # Day 2: quiet ticker costs nothing
+        s = CountingSummarizer(SummaryCache(path=path))
+        checks["next run, unchanged headlines: no call"] = s.generate_summary(QUIET, ticker="ACME") == first and s.calls == 0
+        checks["tokens saved counted"] = s.cache.tokens_saved == 700
+
+        # Anything else in the prompt changes the key
+        other_model = CountingSummarizer(SummaryCache(path=path))
+        other_model.prompt_key = "different-template"
+        other_model.generate_summary(QUIET, ticker="ACME")
+        checks["different model/template: new call"] = other_model.calls == 1
+        reordered = {"analyst": QUIET["earnings"][2:], "earnings": QUIET["earnings"][:2]}
+        s.generate_summary(reordered, ticker="ACME")
+        checks["different prompt order: new call"] = s.calls == 1
+
+        # Near-duplicate reuse: off by default, per ticker when enabled
+        near = dict(QUIET, **news("Acme shares rise premarket", category="analyst"))
+        s = CountingSummarizer(SummaryCache(path=path))
+        s.generate_summary(near, ticker="ACME")
+        checks["near reuse off by default"] = s.calls == 1
+        s = CountingSummarizer(SummaryCache(path=path, reuse_overlap=0.7))
+        checks["near reuse above overlap"] = s.generate_summary(near, ticker="ACME") == first and s.calls == 0
+        s.generate_summary(near, ticker="OTHER")
+        checks["near reuse stays within ticker"] = s.calls == 1
+        s.generate_summary(news("Acme beats Q3 estimates", "Totally new story", "Another new story"), ticker="ACME")
+        checks["below overlap: new call"] = s.calls == 2
+
+        # Failures are returned as text and not cached
+        failing = CountingSummarizer(SummaryCache(path=None), fail=True)
+        error = failing.generate_summary(QUIET, ticker="ACME")
+        failing.generate_summary(QUIET, ticker="ACME")
+        checks["errors not cached"] = error.startswith("Error generating summary") and failing.calls == 2
+
+        # TTL and LRU eviction
+        cache = SummaryCache(path=None, max_entries=3)
+        for i in range(5):
+            cache.put(f"k{i}", f"s{i}")
+            if i == 2:
+                cache.get("k0")
+        checks["LRU keeps recently used"] = len(cache) == 3 and cache.get("k0") == "s0" and cache.get("k1") is None
+        cache._entries["k3"]["created_at"] = time.time() - 48 * 3600
+        checks["two-day-old entry still served"] = cache.get("k3") == "s3"
+        cache._entries["k4"]["created_at"] = time.time() - (SUMMARY_TTL_HOURS + 1) * 3600
+        checks["expired entry dropped"] = cache.get("k4") is None and len(cache) == 2
+
+    print("--- Summary Cache Report ---")
+    for name, ok in checks.items():
+        print(f"{name}: {'ok' if ok else 'FAILED'}")
+    if all(checks.values()):
+        print("Success: summary cache checks passed.")
+    else:
+        print("FAIL: see checks above.")
@@ -186,6 +186,19 @@ export const getStockInsights = async (req, res) => {
       return res.status(400).json({ message: "Ticker is required" });
     }
 
+    const tickerUpper = ticker.toUpperCase();
+
+    // One file per ticker (ml_service/insights_store.py); same naming rule as shard_name()
+    const shardName = tickerUpper.replace(/[^A-Z0-9._-]/g, "_") + ".json";
+    const shardPath = path.join(process.cwd(), "ml_service", "insights", shardName);
+    try {
+      const shard = await fs.promises.readFile(shardPath, "utf-8");
+      return res.status(200).json(JSON.parse(shard));
+    } catch (err) {
+      if (err.code !== "ENOENT") throw err;
+    }
+
+    // Fall back to the old single-file output
     const insightsPath = path.join(process.cwd(), "ml_service", "insights_cache.json");
 
     // Check if cache exists
@@ -196,7 +209,6 @@ export const getStockInsights = async (req, res) => {
     const data = fs.readFileSync(insightsPath, "utf-8");
     const insights = JSON.parse(data);
 
-    const tickerUpper = ticker.toUpperCase();
     if (insights[tickerUpper]) {
       return res.status(200).json(insights[tickerUpper]);
     } else {